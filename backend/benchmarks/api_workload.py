@@ -0,0 +1,334 @@
+"""
+Load test: a mixed storefront and admin workload against a freshly seeded API.
+
+Boots server.py in a child process with uvicorn. It runs against a local
+MongoDB, or against an in-memory mongomock database with --mongomock, which
+needs mongomock-motor. The database is seeded with seed_generator's synthetic
+catalog (--islands, --products, --reviews, --orders) plus the quiz, FAQ and
+theme from seed_data.py. Then --concurrency async clients run a weighted mix of requests for --duration seconds:
+
+    browse    product grid, island filter, product detail, islands, search,
+              similar products, reviews
+    quiz      fetch the quiz, submit random answers
+    checkout  place an order of 1-3 products
+    admin     edit a product price, list orders, sales analytics
+
+Prints (or writes with --output) a JSON report: throughput, error count and
+p50/p95/p99 latency per endpoint. Pass an earlier report as --baseline to also
+print the change per endpoint. Runs are reproducible for a given --seed, up to
+timing. --base-url skips booting and seeding and drives an existing server.
+
+    python benchmarks/api_workload.py --mongomock --products 2000 --orders 5000 \\
+        --duration 30 --concurrency 32 --output baseline.json
+    python benchmarks/api_workload.py --mongo-url mongodb://localhost:27017 \\
+        --baseline baseline.json
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from latency import percentiles
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SEARCH_TERMS = ("wood", "vetiver", "sea salt", "jasmine", "amber", "citrus", "musk", "floral")
+BOOT_TIMEOUT = 300
+
+# (name, weight); the name is also the endpoint label in the report
+WORKLOAD = (
+    ("GET /products", 25),
+    ("GET /products?island_id", 10),
+    ("GET /products/{id}", 15),
+    ("GET /islands", 8),
+    ("GET /search", 10),
+    ("GET /products/{id}/similar", 5),
+    ("GET /products/{id}/reviews", 5),
+    ("quiz", 5),
+    ("POST /orders", 6),
+    ("PUT /admin/products/{id}", 4),
+    ("GET /admin/orders", 4),
+    ("GET /admin/analytics", 3),
+)
+
+
+# ----- server process -----
+
+def serve(args):
+    """Child process: seed the benchmark database, then run uvicorn"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    if args.mongomock:
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    import uvicorn
+    import order_analytics
+    import seed_data
+    import server
+    from seed_generator import SyntheticCatalog, insert_documents
+
+    async def seed():
+        catalog = SyntheticCatalog(
+            seed=args.seed,
+            islands=args.islands,
+            products=args.products,
+            reviews=args.reviews,
+            orders=args.orders,
+            base_islands=seed_data.islands_data
+        )
+        await server.client.drop_database(args.db_name)
+        db = server.db
+        await insert_documents(db, catalog.documents())
+        await db.products.update_many({}, {"$set": {"stock": 1_000_000}})  # checkout traffic must not run out
+        await db.quiz.insert_one(copy.deepcopy(seed_data.quiz_data))
+        await db.faq.insert_many(copy.deepcopy(seed_data.faq_data))
+        await db.theme.insert_one(copy.deepcopy(seed_data.theme_data))
+        await order_analytics.rebuild(db)
+
+    # Before index creation and the catalog warm-up
+    server.app.router.on_startup.insert(0, seed)
+    uvicorn.run(server.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(base_url: str, process: subprocess.Popen):
+    deadline = time.monotonic() + BOOT_TIMEOUT
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited during startup with code {process.returncode}")
+            try:
+                if (await client.get("/theme")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError("Server did not become ready in time")
+
+
+# ----- load generator -----
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, headers: dict, products: list, islands: list,
+                 quiz: dict, rng: random.Random):
+        self.client = client
+        self.headers = headers
+        self.products = products
+        self.islands = islands
+        self.quiz = quiz
+        self.rng = rng
+
+    def _product(self) -> str:
+        return self.rng.choice(self.products)
+
+    async def run(self, name: str) -> int:
+        """Perform one operation, returns the status of its last request"""
+        rng, get = self.rng, self.client.get
+        if name == "GET /products":
+            return (await get("/products", params={"limit": 24})).status_code
+        if name == "GET /products?island_id":
+            return (await get("/products", params={"island_id": rng.choice(self.islands), "limit": 24})).status_code
+        if name == "GET /products/{id}":
+            return (await get(f"/products/{self._product()}")).status_code
+        if name == "GET /islands":
+            return (await get("/islands")).status_code
+        if name == "GET /search":
+            return (await get("/search", params={"q": rng.choice(SEARCH_TERMS)})).status_code
+        if name == "GET /products/{id}/similar":
+            return (await get(f"/products/{self._product()}/similar")).status_code
+        if name == "GET /products/{id}/reviews":
+            return (await get(f"/products/{self._product()}/reviews")).status_code
+        if name == "quiz":
+            await get("/quiz")
+            answers = [rng.choice(question["options"])["text"] for question in self.quiz["questions"]]
+            return (await self.client.post("/quiz/submit", json={"answers": answers})).status_code
+        if name == "POST /orders":
+            items = [{"product_id": pid, "quantity": 1} for pid in rng.sample(self.products, k=rng.randint(1, 3))]
+            return (await self.client.post("/orders", json={
+                "customer_name": "Load Test",
+                "customer_email": "load@example.com",
+                "customer_phone": "0800000000",
+                "customer_address": "Benchmark Street 1",
+                "items": items,
+            })).status_code
+        if name == "PUT /admin/products/{id}":
+            return (await self.client.put(
+                f"/admin/products/{self._product()}",
+                json={"price": float(rng.randrange(100_000, 2_000_000, 1000))},
+                headers=self.headers,
+            )).status_code
+        if name == "GET /admin/orders":
+            return (await get("/admin/orders", params={"limit": 50}, headers=self.headers)).status_code
+        if name == "GET /admin/analytics":
+            return (await get("/admin/analytics", headers=self.headers)).status_code
+        raise ValueError(name)
+
+
+def summarize(samples: dict, errors: dict, elapsed: float) -> dict:
+    endpoints = {}
+    for name, latencies in sorted(samples.items()):
+        latency = percentiles(latencies)
+        endpoints[name] = {
+            "count": latency.pop("count"),
+            "errors": errors.get(name, 0),
+            "rps": round(len(latencies) / elapsed, 1),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            **latency,
+        }
+    total = sum(len(latencies) for latencies in samples.values())
+    return {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rps": round(total / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+async def drive(base_url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        credentials = {"username": f"load_{uuid.uuid4().hex[:8]}", "password": "load-test-password"}
+        (await client.post("/auth/register", json={**credentials, "email": "load@example.com"})).raise_for_status()
+        login = await client.post("/auth/login", json=credentials)
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        products, params = [], {"fields": "id", "limit": 1000}
+        while True:
+            page = await client.get("/products", params=params)
+            products.extend(p["id"] for p in page.json())
+            if "X-Next-Cursor" not in page.headers:
+                break
+            params["after"] = page.headers["X-Next-Cursor"]
+        islands = [i["id"] for i in (await client.get("/islands", params={"fields": "id"})).json()]
+        quiz = (await client.get("/quiz")).json()
+
+        names = [name for name, _ in WORKLOAD]
+        weights = [weight for _, weight in WORKLOAD]
+        samples = {name: [] for name in names}
+        errors = {}
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(index: int):
+            rng = random.Random(args.seed * 1000 + index)
+            workload = Workload(client, headers, products, islands, quiz, rng)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    status = await workload.run(name)
+                except httpx.HTTPError:
+                    status = 0
+                samples[name].append(time.perf_counter() - started)
+                if status >= 400 or status == 0:
+                    errors[name] = errors.get(name, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        return summarize({k: v for k, v in samples.items() if v}, errors, time.perf_counter() - started)
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Percent change per endpoint against an earlier report (negative latency = faster)"""
+    def change(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+
+    diff = {}
+    for name, current in report["results"]["endpoints"].items():
+        previous = baseline["results"]["endpoints"].get(name)
+        if previous:
+            diff[name] = {
+                "rps_pct": change(current["rps"], previous["rps"]),
+                "p50_pct": change(current["p50_ms"], previous["p50_ms"]),
+                "p95_pct": change(current["p95_ms"], previous["p95_ms"]),
+                "p99_pct": change(current["p99_ms"], previous["p99_ms"]),
+            }
+    return diff
+
+
+async def main(args):
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        if "bench" not in args.db_name:
+            raise SystemExit("Refusing to drop a database whose name does not contain 'bench'")
+        port = free_port()
+        command = [
+            sys.executable, __file__, "--serve", "--port", str(port),
+            "--mongo-url", args.mongo_url, "--db-name", args.db_name,
+            "--islands", str(args.islands), "--products", str(args.products),
+            "--reviews", str(args.reviews), "--orders", str(args.orders), "--seed", str(args.seed),
+        ] + (["--mongomock"] if args.mongomock else [])
+        process = subprocess.Popen(command, cwd=BACKEND_DIR)
+        base_url = f"http://127.0.0.1:{port}/api"
+    try:
+        if process:
+            await wait_until_ready(base_url, process)
+        results = await drive(base_url, args)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "config": {
+            "backend": "external" if args.base_url else ("mongomock" if args.mongomock else "mongodb"),
+            "islands": args.islands,
+            "products": args.products,
+            "reviews": args.reviews,
+            "orders": args.orders,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+            "run_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        report["vs_baseline"] = compare(report, json.loads(Path(args.baseline).read_text()))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", help="drive an already running API instead of booting one")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="archipelago_bench", help="dropped and re-seeded on every run")
+    parser.add_argument("--mongomock", action="store_true", help="in-memory database (needs mongomock-motor)")
+    parser.add_argument("--islands", type=int, default=20)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--reviews", type=int, default=3000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        asyncio.run(main(args))
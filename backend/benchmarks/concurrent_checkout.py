@@ -0,0 +1,94 @@
+"""
+Benchmark: many buyers checking out the same product at once.
+
+Creates a product with a fixed stock, fires ``--buyers`` concurrent orders for
+one unit each and checks that exactly ``--stock`` orders succeed and that the
+stored stock ends at zero (no overselling). Prints throughput and latency
+percentiles as JSON, then deletes the product.
+
+    python benchmarks/concurrent_checkout.py --base-url http://localhost:8001/api \
+        --buyers 500 --stock 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from latency import percentiles
+
+
+async def admin_headers(client):
+    credentials = {"username": f"bench_{uuid.uuid4().hex[:8]}", "password": "bench-password"}
+    response = await client.post("/auth/register", json={**credentials, "email": "bench@example.com"})
+    response.raise_for_status()
+    response = await client.post("/auth/login", json=credentials)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def buy(client, product_id, latencies, statuses):
+    order = {
+        "customer_name": "Bench Buyer",
+        "customer_email": "buyer@example.com",
+        "customer_phone": "0800000000",
+        "customer_address": "Benchmark Street 1",
+        "items": [{"product_id": product_id, "quantity": 1}],
+    }
+    started = time.perf_counter()
+    response = await client.post("/orders", json=order)
+    latencies.append(time.perf_counter() - started)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        headers = await admin_headers(client)
+        response = await client.post("/admin/products", headers=headers, json={
+            "name": "Benchmark Flash Sale",
+            "island_id": "island_bench",
+            "island_name": "Bench",
+            "price": 100000,
+            "stock": args.stock,
+            "description": "Benchmark product",
+            "aroma_notes": {"top": [], "heart": [], "base": []},
+            "olfactive_family": "Bench",
+            "mood": "Bench",
+            "image_url": "",
+        })
+        response.raise_for_status()
+        product_id = response.json()["id"]
+
+        latencies, statuses = [], {}
+        started = time.perf_counter()
+        await asyncio.gather(*(buy(client, product_id, latencies, statuses) for _ in range(args.buyers)))
+        elapsed = time.perf_counter() - started
+
+        response = await client.get(f"/products/{product_id}")
+        final_stock = response.json()["stock"]
+        await client.delete(f"/admin/products/{product_id}", headers=headers)
+
+    succeeded = statuses.get(200, 0)
+    print(json.dumps({
+        "buyers": args.buyers,
+        "stock": args.stock,
+        "statuses": statuses,
+        "final_stock": final_stock,
+        "oversold": succeeded > args.stock or final_stock < 0,
+        "correct": succeeded == min(args.stock, args.buyers) and final_stock == max(0, args.stock - args.buyers),
+        "elapsed_seconds": round(elapsed, 3),
+        "orders_per_second": round(args.buyers / elapsed, 1),
+        "latency": percentiles(latencies),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
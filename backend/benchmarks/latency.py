@@ -0,0 +1,18 @@
+"""
+Latency summaries shared by the benchmark scripts.
+
+The scripts are run as ``python benchmarks/<name>.py``, which puts this
+directory on ``sys.path``, so they import it as ``from latency import ...``.
+"""
+
+
+def percentiles(samples) -> dict:
+    """Count and p50/p95/p99 in milliseconds of latencies given in seconds"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+    return {"count": len(ordered), "p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99)}
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: list response serialisation, validated vs. fast path.
+
+Serves the same synthetic products two ways from an in-process app:
+
+    validated  ISO strings parsed per item, then response_model=List[Product]
+               (FastAPI validates every element and encodes it again)
+    fast       BSON-style datetimes, projected dicts through json_response
+               (no validation, orjson encoding)
+
+and prints the mean and p95 request time for each at 100, 1k and 10k items.
+No database or running server is needed.
+
+    python benchmarks/list_serialization.py --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# server.py reads these at import time; nothing here ever connects
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fast_json import json_response  # noqa: E402
+from field_views import project  # noqa: E402
+from reviews import empty_summary  # noqa: E402
+from server import Product  # noqa: E402
+
+SIZES = (100, 1_000, 10_000)
+
+
+def make_products(count: int) -> List[dict]:
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": f"bench_{i}",
+            "name": f"Benchmark Eau de Parfum {i}",
+            "island_id": f"island_{i % 6}",
+            "island_name": f"Island {i % 6}",
+            "price": 450000.0 + i,
+            "stock": 100,
+            "size": "50ml",
+            "description": "A long walk through wet forest at dawn. " * 4,
+            "aroma_notes": {
+                "top": ["Bergamot", "Green Leaves"],
+                "heart": ["Vetiver", "Cedarwood", "Moss"],
+                "base": ["Patchouli", "Amber", "Musk"],
+            },
+            "olfactive_family": "Woody Aromatic",
+            "mood": "Mystical, Grounded",
+            "image_url": f"/api/uploads/r/{i:064x}/1200.jpg",
+            "visible": True,
+            "rating_summary": {**empty_summary(), "mean": 0.0},
+            "created_at": started + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(products: List[dict]) -> FastAPI:
+    as_strings = [{**product, "created_at": product["created_at"].isoformat()} for product in products]
+    app = FastAPI()
+
+    @app.get("/validated", response_model=List[Product])
+    async def validated():
+        # What the handlers did before: parse each ISO string, then let
+        # FastAPI validate and serialise every element
+        return [
+            {**product, "created_at": datetime.fromisoformat(product["created_at"])}
+            for product in as_strings
+        ]
+
+    @app.get("/fast", response_model=List[Product])
+    async def fast(response: Response):
+        return json_response([project(product, Product) for product in products], response)
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, repeat: int) -> dict:
+    await client.get(path)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 2),
+        "bytes": len(response.content),
+    }
+
+
+async def main(args):
+    results = {}
+    for size in args.sizes:
+        app = build_app(make_products(size))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            validated = await measure(client, "/validated", args.repeat)
+            fast = await measure(client, "/fast", args.repeat)
+        results[size] = {
+            "validated": validated,
+            "fast": fast,
+            "speedup": round(validated["mean_ms"] / fast["mean_ms"], 2) if fast["mean_ms"] else None,
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    asyncio.run(main(parser.parse_args()))
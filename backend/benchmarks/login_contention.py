@@ -0,0 +1,71 @@
+"""
+Benchmark: /api/products latency while logins run at the same time.
+
+Runs two phases against a live server and prints p50/p95/p99 for the catalog
+request in each: catalog traffic alone, then catalog traffic with concurrent
+login loops. Before bcrypt moved to a worker pool the second phase stalled on
+every hash; now the two distributions should be close.
+
+    python benchmarks/login_contention.py --base-url http://localhost:8001/api \
+        --duration 15 --login-workers 8 --catalog-workers 8
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from latency import percentiles
+
+
+async def catalog_loop(client, deadline, samples):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/products")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+
+
+async def login_loop(client, deadline, credentials, samples):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/auth/login", json=credentials)
+        if response.status_code == 200:
+            samples.append(time.perf_counter() - started)
+
+
+async def run_phase(base_url, duration, catalog_workers, login_workers, credentials):
+    catalog_samples, login_samples = [], []
+    limits = httpx.Limits(max_connections=catalog_workers + login_workers)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        tasks = [catalog_loop(client, deadline, catalog_samples) for _ in range(catalog_workers)]
+        tasks += [login_loop(client, deadline, credentials, login_samples) for _ in range(login_workers)]
+        await asyncio.gather(*tasks)
+    return {"products": percentiles(catalog_samples), "login": percentiles(login_samples)}
+
+
+async def main(args):
+    credentials = {"username": f"bench_{uuid.uuid4().hex[:8]}", "password": "bench-password"}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        response = await client.post("/auth/register", json={**credentials, "email": "bench@example.com"})
+        response.raise_for_status()
+
+    results = {
+        "catalog_only": await run_phase(args.base_url, args.duration, args.catalog_workers, 0, credentials),
+        "catalog_with_logins": await run_phase(
+            args.base_url, args.duration, args.catalog_workers, args.login_workers, credentials
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per phase")
+    parser.add_argument("--catalog-workers", type=int, default=8)
+    parser.add_argument("--login-workers", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+"""
+Micro-benchmark: admin update routes, read-modify-read vs. find_one_and_update.
+
+Runs the two shapes of an admin update against a collection that adds a
+fixed network round-trip time to every call:
+
+    legacy  find_one -> update_one -> find_one (three round trips, and a
+            concurrent write can land between the update and the re-read)
+    atomic  find_one_and_update(return_document=AFTER), one round trip
+
+By default the collection is an in-memory stand-in, so the numbers isolate
+the round trips themselves. With --mongo-url the same calls go to a real
+server, with the simulated RTT added on top. Prints mean and p95 per RTT
+as JSON.
+
+    python benchmarks/write_roundtrips.py --rtt-ms 0 1 5 20 --repeat 50
+    python benchmarks/write_roundtrips.py --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import copy
+import json
+import time
+import uuid
+
+from pymongo import ReturnDocument
+
+RTTS_MS = (0, 1, 5, 20)
+
+
+class MemoryCollection:
+    """Just enough of a Motor collection for single-document updates by id"""
+
+    def __init__(self):
+        self._docs = {}
+
+    async def insert_one(self, doc: dict):
+        self._docs[doc["id"]] = copy.deepcopy(doc)
+
+    async def find_one(self, query: dict, projection=None):
+        doc = self._docs.get(query["id"])
+        return copy.deepcopy(doc) if doc else None
+
+    async def update_one(self, query: dict, update: dict):
+        doc = self._docs.get(query["id"])
+        if doc:
+            doc.update(update["$set"])
+
+    async def find_one_and_update(self, query: dict, update: dict, projection=None,
+                                  return_document=ReturnDocument.BEFORE):
+        before = await self.find_one(query)
+        await self.update_one(query, update)
+        return await self.find_one(query) if return_document == ReturnDocument.AFTER else before
+
+    async def delete_many(self, query: dict):
+        self._docs.clear()
+
+
+class RemoteCollection:
+    """Adds ``rtt`` seconds of simulated network latency to every call"""
+
+    def __init__(self, collection, rtt: float):
+        self._collection = collection
+        self.rtt = rtt
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            if self.rtt:
+                await asyncio.sleep(self.rtt)
+            return await method(*args, **kwargs)
+
+        return call
+
+
+async def legacy_update(collection, doc_id: str, fields: dict) -> dict:
+    existing = await collection.find_one({"id": doc_id}, {"_id": 0})
+    if not existing:
+        return None
+    await collection.update_one({"id": doc_id}, {"$set": fields})
+    return await collection.find_one({"id": doc_id}, {"_id": 0})
+
+
+async def atomic_update(collection, doc_id: str, fields: dict) -> dict:
+    return await collection.find_one_and_update(
+        {"id": doc_id},
+        {"$set": fields},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def measure(update, collection, doc_id: str, repeat: int) -> dict:
+    await update(collection, doc_id, {"price": 0.0})  # warm-up
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        updated = await update(collection, doc_id, {"price": float(i)})
+        samples.append(time.perf_counter() - started)
+        assert updated["price"] == float(i)
+    samples.sort()
+    return {
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 2),
+    }
+
+
+async def main(args):
+    client = None
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+        collection = client[args.db_name]["bench_write_roundtrips"]
+    else:
+        collection = MemoryCollection()
+
+    doc_id = f"bench_{uuid.uuid4().hex[:8]}"
+    await collection.insert_one({"id": doc_id, "name": "Benchmark product", "price": 0.0, "stock": 10})
+    results = {}
+    try:
+        for rtt_ms in args.rtt_ms:
+            remote = RemoteCollection(collection, rtt_ms / 1000)
+            legacy = await measure(legacy_update, remote, doc_id, args.repeat)
+            atomic = await measure(atomic_update, remote, doc_id, args.repeat)
+            results[f"{rtt_ms:g}ms"] = {
+                "legacy": legacy,
+                "atomic": atomic,
+                "speedup": round(legacy["mean_ms"] / atomic["mean_ms"], 2) if atomic["mean_ms"] else None,
+            }
+    finally:
+        await collection.delete_many({"id": doc_id})
+        if client:
+            client.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, nargs="+", default=list(RTTS_MS))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--mongo-url", help="use a real MongoDB instead of the in-memory collection")
+    parser.add_argument("--db-name", default="benchmark")
+    asyncio.run(main(parser.parse_args()))
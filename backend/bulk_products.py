@@ -0,0 +1,255 @@
+"""
+Bulk product import and batch updates.
+
+``import_products`` takes rows from a CSV, NDJSON or JSON-array upload and
+validates them one at a time as they are read. Reading and validation run in
+a worker thread, one batch at a time, so a large upload never blocks the
+event loop. Valid rows are upserted by ``id`` with ``bulk_write`` in batches
+of ``BULK_BATCH_SIZE``, so tens of thousands of products take a few dozen
+round trips. Rows without an ``id``
+become new products. The CSV layout is the one written by
+``GET /api/admin/products/export``, so an export can be edited in a
+spreadsheet and imported back. Rating and date columns are ignored.
+
+``bulk_update`` applies ``{"id", "price", "stock", "visible"}`` patches the
+same way. Its JSON body is parsed and validated on the event loop, so the
+route caps it at ``MAX_BULK_UPDATES`` patches per request; larger jobs are
+sent in several requests, or as an edited export through the import.
+
+Both return a report with per-row errors rather than failing the whole
+request over one bad row.
+"""
+import asyncio
+import csv
+import io
+import uuid
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import orjson
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from reviews import empty_summary
+from revisions import with_revision
+
+IMPORT_FORMATS = ("csv", "ndjson", "json")
+BULK_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json"}
+_NOTE_COLUMNS = {"top_notes": "top", "heart_notes": "heart", "base_notes": "base"}
+# Derived or server-owned columns of the export, never imported
+_IGNORED_COLUMNS = {"rating_count", "rating_mean", "rating_summary", "created_at"}
+_FORMULA_PREFIXES = ("'=", "'+", "'-", "'@", "'\t", "'\r")
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    for extension, import_format in _EXTENSIONS.items():
+        if filename and filename.lower().endswith(extension):
+            return import_format
+    return None
+
+
+def _from_csv(row: Dict[str, str]) -> dict:
+    """A CSV record in export layout to a product dict, blank cells left out"""
+    product = {}
+    notes = {}
+    for column, value in row.items():
+        if column is None or column in _IGNORED_COLUMNS or value is None or value == "":
+            continue
+        if value.startswith(_FORMULA_PREFIXES):
+            value = value[1:]  # undo the export's formula escaping
+        if column in _NOTE_COLUMNS:
+            notes[_NOTE_COLUMNS[column]] = [note.strip() for note in value.split(";") if note.strip()]
+        else:
+            product[column] = value
+    if notes:
+        product["aroma_notes"] = notes
+    return product
+
+
+def read_rows(file: BinaryIO, import_format: str) -> Iterator[Union[dict, ValueError]]:
+    """Yield one product dict per record, or a ValueError for an unreadable one
+
+    CSV and NDJSON are read incrementally. A JSON array has to be parsed
+    whole, so NDJSON is the better choice for very large files.
+    """
+    if import_format == "csv":
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            for row in csv.DictReader(text):
+                yield _from_csv(row)
+        finally:
+            text.detach()
+    elif import_format == "ndjson":
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield ValueError(f"Invalid JSON: {e}")
+                continue
+            yield row if isinstance(row, dict) else ValueError("Expected a JSON object")
+    else:
+        try:
+            rows = orjson.loads(file.read())
+        except orjson.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+            return
+        if not isinstance(rows, list):
+            yield ValueError("Expected a JSON array of products")
+            return
+        for row in rows:
+            yield row if isinstance(row, dict) else ValueError("Expected a JSON object")
+
+
+def _messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors()
+    ]
+
+
+class _Report:
+    def __init__(self, **counters: int):
+        self.counters = {"rows": 0, **counters, "failed": 0}
+        self.errors = []
+
+    def fail(self, row: int, product_id: Optional[str], messages: List[str]):
+        self.counters["failed"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "id": product_id, "errors": messages})
+
+    def as_dict(self) -> dict:
+        return {**self.counters, "errors": self.errors}
+
+
+async def _write(db, batch: Dict[str, tuple], report: _Report) -> List[str]:
+    """Run one batch of (row number, UpdateOne) keyed by product id, returns the ids written"""
+    rows = list(batch.items())
+    try:
+        result = await db.products.bulk_write([op for _, (_, op) in rows], ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for error in details["writeErrors"]:
+            product_id, (row, _) = rows[error["index"]]
+            report.fail(row, product_id, [error["errmsg"]])
+    report.counters["inserted"] += details["nUpserted"]
+    report.counters["updated"] += details["nMatched"]
+    return [product_id for product_id, _ in rows]
+
+
+def _validate_batch(numbered: Iterator[Tuple[int, Union[dict, ValueError]]], model: Type[BaseModel],
+                    island_names: Dict[str, str], now: datetime, report: _Report) -> Tuple[Dict[str, tuple], bool]:
+    """Read and validate rows until a batch is full, returns (batch, more rows left)
+
+    Runs in a worker thread; it is the only code touching ``numbered`` and
+    ``report`` while it runs.
+    """
+    batch: Dict[str, tuple] = {}
+    for number, row in numbered:
+        report.counters["rows"] += 1
+        if isinstance(row, ValueError):
+            report.fail(number, None, [str(row)])
+            continue
+        product_id = row.get("id")
+        try:
+            product = model(**row)
+        except ValidationError as e:
+            report.fail(number, product_id, _messages(e))
+            continue
+        if product.island_id not in island_names and not product.island_name:
+            report.fail(number, product_id, [f"island_name: Required for unknown island '{product.island_id}'"])
+            continue
+        report.counters["valid"] += 1
+
+        product_id = product.id or str(uuid.uuid4())
+        provided = product.model_dump(exclude_unset=True, exclude={"id"})
+        if not product.island_name:
+            provided["island_name"] = island_names[product.island_id]
+        defaults = {
+            key: value for key, value in product.model_dump(exclude={"id"}).items()
+            if key not in provided and value is not None
+        }
+        batch[product_id] = (number, UpdateOne(
+            {"id": product_id},
+            with_revision({
+                "$set": provided,
+                "$setOnInsert": {**defaults, "created_at": now, "rating_summary": empty_summary()}
+            }, now),
+            upsert=True
+        ))
+        if len(batch) >= BULK_BATCH_SIZE:
+            return batch, True
+    return batch, False
+
+
+async def import_products(db, rows: Iterator[Union[dict, ValueError]], model: Type[BaseModel],
+                          island_names: Dict[str, str], dry_run: bool = False,
+                          on_batch=None) -> dict:
+    """Validate and upsert product rows, ``on_batch(ids)`` runs after each write
+
+    Fields a row leaves out keep their stored value on existing products and
+    take the model default on new ones. Within a batch, a later row for the
+    same id replaces an earlier one.
+    """
+    report = _Report(valid=0, inserted=0, updated=0)
+    numbered = enumerate(rows, start=1)
+    now = datetime.now(timezone.utc)
+    loop = asyncio.get_running_loop()
+
+    more = True
+    while more:
+        batch, more = await loop.run_in_executor(
+            None, _validate_batch, numbered, model, island_names, now, report
+        )
+        if batch:
+            await _flush(db, batch, report, dry_run, on_batch)
+    return report.as_dict()
+
+
+async def _flush(db, batch: Dict[str, tuple], report: _Report, dry_run: bool, on_batch):
+    if dry_run:
+        return
+    written = await _write(db, batch, report)
+    if on_batch:
+        await on_batch(written)
+
+
+async def bulk_update(db, updates: List[BaseModel], on_batch=None) -> dict:
+    """Apply price/stock/visibility patches keyed by id, in batches
+
+    Ids that don't exist are reported as not found; nothing is created.
+    """
+    report = {"rows": len(updates), "matched": 0, "modified": 0, "not_found": 0, "missing_ids": []}
+    for start in range(0, len(updates), BULK_BATCH_SIZE):
+        chunk = updates[start:start + BULK_BATCH_SIZE]
+        existing = {
+            product["id"]
+            for product in await db.products.find(
+                {"id": {"$in": [update.id for update in chunk]}}, {"_id": 0, "id": 1}
+            ).to_list(None)
+        }
+        ids, operations = [], []
+        for update in chunk:
+            if update.id not in existing:
+                report["not_found"] += 1
+                if len(report["missing_ids"]) < MAX_REPORTED_ERRORS:
+                    report["missing_ids"].append(update.id)
+                continue
+            fields = update.model_dump(exclude={"id"}, exclude_none=True)
+            if fields:
+                ids.append(update.id)
+                operations.append(UpdateOne({"id": update.id}, with_revision({"$set": fields})))
+        if not operations:
+            continue
+        result = await db.products.bulk_write(operations, ordered=False)
+        report["matched"] += result.matched_count
+        report["modified"] += result.modified_count
+        if on_batch:
+            await on_batch(ids)
+    return report
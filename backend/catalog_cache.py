@@ -0,0 +1,524 @@
+"""
+In-process read-through cache for the public catalog.
+
+Islands, products, theme, FAQ and quiz change only when an admin edits them,
+so public reads are served from memory. Each section is loaded from MongoDB on
+first use (or at startup), and the admin write routes invalidate exactly the
+documents or sections they touched. Every change bumps a version counter.
+
+Stock and rating summaries move with every order and review, so they are
+written into the cached product documents in place. Such a change bumps the
+section's version (responses differ) but not its structure version, which is
+what the sorted views and the search and similarity indexes are built from.
+
+HTTP validators come from persisted state, so every worker process agrees on
+them and they survive restarts. Islands and products get a tag per document
+from its stored revision (see revisions.py); a section's validator combines
+the tags with XOR, updated as documents change, so producing one costs
+nothing. Theme, FAQ and quiz are small and hashed whole when they change.
+
+With a TTL, an expired section keeps being served while a background task
+refreshes it; only the very first load of a section blocks a request. For
+islands and products the task first asks MongoDB for a marker (document
+count, sum of revisions, newest ``updated_at``) and stops there when it
+matches the cache. Otherwise it refetches the section and merges it in,
+preparing and comparing only the documents whose revision moved, and bumps
+versions only for documents that differ.
+
+Structural changes to islands and products are also appended to a bounded
+change log, so derived indexes can ask which ids changed since the version
+they last saw instead of diffing the whole section.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from pagination import memory_page, sort_key
+from quiz_engine import CompiledQuiz
+from reviews import empty_summary, summary_mean
+from revisions import as_utc, document_tag, last_removal, modified_at, to_millis
+
+logger = logging.getLogger(__name__)
+
+
+def parse_dates(doc: Optional[dict], *fields: str) -> Optional[dict]:
+    """Convert ISO date strings on a stored document to datetimes in place
+
+    Timestamps are written as BSON dates; this only matters for documents
+    migrate_dates.py hasn't converted yet, which would otherwise break the
+    sorted in-memory views. It runs once per document load, not per request.
+    """
+    if not doc:
+        return doc
+    for field in fields:
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
+
+
+def _prepare_island(island: dict) -> dict:
+    return parse_dates(island, "created_at")
+
+
+# Products not yet migrated by migrate_reviews.py may still embed their reviews
+PRODUCT_PROJECTION = {"_id": 0, "reviews": 0}
+
+# Fields that change on checkout and review, never read by derived structures
+VOLATILE_PRODUCT_FIELDS = ("stock", "rating_summary", "revision", "updated_at")
+VOLATILE_PROJECTION = {"_id": 0, "id": 1, **{field: 1 for field in VOLATILE_PRODUCT_FIELDS}}
+
+
+def prepare_product(product: dict) -> dict:
+    """Put a stored product in response shape: dates parsed, rating mean derived"""
+    parse_dates(product, "created_at")
+    summary = product.setdefault("rating_summary", empty_summary())
+    summary["mean"] = summary_mean(summary)
+    return product
+
+
+def _without_volatile(product: dict) -> dict:
+    return {key: value for key, value in product.items() if key not in VOLATILE_PRODUCT_FIELDS}
+
+
+def _apply_volatile(product: dict, fresh: dict):
+    """Copy stock, rating summary and revision from a VOLATILE_PROJECTION row onto a cached product"""
+    for field in ("stock", "revision", "updated_at"):
+        if field in fresh:
+            product[field] = fresh[field]
+    summary = fresh.get("rating_summary") or empty_summary()
+    summary["mean"] = summary_mean(summary)
+    product["rating_summary"] = summary
+
+
+def _content_tag(value) -> str:
+    """Digest of a small section as stored, independent of the process"""
+    encoded = json.dumps(value, sort_keys=True, default=lambda v: to_millis(v) if isinstance(v, datetime) else str(v))
+    return hashlib.blake2b(encoded.encode(), digest_size=8).hexdigest()
+
+
+class CatalogCache:
+    """Versioned in-memory copy of the catalog collections.
+
+    Returned documents are shared between requests and must be treated as
+    read-only by callers.
+    """
+
+    SECTIONS = ("islands", "products", "theme", "faq", "quiz")
+    KEYED_SECTIONS = ("islands", "products")
+    CHANGE_LOG_LIMIT = 10_000
+
+    def __init__(self, db, ttl_seconds: float = 0):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._data: Dict[str, Any] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {name: 0 for name in self.SECTIONS}
+        self._structure: Dict[str, int] = {name: 0 for name in self.SECTIONS}
+        self._locks = {name: asyncio.Lock() for name in self.SECTIONS}
+        self._refreshes: Dict[str, asyncio.Task] = {}
+        self._product_views: Dict[str, tuple] = {}
+        # Validator state: per-document tags and their XOR for keyed sections,
+        # a content digest for the others, and each section's newest change
+        self._tags: Dict[str, Dict[str, int]] = {name: {} for name in self.KEYED_SECTIONS}
+        self._digest: Dict[str, int] = {name: 0 for name in self.KEYED_SECTIONS}
+        self._content_tags: Dict[str, str] = {}
+        self._modified: Dict[str, Optional[datetime]] = {name: None for name in self.SECTIONS}
+        # Structural change log: parallel (version, id) lists, complete after _log_floor
+        self._change_versions: Dict[str, List[int]] = {name: [] for name in self.KEYED_SECTIONS}
+        self._change_ids: Dict[str, List[str]] = {name: [] for name in self.KEYED_SECTIONS}
+        self._log_floor: Dict[str, int] = {name: 0 for name in self.KEYED_SECTIONS}
+        self._compiled_quiz = CompiledQuiz.compile(None)
+
+    # ----- loading -----
+
+    async def load_all(self):
+        """Populate every section, used on application startup"""
+        for name in self.SECTIONS:
+            await self._load(name)
+
+    async def _fetch(self, name: str):
+        """Current section from MongoDB; islands and products by id, not yet prepared"""
+        if name == "islands":
+            islands = await self.db.islands.find({}, {"_id": 0}).to_list(None)
+            return {island["id"]: island for island in islands}
+        if name == "products":
+            products = await self.db.products.find({}, PRODUCT_PROJECTION).to_list(None)
+            return {product["id"]: product for product in products}
+        if name == "theme":
+            theme = await self.db.theme.find_one({"id": "theme_settings"}, {"_id": 0})
+            return parse_dates(theme, "updated_at")
+        if name == "faq":
+            faqs = await self.db.faq.find({}, {"_id": 0}).sort("order", 1).to_list(None)
+            return [parse_dates(faq, "created_at") for faq in faqs]
+        if name == "quiz":
+            quiz = await self.db.quiz.find_one({"id": "quiz_config"}, {"_id": 0})
+            return parse_dates(quiz, "updated_at")
+        raise KeyError(name)
+
+    @staticmethod
+    def _prepare(name: str, doc: dict) -> dict:
+        return prepare_product(doc) if name == "products" else _prepare_island(doc)
+
+    async def _load(self, name: str):
+        fetched_at = datetime.now(timezone.utc).replace(microsecond=0)
+        value = await self._fetch(name)
+        removed_at = await last_removal(self.db, name) if name in self.KEYED_SECTIONS else None
+        if name not in self._data:
+            if name in self.KEYED_SECTIONS:
+                for doc in value.values():
+                    self._prepare(name, doc)
+            self._set(name, value)
+        elif name in self.KEYED_SECTIONS:
+            self._merge(name, value, fetched_at)
+            self._loaded_at[name] = time.monotonic()
+        elif value == self._data[name]:
+            self._loaded_at[name] = time.monotonic()
+        else:
+            self._set(name, value)
+        self._advance_modified(name, removed_at)
+
+    def _set(self, name: str, value):
+        self._data[name] = value
+        if name == "quiz":
+            self._compiled_quiz = CompiledQuiz.compile(value)
+        self._loaded_at[name] = time.monotonic()
+        self._bump(name)
+        if name in self.KEYED_SECTIONS:
+            tags = self._tags[name] = {doc_id: document_tag(doc) for doc_id, doc in value.items()}
+            digest = 0
+            for tag in tags.values():
+                digest ^= tag
+            self._digest[name] = digest
+            self._modified[name] = max(filter(None, map(modified_at, value.values())), default=None)
+            self._change_versions[name] = []
+            self._change_ids[name] = []
+            self._log_floor[name] = self.version
+        else:
+            self._content_tags[name] = _content_tag(value)
+            self._modified[name] = modified_at(value) if isinstance(value, dict) else None
+
+    def _merge(self, name: str, fresh: Dict[str, dict], fetched_at: datetime):
+        """Fold a reloaded keyed section (unprepared) into the cache, touching only what changed"""
+        cached = self._data[name]
+        for doc_id in [doc_id for doc_id in cached if doc_id not in fresh]:
+            # Documents written after the fetch started are missing from it, not deleted
+            modified = modified_at(cached[doc_id])
+            if modified is None or modified < fetched_at:
+                del cached[doc_id]
+                self._touch(name, doc_id)
+        for doc_id, doc in fresh.items():
+            current = cached.get(doc_id)
+            if current is not None:
+                # Revisions only grow; an older one means a local write raced this fetch
+                revision, fresh_revision = current.get("revision", 0), doc.get("revision", 0)
+                if revision > fresh_revision or (
+                        revision == fresh_revision and modified_at(current) == modified_at(doc)):
+                    continue
+            self._prepare(name, doc)
+            if current == doc:
+                continue
+            if current is not None and name == "products" and _without_volatile(current) == _without_volatile(doc):
+                _apply_volatile(current, doc)
+                self._touch(name, doc_id, structural=False)
+            else:
+                cached[doc_id] = doc
+                self._touch(name, doc_id)
+
+    def _bump(self, name: str, structural: bool = True):
+        self.version += 1
+        self._versions[name] = self.version
+        if structural:
+            self._structure[name] = self.version
+
+    def _touch(self, name: str, doc_id: str, structural: bool = True):
+        """Record a change to one document of a keyed section"""
+        self._bump(name, structural)
+        tags = self._tags[name]
+        if doc_id in tags:
+            self._digest[name] ^= tags.pop(doc_id)
+        doc = self._data[name].get(doc_id)
+        if doc is not None:
+            tags[doc_id] = document_tag(doc)
+            self._digest[name] ^= tags[doc_id]
+            self._advance_modified(name, modified_at(doc))
+        if structural:
+            versions, ids = self._change_versions[name], self._change_ids[name]
+            versions.append(self.version)
+            ids.append(doc_id)
+            if len(versions) > self.CHANGE_LOG_LIMIT:
+                dropped = len(versions) - self.CHANGE_LOG_LIMIT // 2
+                self._log_floor[name] = versions[dropped - 1]
+                del versions[:dropped]
+                del ids[:dropped]
+
+    def _advance_modified(self, name: str, moment: Optional[datetime]):
+        """Move a section's modification time forward, e.g. to a write or a deletion"""
+        if moment is not None and (self._modified[name] is None or moment > self._modified[name]):
+            self._modified[name] = moment
+
+    def changes_since(self, name: str, version: int) -> Optional[Set[str]]:
+        """Ids of islands/products structurally changed after ``version``
+
+        Returns None when the log can't answer (the section was reloaded
+        wholesale or the log was trimmed past ``version``); the caller should
+        rebuild from a snapshot then.
+        """
+        if version < self._log_floor[name]:
+            return None
+        versions = self._change_versions[name]
+        return set(self._change_ids[name][bisect_right(versions, version):])
+
+    def _is_fresh(self, name: str) -> bool:
+        if name not in self._data:
+            return False
+        if self.ttl_seconds <= 0:
+            return True
+        return time.monotonic() - self._loaded_at[name] < self.ttl_seconds
+
+    async def _get(self, name: str):
+        if name not in self._data:
+            async with self._locks[name]:
+                if name not in self._data:
+                    await self._load(name)
+        elif not self._is_fresh(name) and name not in self._refreshes:
+            self._refreshes[name] = asyncio.ensure_future(self._refresh_expired(name))
+        return self._data[name]
+
+    async def _marker(self, name: str) -> tuple:
+        """(count, sum of revisions, newest updated_at) of a keyed section in MongoDB"""
+        rows = await self.db[name].aggregate([{"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "revisions": {"$sum": "$revision"},
+            "updated_at": {"$max": "$updated_at"},
+        }}]).to_list(None)
+        if not rows:
+            return 0, 0, None
+        updated_at = rows[0]["updated_at"]
+        return rows[0]["count"], rows[0]["revisions"], as_utc(updated_at) if updated_at else None
+
+    def _cached_marker(self, name: str) -> tuple:
+        docs = self._data[name].values()
+        updated = [as_utc(doc["updated_at"]) for doc in docs if isinstance(doc.get("updated_at"), datetime)]
+        return len(docs), sum(doc.get("revision", 0) for doc in docs), max(updated, default=None)
+
+    async def _refresh_expired(self, name: str):
+        """Background TTL refresh; requests keep getting the current data meanwhile"""
+        try:
+            async with self._locks[name]:
+                if self._is_fresh(name):
+                    return
+                if name in self.KEYED_SECTIONS and await self._marker(name) == self._cached_marker(name):
+                    self._loaded_at[name] = time.monotonic()
+                else:
+                    await self._load(name)
+        except Exception as e:
+            # Keep serving what we have and try again after another TTL
+            logger.error(f"Catalog refresh of {name} failed: {e}")
+            self._loaded_at[name] = time.monotonic()
+        finally:
+            del self._refreshes[name]
+
+    async def wait_for_refreshes(self):
+        """Wait until background refreshes in flight have finished"""
+        await asyncio.gather(*self._refreshes.values())
+
+    async def snapshot(self, name: str):
+        """Current data of a section as stored (dict by id for islands/products)"""
+        return await self._get(name)
+
+    def section_version(self, name: str) -> int:
+        return self._versions[name]
+
+    def structure_version(self, name: str) -> int:
+        """Version of a section ignoring in-place stock and rating updates"""
+        return self._structure[name]
+
+    async def validator(self, name: str) -> str:
+        """Opaque token that changes whenever anything in the section changes"""
+        await self._get(name)
+        if name in self.KEYED_SECTIONS:
+            return f"{len(self._tags[name]):x}-{self._digest[name]:016x}"
+        return self._content_tags[name]
+
+    async def document_validator(self, name: str, doc_id: str) -> str:
+        """Like validator(), but only changes when this one island or product does"""
+        await self._get(name)
+        tag = self._tags[name].get(doc_id)
+        return f"{tag:016x}" if tag is not None else "0"
+
+    async def last_modified(self, name: str) -> Optional[datetime]:
+        """Newest change to the section, None when unknown (FAQ)"""
+        await self._get(name)
+        return self._modified[name]
+
+    async def document_last_modified(self, name: str, doc_id: str) -> Optional[datetime]:
+        doc = (await self._get(name)).get(doc_id)
+        return modified_at(doc) if doc else None
+
+    # ----- reads -----
+
+    async def islands(self, include_hidden: bool = False) -> List[dict]:
+        islands = (await self._get("islands")).values()
+        if include_hidden:
+            return list(islands)
+        return [island for island in islands if island.get("visible") is not False]
+
+    async def island(self, island_id: str) -> Optional[dict]:
+        return (await self._get("islands")).get(island_id)
+
+    @staticmethod
+    def _product_filter(
+        include_hidden: bool = False,
+        island_id: Optional[str] = None,
+        mood: Optional[str] = None,
+        olfactive_family: Optional[str] = None,
+    ) -> Callable[[dict], bool]:
+        def matches(product: dict) -> bool:
+            if not include_hidden and product.get("visible") is False:
+                return False
+            if island_id and product.get("island_id") != island_id:
+                return False
+            if mood and product.get("mood") != mood:
+                return False
+            if olfactive_family and product.get("olfactive_family") != olfactive_family:
+                return False
+            return True
+        return matches
+
+    async def products(self, **filters) -> List[dict]:
+        matches = self._product_filter(**filters)
+        return [product for product in (await self._get("products")).values() if matches(product)]
+
+    async def product_page(self, field: str, direction: int, after: Optional[str], limit: int, **filters):
+        """Keyset page of products sorted by ``field``, returns (rows, next_cursor)"""
+        products = await self._get("products")
+        version = self._structure["products"]
+        view = self._product_views.get(field)
+        if view is None or view[0] != version:
+            rows = sorted(products.values(), key=sort_key(field))
+            view = (version, rows, [sort_key(field)(row) for row in rows])
+            self._product_views[field] = view
+        _, rows, keys = view
+        return memory_page(rows, keys, field, direction, after, limit, self._product_filter(**filters))
+
+    async def product(self, product_id: str) -> Optional[dict]:
+        return (await self._get("products")).get(product_id)
+
+    async def theme(self) -> Optional[dict]:
+        return await self._get("theme")
+
+    async def faqs(self) -> List[dict]:
+        return await self._get("faq")
+
+    async def quiz(self) -> Optional[dict]:
+        return await self._get("quiz")
+
+    async def compiled_quiz(self) -> Optional[CompiledQuiz]:
+        """Scoring table for the current quiz, None when no quiz is configured"""
+        if not await self._get("quiz"):
+            return None
+        return self._compiled_quiz
+
+    # ----- invalidation -----
+
+    async def refresh_island(self, island_id: str):
+        """Reload a single island after an admin write"""
+        if "islands" not in self._data:
+            return
+        island = await self.db.islands.find_one({"id": island_id}, {"_id": 0})
+        if island:
+            self.store_island(island)
+        else:
+            self._data["islands"].pop(island_id, None)
+            self._touch("islands", island_id)
+            self._advance_modified("islands", await last_removal(self.db, "islands"))
+
+    def store_island(self, island: dict):
+        """Cache an island document the caller just wrote, skipping the reload"""
+        if "islands" not in self._data:
+            return
+        self._data["islands"][island["id"]] = _prepare_island(island)
+        self._touch("islands", island["id"])
+
+    async def refresh_product(self, product_id: str):
+        """Reload a single product after an admin write"""
+        if "products" not in self._data:
+            return
+        product = await self.db.products.find_one({"id": product_id}, PRODUCT_PROJECTION)
+        if product:
+            self.store_product(product)
+        else:
+            self.remove_product(product_id, await last_removal(self.db, "products"))
+
+    def store_product(self, product: dict):
+        """Cache a product document (in PRODUCT_PROJECTION shape) the caller just wrote"""
+        if "products" not in self._data:
+            return
+        self._data["products"][product["id"]] = prepare_product(product)
+        self._touch("products", product["id"])
+
+    async def refresh_products(self, product_ids: List[str]):
+        """Reload several products with one query, e.g. after a stock change"""
+        if "products" not in self._data or not product_ids:
+            return
+        products = await self.db.products.find({"id": {"$in": list(product_ids)}}, PRODUCT_PROJECTION).to_list(None)
+        found = {product["id"]: product for product in products}
+        for product_id in product_ids:
+            if product_id in found:
+                self._data["products"][product_id] = prepare_product(found[product_id])
+            else:
+                self._data["products"].pop(product_id, None)
+            self._touch("products", product_id)
+        if not found.keys() >= set(product_ids):
+            self._advance_modified("products", await last_removal(self.db, "products"))
+
+    async def refresh_volatile(self, product_ids: List[str]):
+        """Reload only stock and rating summaries, e.g. after a checkout or review
+
+        The cached documents are updated in place, so sorted views and indexes
+        built on them stay valid. Products the cache doesn't hold (or that are
+        gone) fall back to a full reload.
+        """
+        if "products" not in self._data or not product_ids:
+            return
+        cached = self._data["products"]
+        rows = await self.db.products.find({"id": {"$in": list(product_ids)}}, VOLATILE_PROJECTION).to_list(None)
+        found = {row["id"]: row for row in rows}
+        missing = [product_id for product_id in product_ids if product_id not in cached or product_id not in found]
+        for product_id, row in found.items():
+            if product_id in cached:
+                _apply_volatile(cached[product_id], row)
+                self._touch("products", product_id, structural=False)
+        if missing:
+            await self.refresh_products(missing)
+
+    def remove_product(self, product_id: str, removed_at: Optional[datetime] = None):
+        """Drop a deleted product; ``removed_at`` as passed to record_removal"""
+        if "products" not in self._data:
+            return
+        self._data["products"].pop(product_id, None)
+        self._touch("products", product_id)
+        self._advance_modified("products", removed_at)
+
+    def store_theme(self, theme: dict):
+        self._set("theme", parse_dates(theme, "updated_at"))
+
+    def store_faq(self, faq: dict):
+        """Replace one FAQ entry in place, keeping the list in display order"""
+        if "faq" not in self._data:
+            return
+        faqs = [entry for entry in self._data["faq"] if entry["id"] != faq["id"]]
+        faqs.append(parse_dates(faq, "created_at"))
+        faqs.sort(key=lambda entry: entry.get("order", 0))
+        self._set("faq", faqs)
+
+    async def refresh(self, name: str):
+        """Reload a whole section (theme, faq, quiz, ...)"""
+        await self._load(name)
@@ -0,0 +1,154 @@
+"""
+Streaming CSV / NDJSON exports for back-office tooling.
+
+Rows are read from an async Mongo cursor in batches and encoded as they
+arrive. The output is sent as a chunked ``StreamingResponse`` in pieces of
+about ``CHUNK_SIZE`` bytes, so memory use stays constant however many
+documents are exported, and nothing is truncated.
+
+    csv     orders: one row per order line, with the order columns repeated
+            products: one row per product, notes joined with "; "
+    ndjson  one stored document per line, as the list endpoints return it
+"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Iterable, List, Sequence
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from catalog_cache import prepare_product
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+ORDER_COLUMNS = (
+    "order_id", "created_at", "status", "customer_name", "customer_email",
+    "customer_phone", "customer_address", "notes", "order_total",
+    "product_id", "product_name", "quantity", "price",
+)
+
+PRODUCT_COLUMNS = (
+    "id", "name", "island_id", "island_name", "price", "stock", "size",
+    "olfactive_family", "mood", "top_notes", "heart_notes", "base_notes",
+    "description", "image_url", "visible", "rating_count", "rating_mean", "created_at",
+)
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def check_format(export_format: str) -> str:
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return export_format
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _order_rows(order: dict) -> List[list]:
+    head = [
+        order["id"], order["created_at"], order.get("status"), order.get("customer_name"),
+        order.get("customer_email"), order.get("customer_phone"), order.get("customer_address"),
+        order.get("notes"), order.get("total"),
+    ]
+    items = order.get("items") or []
+    if not items:
+        return [head + [None] * 4]
+    return [
+        head + [item["product_id"], item["product_name"], item["quantity"], item["price"]]
+        for item in items
+    ]
+
+
+def _product_rows(product: dict) -> List[list]:
+    notes = product.get("aroma_notes") or {}
+    summary = product["rating_summary"]
+    return [[
+        product["id"], product.get("name"), product.get("island_id"), product.get("island_name"),
+        product.get("price"), product.get("stock"), product.get("size"),
+        product.get("olfactive_family"), product.get("mood"),
+        "; ".join(notes.get("top", [])), "; ".join(notes.get("heart", [])), "; ".join(notes.get("base", [])),
+        product.get("description"), product.get("image_url"), product.get("visible", True),
+        summary["count"], summary["mean"], product.get("created_at"),
+    ]]
+
+
+class _CsvEncoder:
+    """Encodes rows through one reusable csv.writer buffer"""
+
+    def __init__(self, rows: Callable[[dict], Iterable[list]]):
+        self._rows = rows
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out)
+
+    def encode_rows(self, rows: Iterable[Sequence]) -> bytes:
+        self._writer.writerows([_cell(value) for value in row] for row in rows)
+        data = self._out.getvalue().encode()
+        self._out.seek(0)
+        self._out.truncate()
+        return data
+
+    def __call__(self, doc: dict) -> bytes:
+        return self.encode_rows(self._rows(doc))
+
+
+def _ndjson(doc: dict) -> bytes:
+    return orjson.dumps(doc) + b"\n"
+
+
+async def _stream(cursor, encode: Callable[[dict], bytes], header: bytes = b"") -> AsyncIterator[bytes]:
+    buffer = bytearray(header)
+    try:
+        async for doc in cursor:
+            buffer += encode(doc)
+            if len(buffer) >= CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        # Also runs when the client disconnects mid-download
+        await cursor.close()
+
+
+def _export_response(cursor, export_format: str, name: str, columns: Sequence[str],
+                     rows: Callable[[dict], Iterable[list]],
+                     prepare: Callable[[dict], dict] = lambda doc: doc) -> StreamingResponse:
+    if export_format == "csv":
+        encoder = _CsvEncoder(rows)
+        body = _stream(cursor, lambda doc: encoder(prepare(doc)), header=encoder.encode_rows([columns]))
+    else:
+        body = _stream(cursor, lambda doc: _ndjson(prepare(doc)))
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}-{stamp}.{export_format}"'},
+    )
+
+
+def export_orders(cursor, export_format: str) -> StreamingResponse:
+    return _export_response(cursor, export_format, "orders", ORDER_COLUMNS, _order_rows)
+
+
+def export_products(cursor, export_format: str) -> StreamingResponse:
+    return _export_response(cursor, export_format, "products", PRODUCT_COLUMNS, _product_rows,
+                            prepare=prepare_product)
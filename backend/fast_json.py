@@ -0,0 +1,37 @@
+"""
+Fast serialisation path for large list responses.
+
+Documents served from the catalog cache or fetched with an explicit
+projection are already in response shape. Routing them through
+``response_model`` makes FastAPI validate every element into a Pydantic model
+and then encode it again. For trusted database output, handlers instead return
+plain dicts through ``json_response``. That skips validation and encodes with
+orjson, which handles ``datetime`` natively, so datetimes stored as BSON dates
+need no per-item conversion either.
+
+``benchmarks/list_serialization.py`` compares both paths.
+"""
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+# Set by orjson itself, never copied from the handler's Response
+_SKIPPED_HEADERS = {b"content-length", b"content-type"}
+
+
+def json_response(content: Any, response: Optional[Response] = None,
+                  status_code: int = 200) -> ORJSONResponse:
+    """Encode ``content`` with orjson, keeping headers already set on ``response``
+
+    A handler that returns a Response directly bypasses FastAPI's merging of
+    the injected ``response`` parameter, so ETag, Cache-Control and cursor
+    headers are carried over here.
+    """
+    fast = ORJSONResponse(content, status_code=status_code)
+    if response is not None:
+        fast.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers
+            if name.lower() not in _SKIPPED_HEADERS
+        )
+    return fast
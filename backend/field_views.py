@@ -0,0 +1,75 @@
+"""
+Sparse field selection for list endpoints.
+
+List endpoints accept ``fields=``, which takes one of:
+
+    card           the compact default view, just what a grid card renders
+    full           every field of the resource
+    id,name,price  an explicit comma-separated subset (``id`` is always kept)
+
+Each selection resolves to a Pydantic model containing only those fields. The
+same model drives the Mongo projection (or the in-memory projection for
+cached reads) and the response serialisation. Fields that were not asked for
+are never fetched, validated or sent.
+"""
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, create_model
+from pydantic.fields import FieldInfo
+
+CARD_VIEW = "card"
+FULL_VIEW = "full"
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    """A model with only ``names`` from ``model``, built once per field set"""
+    fields = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in names}
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(extra="ignore"),
+        **fields
+    )
+
+
+def select_view(fields: Optional[str], model: Type[BaseModel],
+                card_model: Type[BaseModel]) -> Type[BaseModel]:
+    """Resolve a ``fields=`` value to the response model to use"""
+    if not fields or fields == CARD_VIEW:
+        return card_model
+    if fields == FULL_VIEW:
+        return model
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return partial_model(model, tuple(sorted(names | {"id"})))
+
+
+def mongo_projection(view: Type[BaseModel]) -> dict:
+    projection = {"_id": 0}
+    projection.update({name: 1 for name in view.model_fields})
+    return projection
+
+
+def _default(field: FieldInfo) -> Any:
+    value = field.get_default(call_default_factory=True)
+    return value.model_dump() if isinstance(value, BaseModel) else value
+
+
+def project(doc: dict, view: Type[BaseModel]) -> dict:
+    """Pick the view's fields out of a stored document without copying the rest
+
+    Optional fields missing from older documents get the model default, as
+    validation would have filled them in.
+    """
+    return {
+        name: doc[name] if name in doc else _default(field)
+        for name, field in view.model_fields.items()
+        if name in doc or not field.is_required()
+    }
@@ -0,0 +1,97 @@
+"""
+HTTP caching helpers: ETag validation for catalog responses and long-lived
+cache headers for uploaded files.
+
+Catalog ETags combine the catalog cache's validators for the sections (or the
+single document) a response is built from with the request's query string. A
+returning visitor with a matching ``If-None-Match`` gets an empty ``304``
+instead of the full JSON body. The validators derive from stored revisions,
+so any worker process produces the same ETag for the same data. Responses
+also carry ``Last-Modified``; ``If-Modified-Since`` is only consulted when
+the request has no ``If-None-Match``, as RFC 9110 requires.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def catalog_cache_control(max_age: int, stale_while_revalidate: int) -> str:
+    return f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+
+def make_etag(request: Request, *validators: str) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    query_digest = hashlib.blake2b(query.encode(), digest_size=4).hexdigest()
+    return f'W/"{"-".join(validators)}.{query_digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes on either side
+    tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == tag:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(request: Request, response: Response, etag: str, cache_control: str,
+                         last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """Set validators on ``response``; return a 304 when the client copy is current
+
+    ``last_modified`` must be timezone-aware.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        current = _etag_matches(if_none_match, etag)
+    else:
+        current = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    if current:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+class UploadStaticFiles(StaticFiles):
+    """Static uploads: file names never change content, so cache them forever"""
+
+    def __init__(self, *args, hidden_dirs=("tmp",), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hidden_dirs = set(hidden_dirs)
+
+    async def get_response(self, path: str, scope) -> Response:
+        if path.replace("\\", "/").split("/", 1)[0] in self.hidden_dirs:
+            raise StarletteHTTPException(status_code=404)
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,226 @@
+"""
+Asynchronous image-processing pipeline for admin uploads.
+
+Uploads are streamed to a temporary file, then decoded, resized and encoded
+in a process pool so the event loop never runs PIL. Each upload produces a
+set of responsive renditions, which the media store files under
+``uploads/r/<digest>/``:
+
+    400.jpg  400.webp  800.jpg  800.webp  1200.jpg  1200.webp  1600.jpg  1600.webp
+
+``1200.jpg`` is the primary URL stored on products, islands and the theme. The
+frontend derives the other sizes from that path. Images are never upscaled:
+widths larger than the source are skipped and a rendition at the source width
+takes their place, so every file is named after its real width. The primary
+URL then carries that widest width, e.g. ``1200.jpg?w=1400`` or
+``900.jpg?w=900``, for the frontend to build its srcset from. Job progress is
+kept in the ``upload_jobs`` collection so any worker can answer a status poll.
+"""
+import asyncio
+import hashlib
+import logging
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+from media_store import MediaStore
+from metrics import IMAGE_PROCESSING_DURATION
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = (400, 800, 1200, 1600)
+PRIMARY_WIDTH = 1200
+CHUNK_SIZE = 1024 * 1024
+
+ENCODERS = {
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+}
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """Convert images with transparency or palettes to RGB on white"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def rendition_widths(source_width: int, widths=RENDITION_WIDTHS) -> list:
+    """The widths a source can fill, plus its own width when narrower than the largest"""
+    fitting = [width for width in widths if width <= source_width]
+    if source_width < widths[-1] and source_width not in fitting:
+        fitting.append(source_width)
+    return fitting
+
+
+def render_renditions(source_path: str, output_dir: str, widths=RENDITION_WIDTHS) -> dict:
+    """Decode ``source_path`` and write every rendition into ``output_dir``
+
+    Runs inside a worker process, so it only takes and returns plain data.
+    """
+    started = time.perf_counter()
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source_path) as original:
+        original.load()
+        img = _flatten(original)
+
+    renditions = []
+    fitting = rendition_widths(img.width, widths)
+    for width in fitting:
+        if width < img.width:
+            height = max(1, round(img.height * width / img.width))
+            resized = img.resize((width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = img
+        for ext, (fmt, options) in ENCODERS.items():
+            path = output / f"{width}.{ext}"
+            resized.save(path, fmt, **options)
+            renditions.append({
+                "width": width,
+                "height": resized.height,
+                "format": ext,
+                "filename": path.name,
+                "bytes": path.stat().st_size,
+            })
+
+    primary_filename = f"{min(PRIMARY_WIDTH, img.width)}.jpg"
+    return {
+        "width": img.width,
+        "height": img.height,
+        "renditions": renditions,
+        "primary_filename": primary_filename,
+        # Tells the frontend which widths exist when the full set doesn't
+        "primary_query": f"?w={fitting[-1]}" if fitting[-1] < widths[-1] else "",
+        "digest": hashlib.sha256((output / primary_filename).read_bytes()).hexdigest(),
+        "duration_seconds": time.perf_counter() - started,
+    }
+
+
+class ImagePipeline:
+    def __init__(self, db, store: MediaStore, upload_dir: Path, workers: int = 2,
+                 max_upload_bytes: int = 20 * 1024 * 1024):
+        self.db = db
+        self.store = store
+        self.upload_dir = upload_dir
+        self.workers = workers
+        self.max_upload_bytes = max_upload_bytes
+        self.tmp_dir = upload_dir / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def receive(self, upload):
+        """Stream an UploadFile to a temporary file in fixed-size chunks
+
+        Returns the file path and the SHA-256 of the uploaded bytes.
+        """
+        tmp_path = self.tmp_dir / f"{uuid.uuid4()}.upload"
+        source_hash = hashlib.sha256()
+        received = 0
+        try:
+            with open(tmp_path, "wb") as buffer:
+                while True:
+                    chunk = await upload.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+                    if received > self.max_upload_bytes:
+                        raise ValueError(f"Upload exceeds {self.max_upload_bytes} bytes")
+                    buffer.write(chunk)
+                    source_hash.update(chunk)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, source_hash.hexdigest()
+
+    async def submit(self, source_path: Path, source_digest: str, original_filename: Optional[str] = None) -> dict:
+        """Register a job for ``source_path`` and start processing it in the background"""
+        job_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        job = {
+            "id": job_id,
+            "status": "processing",
+            "original_filename": original_filename,
+            "source_digest": source_digest,
+            "url": None,
+            "media_id": None,
+            "renditions": [],
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        # The exact same bytes were processed before: reuse the stored renditions
+        existing = await self.store.find_by_source(source_digest)
+        if existing:
+            source_path.unlink(missing_ok=True)
+            job.update(self._done_fields(existing))
+            await self.db.upload_jobs.insert_one(dict(job))
+            return job
+
+        await self.db.upload_jobs.insert_one(dict(job))
+        task = asyncio.create_task(self._process(job_id, source_path, source_digest))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    @staticmethod
+    def _done_fields(media: dict) -> dict:
+        return {
+            "status": "done",
+            "url": media["url"],
+            "media_id": media["id"],
+            "width": media["width"],
+            "height": media["height"],
+            "renditions": media["renditions"],
+        }
+
+    async def _process(self, job_id: str, source_path: Path, source_digest: str):
+        staging_dir = self.tmp_dir / job_id
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(
+                self._get_executor(), render_renditions, str(source_path), str(staging_dir)
+            )
+            IMAGE_PROCESSING_DURATION.observe(result["duration_seconds"], "success")
+            media = await self.store.commit(staging_dir, result, source_digest)
+            update = self._done_fields(media)
+            update["duration_seconds"] = round(result["duration_seconds"], 3)
+        except Exception as e:
+            logger.error(f"Image processing failed for {job_id}: {e}")
+            IMAGE_PROCESSING_DURATION.observe(time.perf_counter() - started, "failure")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            update = {"status": "failed", "error": str(e)}
+        finally:
+            source_path.unlink(missing_ok=True)
+
+        update["updated_at"] = datetime.now(timezone.utc)
+        await self.db.upload_jobs.update_one({"id": job_id}, {"$set": update})
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        return await self.db.upload_jobs.find_one({"id": job_id}, {"_id": 0})
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,172 @@
+"""
+Index management for every collection queried by server.py.
+
+`ensure_indexes` is idempotent and runs on application startup and after
+seeding. It also drops indexes listed in OBSOLETE_INDEXES, which no query
+uses any more. Run this file directly to create the indexes or to report how
+often each index has been used:
+
+    python indexes.py ensure
+    python indexes.py stats
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Sort fields offered by the paginated list endpoints, always paired with `id`
+PRODUCT_SORT_FIELDS = ("price", "created_at", "name")
+ORDER_SORT_FIELDS = ("created_at", "total")
+REVIEW_SORT_FIELDS = ("date", "rating")
+# Upload jobs only matter while the admin form polls them
+UPLOAD_JOB_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _product_indexes():
+    # Point and $in lookups by id (cache refreshes, checkout, reviews, bulk
+    # writes), and the id-ordered export and image optimizer scans
+    indexes = [IndexModel([("id", ASCENDING)], unique=True)]
+    # Admin listing: sort by field, tie-break by id. Public listings, filters
+    # and search are served from the in-memory catalog and need no index
+    for field in PRODUCT_SORT_FIELDS:
+        indexes.append(IndexModel([(field, ASCENDING), ("id", ASCENDING)]))
+    return indexes
+
+
+def _order_indexes():
+    indexes = [IndexModel([("id", ASCENDING)], unique=True)]
+    for field in ORDER_SORT_FIELDS:
+        indexes.append(IndexModel([(field, DESCENDING), ("id", DESCENDING)]))
+    # Status filter, optionally with a created_at range, in the default sort
+    indexes.append(IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]))
+    return indexes
+
+
+def _review_indexes():
+    indexes = [IndexModel([("id", ASCENDING)], unique=True)]
+    # Per-product listing, either sort direction walks the same index
+    for field in REVIEW_SORT_FIELDS:
+        indexes.append(IndexModel([("product_id", ASCENDING), (field, ASCENDING), ("id", ASCENDING)]))
+    return indexes
+
+
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+    ],
+    "islands": [IndexModel([("id", ASCENDING)], unique=True)],
+    "products": _product_indexes(),
+    "orders": _order_indexes(),
+    "reviews": _review_indexes(),
+    # Daily rollups ("all" holds the lifetime totals), read by date range
+    "order_daily_stats": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("date", ASCENDING)]),
+    ],
+    "faq": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("order", ASCENDING)]),
+    ],
+    "quiz": [IndexModel([("id", ASCENDING)], unique=True)],
+    "theme": [IndexModel([("id", ASCENDING)], unique=True)],
+    # Latest deletion per catalog collection, see revisions.py
+    "catalog_meta": [IndexModel([("id", ASCENDING)], unique=True)],
+    "media": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("source_digests", ASCENDING)]),
+    ],
+    "upload_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=UPLOAD_JOB_TTL_SECONDS),
+    ],
+}
+
+
+# Indexes of queries that moved to the in-memory catalog, dropped where they exist
+OBSOLETE_INDEXES = {
+    "products": [
+        f"{field}_1_visible_1_created_at_1_id_1" for field in ("island_id", "mood", "olfactive_family")
+    ],
+    "islands": ["slug_1"],
+}
+
+
+async def drop_obsolete_indexes(db):
+    """Drop the OBSOLETE_INDEXES that exist, returns {collection: [index names]}"""
+    dropped = {}
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                dropped.setdefault(collection, []).append(name)
+    return dropped
+
+
+async def ensure_indexes(db):
+    """Create any missing indexes, returns {collection: [index names]}"""
+    try:
+        for collection, names in (await drop_obsolete_indexes(db)).items():
+            logger.info(f"Dropped unused indexes on {collection}: {', '.join(names)}")
+    except OperationFailure as e:
+        logger.error(f"Dropping unused indexes failed: {e}")
+    created = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            created[collection] = await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate keys blocking a unique index; keep going for the rest
+            logger.error(f"Index creation failed for {collection}: {e}")
+    return created
+
+
+async def index_usage(db):
+    """Return $indexStats for every managed collection"""
+    usage = {}
+    for collection in INDEXES:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        usage[collection] = [
+            {
+                "name": stat["name"],
+                "key": dict(stat["key"]),
+                "ops": stat["accesses"]["ops"],
+                "since": stat["accesses"]["since"],
+            }
+            for stat in stats
+        ]
+    return usage
+
+
+async def main(command: str):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    if command == "ensure":
+        created = await ensure_indexes(db)
+        for collection, names in created.items():
+            print(f"✓ {collection}: {', '.join(names)}")
+    elif command == "stats":
+        usage = await index_usage(db)
+        for collection, stats in usage.items():
+            print(f"\n📊 {collection}")
+            for stat in sorted(stats, key=lambda s: s["ops"], reverse=True):
+                print(f"   {stat['ops']:>10}  {stat['name']}  (since {stat['since']:%Y-%m-%d %H:%M})")
+    else:
+        print(f"Unknown command: {command} (expected 'ensure' or 'stats')")
+        sys.exit(1)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "ensure"))
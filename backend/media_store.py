@@ -0,0 +1,180 @@
+"""
+Content-addressed store for processed images.
+
+Renditions are written to a staging directory first and then moved to
+``uploads/r/<digest>/``, where ``digest`` is the SHA-256 of the primary
+rendition. Uploading the same image twice therefore yields the same URL and
+no extra files. The ``media`` collection indexes every stored image
+(dimensions, bytes, renditions, the source digests that produced it).
+
+References are not tracked on write. The garbage collector derives them from
+the ``products``, ``islands`` and ``theme.hero_images`` URLs each time it
+runs, and leaves images younger than a grace period alone:
+
+    python media_store.py gc              # report only
+    python media_store.py gc --delete     # also remove unreferenced files
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+RENDITION_DIR = "r"
+URL_PREFIX = "/api/uploads/"
+# /api/uploads/r/<name>/<file> or legacy flat /api/uploads/<file>
+UPLOAD_URL_PATTERN = re.compile(r"/api/uploads/(?:r/([^/]+)/[^/?#]+|([^/?#]+))")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(moment: datetime) -> float:
+    # MongoDB returns naive datetimes, which are UTC
+    return (moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment).timestamp()
+
+
+class MediaStore:
+    def __init__(self, db, upload_dir: Path):
+        self.db = db
+        self.upload_dir = upload_dir
+        self.rendition_root = upload_dir / RENDITION_DIR
+
+    def url_for(self, name: str, filename: str) -> str:
+        return f"{URL_PREFIX}{RENDITION_DIR}/{name}/{filename}"
+
+    async def find_by_source(self, source_digest: str) -> Optional[dict]:
+        """Stored image previously produced from identical upload bytes"""
+        return await self.db.media.find_one({"source_digests": source_digest}, {"_id": 0})
+
+    async def commit(self, staging_dir: Path, result: dict, source_digest: Optional[str] = None) -> dict:
+        """Move freshly rendered files into place under their content digest"""
+        digest = result["digest"]
+        final_dir = self.rendition_root / digest
+        if final_dir.exists():
+            # Identical processed content is already stored
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        else:
+            self.rendition_root.mkdir(parents=True, exist_ok=True)
+            try:
+                staging_dir.rename(final_dir)
+            except OSError:
+                # Lost a race with a concurrent upload of the same image
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+        renditions = [
+            {**r, "url": self.url_for(digest, r["filename"])}
+            for r in result["renditions"]
+        ]
+        update = {
+            "$setOnInsert": {
+                "id": digest,
+                "url": self.url_for(digest, result["primary_filename"]) + result.get("primary_query", ""),
+                "width": result["width"],
+                "height": result["height"],
+                "bytes": sum(r["bytes"] for r in renditions),
+                "renditions": renditions,
+                "created_at": _now(),
+            },
+        }
+        if source_digest:
+            update["$addToSet"] = {"source_digests": source_digest}
+        await self.db.media.update_one({"id": digest}, update, upsert=True)
+        return await self.db.media.find_one({"id": digest}, {"_id": 0})
+
+    # ----- garbage collection -----
+
+    async def referenced_names(self) -> dict:
+        """Count references per stored name (digest directory or legacy file)"""
+        counts = {}
+
+        def count(url):
+            if not isinstance(url, str):
+                return
+            match = UPLOAD_URL_PATTERN.search(url)
+            if match:
+                name = match.group(1) or match.group(2)
+                counts[name] = counts.get(name, 0) + 1
+
+        async for doc in self.db.products.find({}, {"_id": 0, "image_url": 1}):
+            count(doc.get("image_url"))
+        async for doc in self.db.islands.find({}, {"_id": 0, "image_url": 1}):
+            count(doc.get("image_url"))
+        theme = await self.db.theme.find_one({"id": "theme_settings"}, {"_id": 0, "hero_images": 1})
+        for url in (theme or {}).get("hero_images", []):
+            count(url)
+        return counts
+
+    async def collect_garbage(self, delete: bool = False, min_age_seconds: float = 24 * 3600) -> dict:
+        """Find stored files no document references
+
+        Images younger than ``min_age_seconds`` are never removed, since an
+        admin may have uploaded them without saving the form yet. Age is the
+        media document's ``created_at``, or the file time for files without one.
+        """
+        references = await self.referenced_names()
+        cutoff = time.time() - min_age_seconds
+        created = {
+            media["id"]: _timestamp(media["created_at"])
+            async for media in self.db.media.find({}, {"_id": 0, "id": 1, "created_at": 1})
+            if media.get("created_at")
+        }
+
+        candidates = []
+        if self.rendition_root.exists():
+            candidates += [p for p in self.rendition_root.iterdir() if p.is_dir()]
+        candidates += [p for p in self.upload_dir.iterdir() if p.is_file() and not p.name.startswith(".")]
+
+        unreferenced, reclaimed = [], 0
+        for path in candidates:
+            if path.name in references or created.get(path.name, path.stat().st_mtime) > cutoff:
+                continue
+            size = sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) if path.is_dir() else path.stat().st_size
+            unreferenced.append({"name": path.name, "bytes": size})
+            reclaimed += size
+            if delete:
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                    await self.db.media.delete_one({"id": path.name})
+                else:
+                    path.unlink(missing_ok=True)
+
+        return {
+            "referenced": len(references),
+            "unreferenced": unreferenced,
+            "bytes": reclaimed,
+            "deleted": delete,
+        }
+
+
+async def main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    root_dir = Path(__file__).parent
+    load_dotenv(root_dir / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    store = MediaStore(db, root_dir / "uploads")
+
+    report = await store.collect_garbage(delete=args.delete, min_age_seconds=args.min_age_hours * 3600)
+    for item in report["unreferenced"]:
+        print(f"{'🗑️ ' if args.delete else '  '} {item['name']}  ({item['bytes'] / 1024:.1f}KB)")
+    action = "Removed" if args.delete else "Unreferenced"
+    print(f"\n{action}: {len(report['unreferenced'])} entries, {report['bytes'] / 1024 / 1024:.2f}MB")
+    print(f"Referenced: {report['referenced']} entries")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload store maintenance")
+    parser.add_argument("command", choices=["gc"])
+    parser.add_argument("--delete", action="store_true", help="remove unreferenced files")
+    parser.add_argument("--min-age-hours", type=float, default=24.0,
+                        help="never remove files newer than this")
+    asyncio.run(main(parser.parse_args()))
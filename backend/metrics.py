@@ -0,0 +1,285 @@
+"""
+In-process metrics exposed in the Prometheus text format on /api/metrics.
+
+Collected here:
+
+    http_request_duration_seconds     histogram per method and route template
+    http_requests_total               counter per method, route and status
+    http_requests_in_flight           gauge
+    mongodb_command_duration_seconds  histogram per command and collection,
+                                      fed by pymongo command monitoring
+    event_loop_lag_seconds            histogram + gauge of the last sample
+    image_processing_seconds          histogram per outcome
+
+Callers can also register gauges and counters read at scrape time, which is
+how the password hashing pool is exposed.
+
+The endpoint is never public. Scrapers send ``Authorization: Bearer <token>``
+with the value of the ``METRICS_TOKEN`` environment variable; without that
+variable only an admin access token is accepted. For example::
+
+    scrape_configs:
+      - job_name: archipelago
+        metrics_path: /api/metrics
+        authorization:
+          credentials_file: /etc/prometheus/archipelago_metrics_token
+
+Recording an observation is a bisect over the bucket bounds and a few
+integer increments under a per-metric lock, so it is safe to leave on under
+full load. The lock is needed because pymongo publishes command events from
+Motor's worker threads. Route labels use the route template
+(``/api/products/{product_id}``), never the raw path, so cardinality stays
+bounded by the number of routes.
+"""
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+IMAGE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.bounds) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A gauge or counter whose value is read from ``fn`` at scrape time"""
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], float], kind: str = "gauge"):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_number(self._fn())}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template",
+    ("method", "route"),
+))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests served, by route template and status code",
+    ("method", "route", "status"),
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served",
+))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trips as seen by the driver",
+    ("command", "collection", "outcome"), buckets=MONGO_BUCKETS,
+))
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds", "How late the event loop woke a periodic timer",
+    buckets=LOOP_LAG_BUCKETS,
+))
+EVENT_LOOP_LAG_LAST = REGISTRY.register(Gauge(
+    "event_loop_lag_last_seconds", "Most recent event loop lag sample",
+))
+IMAGE_PROCESSING_DURATION = REGISTRY.register(Histogram(
+    "image_processing_seconds", "Time to render the renditions of one upload",
+    ("outcome",), buckets=IMAGE_BUCKETS,
+))
+
+
+_route_templates: Dict[int, str] = {}
+
+
+def route_template(scope) -> str:
+    """Path template of the route that served ``scope``, once routing has run"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    template = _route_templates.get(id(endpoint))
+    if template is None:
+        template = UNMATCHED_ROUTE
+        for route in getattr(scope.get("app"), "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint or getattr(route, "app", None) is endpoint:
+                template = route.path if hasattr(route, "endpoint") else f"{route.path}/{{path}}"
+                break
+        _route_templates[id(endpoint)] = template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], route)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status["code"]))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds mongodb_command_duration_seconds, pass it to the client's event_listeners"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, int], str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        self._collections[(event.request_id, event.operation_id)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.request_id, event.operation_id), "")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name, collection, outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Sample event loop lag forever, run it as a background task"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
@@ -0,0 +1,117 @@
+"""
+Convert timestamps stored as ISO strings into native BSON dates.
+
+Older versions of the API wrote every ``created_at``/``updated_at`` with
+``.isoformat()``. This rewrites them in place, in batches of ``bulk_write``
+updates. Only values whose BSON type is still ``string`` are selected, so an
+interrupted run can simply be restarted, and a finished one is a no-op. Each
+update is conditional on the original string, so a document edited while the
+migration runs is never overwritten with stale data.
+
+    python migrate_dates.py --dry-run
+    python migrate_dates.py --batch-size 1000
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DATE_FIELDS = {
+    "users": ("created_at",),
+    "islands": ("created_at",),
+    "products": ("created_at",),
+    "reviews": ("date",),
+    "orders": ("created_at",),
+    "faq": ("created_at",),
+    "theme": ("updated_at",),
+    "quiz": ("updated_at",),
+    "media": ("created_at",),
+    "upload_jobs": ("created_at", "updated_at"),
+}
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """ISO string to an aware UTC datetime, None if it can't be parsed"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+async def migrate_field(db, collection: str, field: str, batch_size: int = 500,
+                        dry_run: bool = False) -> dict:
+    query = {field: {"$type": "string"}}
+    if dry_run:
+        return {"converted": await db[collection].count_documents(query), "invalid": 0}
+
+    report = {"converted": 0, "invalid": 0}
+    last_id = None
+    while True:
+        # Walk by _id so unparseable values are skipped rather than refetched
+        batch_query = {**query, "_id": {"$gt": last_id}} if last_id is not None else query
+        docs = await db[collection].find(batch_query, {"_id": 1, field: 1}) \
+            .sort("_id", 1) \
+            .limit(batch_size) \
+            .to_list(batch_size)
+        if not docs:
+            return report
+        last_id = docs[-1]["_id"]
+
+        updates = []
+        for doc in docs:
+            parsed = parse_timestamp(doc[field])
+            if parsed is None:
+                report["invalid"] += 1
+                logger.warning(f"{collection}.{field}: cannot parse {doc[field]!r} on {doc['_id']}")
+                continue
+            updates.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: parsed}}))
+        if updates:
+            result = await db[collection].bulk_write(updates, ordered=False)
+            report["converted"] += result.modified_count
+
+
+async def migrate(db, batch_size: int = 500, dry_run: bool = False) -> dict:
+    report = {}
+    for collection, fields in DATE_FIELDS.items():
+        for field in fields:
+            report[f"{collection}.{field}"] = await migrate_field(
+                db, collection, field, batch_size=batch_size, dry_run=dry_run
+            )
+    return report
+
+
+async def main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    report = await migrate(db, batch_size=args.batch_size, dry_run=args.dry_run)
+    for name, counts in report.items():
+        if counts["converted"] or counts["invalid"]:
+            invalid = f", {counts['invalid']} unparseable" if counts["invalid"] else ""
+            print(f"{'  ' if args.dry_run else '✓ '}{name}: {counts['converted']}{invalid}")
+    total = sum(counts["converted"] for counts in report.values())
+    verb = "Would convert" if args.dry_run else "Converted"
+    print(f"\n{'🔍' if args.dry_run else '✅'} {verb} {total} timestamps")
+    client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Convert ISO string timestamps to BSON dates")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be converted")
+    parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Move reviews embedded in product documents into the ``reviews`` collection.
+
+For every product that still has a ``reviews`` array, each review is upserted
+under a deterministic id, the product's ``rating_summary`` is rebuilt from the
+collection, and the array is removed. Products are handled one at a time and
+re-running is harmless, so an interrupted migration can simply be restarted.
+
+    python migrate_reviews.py --dry-run
+    python migrate_reviews.py
+"""
+import argparse
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+from reviews import RATINGS, rebuild_summary
+
+
+def review_document(product_id: str, index: int, review: dict) -> dict:
+    date = review.get("date") or datetime.now(timezone.utc)
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"review:{product_id}:{index}")),
+        "product_id": product_id,
+        "reviewer_name": review.get("reviewer_name", ""),
+        "rating": min(max(int(review.get("rating", 0)), RATINGS[0]), RATINGS[-1]),
+        "comment": review.get("comment", ""),
+        "date": date,
+    }
+
+
+async def migrate(db, dry_run: bool = False) -> dict:
+    report = {"products": 0, "reviews": 0}
+    cursor = db.products.find({"reviews": {"$exists": True}}, {"_id": 0, "id": 1, "name": 1, "reviews": 1})
+    async for product in cursor:
+        documents = [
+            review_document(product["id"], index, review)
+            for index, review in enumerate(product.get("reviews") or [])
+        ]
+        report["products"] += 1
+        report["reviews"] += len(documents)
+        print(f"{'  ' if dry_run else '✓ '}{product['name']}: {len(documents)} reviews")
+        if dry_run:
+            continue
+
+        if documents:
+            await db.reviews.bulk_write(
+                [UpdateOne({"id": doc["id"]}, {"$set": doc}, upsert=True) for doc in documents],
+                ordered=False
+            )
+        await rebuild_summary(db, product["id"])
+        await db.products.update_one({"id": product["id"]}, {"$unset": {"reviews": ""}})
+    return report
+
+
+async def main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from indexes import ensure_indexes
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    if not args.dry_run:
+        await ensure_indexes(db)
+    report = await migrate(db, dry_run=args.dry_run)
+    verb = "Would migrate" if args.dry_run else "Migrated"
+    print(f"\n{'🔍' if args.dry_run else '✅'} {verb} {report['reviews']} reviews from {report['products']} products")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move embedded product reviews into their own collection")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be migrated")
+    asyncio.run(main(parser.parse_args()))
@@ -1,153 +1,330 @@
 """
 Script to optimize existing image URLs by downloading and re-optimizing them
+
+Images are rendered into the same responsive renditions as admin uploads and
+stored content-addressed, so running the script twice (or over an image that
+was already uploaded) reuses the stored files instead of duplicating them.
+
+Every product and island whose image is not yet under /api/uploads/ goes
+through a pipeline:
+
+    fetch   up to --concurrency downloads at once; file:// URLs and files
+            found in --source-dir (matched by file name) are read locally,
+            so the script can run offline
+    render  decode, resize and encode in a pool of --workers processes
+    update  image_url changes written with bulk_write, --batch-size at a time
+
+Each distinct source URL is fetched and rendered once, however many documents
+share it. Progress is saved to a checkpoint file after every batch, so an
+interrupted run picks up where it stopped; --reset starts over. Documents
+that were already updated are skipped either way.
+
+    python optimize_existing.py
+    python optimize_existing.py --source-dir ~/image-dump --workers 8 --concurrency 32
 """
+import argparse
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+import hashlib
+import json
 import os
-from dotenv import load_dotenv
-from pathlib import Path
-import requests
-from PIL import Image
-import io
+import re
+import shutil
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+import httpx
+from pymongo import UpdateOne
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from image_pipeline import CHUNK_SIZE, render_renditions
+from media_store import URL_PREFIX, MediaStore
+from revisions import with_revision
 
+ROOT_DIR = Path(__file__).parent
 UPLOAD_DIR = ROOT_DIR / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-def optimize_image(image_bytes, max_width=1200, quality=80):
-    """Optimize image from bytes"""
-    img = Image.open(io.BytesIO(image_bytes))
-    
-    # Convert RGBA to RGB
-    if img.mode in ('RGBA', 'LA', 'P'):
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'P':
-            img = img.convert('RGBA')
-        if img.mode == 'RGBA':
-            background.paste(img, mask=img.split()[-1])
-        else:
-            background.paste(img)
-        img = background
-    
-    # Resize if too large
-    if img.width > max_width:
-        ratio = max_width / img.width
-        new_height = int(img.height * ratio)
-        img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-    
-    # Save to bytes
-    output = io.BytesIO()
-    img.save(output, 'JPEG', quality=quality, optimize=True)
-    return output.getvalue()
-
-async def optimize_products():
-    """Optimize product images"""
-    products = await db.products.find({}).to_list(100)
-    
-    for product in products:
-        if not product.get('image_url'):
-            continue
-            
-        # Skip if already optimized (local URL)
-        if '/api/uploads/' in product['image_url']:
-            print(f"✓ {product['name']} - Already optimized")
-            continue
-        
+TMP_DIR = UPLOAD_DIR / "tmp"
+CHECKPOINT_PATH = TMP_DIR / "optimize_checkpoint.json"
+
+COLLECTIONS = ("products", "islands")
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+DOWNLOAD_TIMEOUT = 30
+PROGRESS_INTERVAL = 5.0
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Resume state: the last finished id per collection and every rendered source URL
+
+    Documents are finished out of order, so ``after`` only advances past an
+    id once every document before it in the scan is written (or failed).
+    """
+
+    def __init__(self, path: Path, reset: bool = False):
+        self.path = path
+        state = {}
+        if path.exists() and not reset:
+            state = json.loads(path.read_text())
+        self.collections: Dict[str, dict] = state.get("collections", {})
+        self.sources: Dict[str, str] = state.get("sources", {})
+        self._issued = {}
+        self._finished = {}
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.collections or self.sources)
+
+    def after(self, collection: str) -> Optional[str]:
+        return self.collections.get(collection, {}).get("after")
+
+    def is_done(self, collection: str) -> bool:
+        return self.collections.get(collection, {}).get("done", False)
+
+    def issue(self, collection: str, doc_id: str) -> int:
+        """Register a document in scan order, returns its sequence number"""
+        issued = self._issued.setdefault(collection, [0, {}])
+        sequence = issued[0]
+        issued[0] += 1
+        issued[1][sequence] = doc_id
+        return sequence
+
+    def finish(self, collection: str, sequence: int):
+        finished = self._finished.setdefault(collection, [0, set()])
+        finished[1].add(sequence)
+        ids = self._issued[collection][1]
+        while finished[0] in finished[1]:
+            finished[1].remove(finished[0])
+            self.collections.setdefault(collection, {})["after"] = ids.pop(finished[0])
+            finished[0] += 1
+
+    def mark_done(self, collection: str):
+        self.collections.setdefault(collection, {})["done"] = True
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"collections": self.collections, "sources": self.sources}))
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        self.path.unlink(missing_ok=True)
+
+
+class Optimizer:
+    def __init__(self, db, checkpoint: Checkpoint, http: httpx.AsyncClient, executor: ProcessPoolExecutor,
+                 concurrency: int, workers: int, batch_size: int, source_dir: Optional[Path] = None):
+        self.db = db
+        self.media_store = MediaStore(db, UPLOAD_DIR)
+        self.checkpoint = checkpoint
+        self.http = http
+        self.executor = executor
+        self.batch_size = batch_size
+        self._fetch_slots = asyncio.Semaphore(concurrency)
+        # Enough documents in flight to keep both the downloads and the pool busy
+        self._in_flight = asyncio.Semaphore(concurrency + workers)
+        self._sources: Dict[str, asyncio.Future] = {}
+        self._local_files = self._index_source_dir(source_dir) if source_dir else {}
+        self.stats = {"scanned": 0, "updated": 0, "rendered": 0, "reused": 0, "failed": 0}
+        self.errors: Dict[str, str] = {}
+
+    @staticmethod
+    def _index_source_dir(source_dir: Path) -> Dict[str, Path]:
+        files = {}
+        for path in source_dir.rglob("*"):
+            if path.is_file():
+                files.setdefault(path.name, path)
+                files.setdefault(path.stem, path)
+        return files
+
+    def _local_path(self, url: str) -> Optional[Path]:
+        parsed = urlparse(url)
+        if parsed.scheme == "file":
+            return Path(unquote(parsed.path))
+        name = unquote(parsed.path.rsplit("/", 1)[-1])
+        return self._local_files.get(name) or self._local_files.get(Path(name).stem)
+
+    async def _fetch(self, url: str) -> Tuple[Path, str, bool]:
+        """Source file, SHA-256 of its bytes, and whether it is a temporary download"""
+        local = self._local_path(url)
+        if local:
+            return local, await asyncio.to_thread(_file_digest, local), False
+
+        tmp_path = TMP_DIR / f"{uuid.uuid4()}.upload"
+        digest = hashlib.sha256()
+        received = 0
         try:
-            print(f"Processing {product['name']}...")
-            
-            # Download image
-            response = requests.get(product['image_url'], timeout=10)
-            if response.status_code != 200:
-                print(f"  ✗ Failed to download")
-                continue
-            
-            # Optimize
-            optimized_bytes = optimize_image(response.content, max_width=800, quality=75)
-            
-            # Save
-            filename = f"{uuid.uuid4()}.jpg"
-            file_path = UPLOAD_DIR / filename
-            with open(file_path, 'wb') as f:
-                f.write(optimized_bytes)
-            
-            # Get file size
-            size_kb = len(optimized_bytes) / 1024
-            
-            # Update database with relative path
-            new_url = f"/api/uploads/{filename}"
-            await db.products.update_one(
-                {'id': product['id']},
-                {'$set': {'image_url': new_url}}
-            )
-            
-            print(f"  ✓ Optimized to {size_kb:.1f}KB - {new_url}")
-            
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-
-async def optimize_islands():
-    """Optimize island images"""
-    islands = await db.islands.find({}).to_list(100)
-    
-    for island in islands:
-        if not island.get('image_url'):
-            continue
-            
-        # Skip if already optimized
-        if '/api/uploads/' in island['image_url']:
-            print(f"✓ {island['name']} - Already optimized")
-            continue
-        
+            async with self.http.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise ValueError(f"Download failed with status {response.status_code}")
+                with open(tmp_path, "wb") as buffer:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        received += len(chunk)
+                        if received > MAX_IMAGE_BYTES:
+                            raise ValueError(f"Image exceeds {MAX_IMAGE_BYTES} bytes")
+                        buffer.write(chunk)
+                        digest.update(chunk)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, digest.hexdigest(), True
+
+    async def _render(self, url: str) -> str:
+        """Stored primary URL for a source image, fetching and rendering it if needed"""
+        if url in self.checkpoint.sources:
+            self.stats["reused"] += 1
+            return self.checkpoint.sources[url]
+
+        async with self._fetch_slots:
+            source_path, source_digest, temporary = await self._fetch(url)
+        try:
+            media = await self.media_store.find_by_source(source_digest)
+            if media:
+                self.stats["reused"] += 1
+            else:
+                staging_dir = TMP_DIR / str(uuid.uuid4())
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, render_renditions, str(source_path), str(staging_dir)
+                    )
+                except Exception:
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+                    raise
+                media = await self.media_store.commit(staging_dir, result, source_digest)
+                self.stats["rendered"] += 1
+        finally:
+            if temporary:
+                source_path.unlink(missing_ok=True)
+        self.checkpoint.sources[url] = media["url"]
+        return media["url"]
+
+    def _source(self, url: str) -> asyncio.Future:
+        """One shared render per distinct URL"""
+        future = self._sources.get(url)
+        if future is None:
+            future = self._sources[url] = asyncio.ensure_future(self._render(url))
+        return future
+
+    async def _process(self, collection: str, doc: dict, sequence: int, updates: list):
         try:
-            print(f"Processing {island['name']}...")
-            
-            # Download image
-            response = requests.get(island['image_url'], timeout=10)
-            if response.status_code != 200:
-                print(f"  ✗ Failed to download")
-                continue
-            
-            # Optimize (larger for hero images)
-            optimized_bytes = optimize_image(response.content, max_width=1600, quality=80)
-            
-            # Save
-            filename = f"{uuid.uuid4()}.jpg"
-            file_path = UPLOAD_DIR / filename
-            with open(file_path, 'wb') as f:
-                f.write(optimized_bytes)
-            
-            size_kb = len(optimized_bytes) / 1024
-            
-            # Update database
-            new_url = f"/api/uploads/{filename}"
-            await db.islands.update_one(
-                {'id': island['id']},
-                {'$set': {'image_url': new_url}}
-            )
-            
-            print(f"  ✓ Optimized to {size_kb:.1f}KB - {new_url}")
-            
+            new_url = await self._source(doc["image_url"])
         except Exception as e:
-            print(f"  ✗ Error: {e}")
-
-async def main():
-    print("🖼️  Starting image optimization...\n")
-    
-    print("📦 Optimizing product images...")
-    await optimize_products()
-    
-    print("\n🏝️  Optimizing island images...")
-    await optimize_islands()
-    
-    print("\n✅ Optimization complete!")
+            self.stats["failed"] += 1
+            self.errors.setdefault(doc["image_url"], str(e) or type(e).__name__)
+            self.checkpoint.finish(collection, sequence)
+        else:
+            updates.append((sequence, UpdateOne({"id": doc["id"]}, with_revision({"$set": {"image_url": new_url}}))))
+            if len(updates) >= self.batch_size:
+                await self._flush(collection, updates)
+        finally:
+            self._in_flight.release()
+
+    async def _flush(self, collection: str, updates: list):
+        batch = updates[:]
+        del updates[:]
+        if not batch:
+            return
+        await self.db[collection].bulk_write([op for _, op in batch], ordered=False)
+        self.stats["updated"] += len(batch)
+        for sequence, _ in batch:
+            self.checkpoint.finish(collection, sequence)
+        self.checkpoint.save()
+
+    async def optimize(self, collection: str):
+        if self.checkpoint.is_done(collection):
+            print(f"✓ {collection} - Already finished in the checkpointed run")
+            return
+        query = {"image_url": {"$nin": [None, ""], "$not": re.compile(re.escape(URL_PREFIX))}}
+        after = self.checkpoint.after(collection)
+        if after is not None:
+            query["id"] = {"$gt": after}
+
+        updates, tasks = [], set()
+        cursor = self.db[collection].find(query, {"_id": 0, "id": 1, "image_url": 1}).sort("id", 1)
+        async for doc in cursor:
+            await self._in_flight.acquire()
+            self.stats["scanned"] += 1
+            sequence = self.checkpoint.issue(collection, doc["id"])
+            task = asyncio.create_task(self._process(collection, doc, sequence, updates))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        await self._flush(collection, updates)
+        self.checkpoint.mark_done(collection)
+        self.checkpoint.save()
+
+
+async def report_progress(optimizer: Optimizer, started: float):
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        stats = optimizer.stats
+        elapsed = time.perf_counter() - started
+        print(f"   {stats['scanned']:,} scanned, {stats['updated']:,} updated, {stats['rendered']:,} rendered, "
+              f"{stats['failed']:,} failed  ({stats['rendered'] / elapsed:.1f} images/s)")
+
+
+async def main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+    checkpoint = Checkpoint(Path(args.checkpoint), reset=args.reset)
+    print("🖼️  Starting image optimization...")
+    if checkpoint.resumed:
+        print(f"↻ Resuming from {args.checkpoint} ({len(checkpoint.sources):,} sources already rendered)")
+
+    executor = ProcessPoolExecutor(max_workers=args.workers)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=DOWNLOAD_TIMEOUT, follow_redirects=True) as http:
+        optimizer = Optimizer(
+            db, checkpoint, http, executor,
+            concurrency=args.concurrency,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            source_dir=Path(args.source_dir) if args.source_dir else None
+        )
+        progress = asyncio.create_task(report_progress(optimizer, started))
+        try:
+            for collection in args.collections:
+                print(f"\n📦 Optimizing {collection} images...")
+                await optimizer.optimize(collection)
+        finally:
+            progress.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            client.close()
+
+    elapsed = time.perf_counter() - started
+    stats = optimizer.stats
+    for url, error in list(optimizer.errors.items())[:20]:
+        print(f"  ✗ {url}: {error}")
+    checkpoint.remove()
+    print(f"\n✅ Optimization complete in {elapsed:.1f}s")
+    print(f"   - Documents updated: {stats['updated']:,} of {stats['scanned']:,}")
+    print(f"   - Images rendered: {stats['rendered']:,} ({stats['rendered'] / elapsed:.1f} images/s)")
+    print(f"   - Images reused: {stats['reused']:,}")
+    print(f"   - Failed: {stats['failed']:,} documents, {len(optimizer.errors):,} distinct sources")
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Re-encode existing product and island images")
+    parser.add_argument("--collections", nargs="+", choices=COLLECTIONS, default=list(COLLECTIONS))
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous downloads")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="encoding processes")
+    parser.add_argument("--batch-size", type=int, default=500, help="documents per bulk update")
+    parser.add_argument("--source-dir", help="read images from here by file name instead of downloading")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH))
+    parser.add_argument("--reset", action="store_true", help="ignore an existing checkpoint")
+    asyncio.run(main(parser.parse_args()))
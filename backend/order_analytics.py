@@ -0,0 +1,257 @@
+"""
+Order analytics served from pre-aggregated daily rollups.
+
+Every order is folded into one rollup document for the UTC day it was placed,
+plus a lifetime document, in the ``order_daily_stats`` collection:
+
+    {
+        "id": "2025-03-15",
+        "date": datetime(2025, 3, 15, tzinfo=timezone.utc),
+        "orders": 12, "units": 19, "revenue": 15300000.0, "cancelled_revenue": 850000.0,
+        "status": {"pending": 4, "confirmed": 6, "cancelled": 1, ...},
+        "products": {"<product id>": {"units": 3, "revenue": 2550000.0}, ...},
+        "islands": {"<island id>": {"units": 5, "revenue": 4250000.0}, ...}
+    }
+
+``create_order`` and ``update_order_status`` apply ``$inc`` updates, so
+reading a 30-day dashboard touches 31 small documents however many orders
+exist. A status change moves the order between status buckets of the day it
+was placed, so the funnel always describes that day's cohort. ``rebuild``
+recomputes every rollup from the orders with aggregation pipelines. Use it
+to backfill existing orders, or if the rollups ever drift:
+
+    python order_analytics.py rebuild
+"""
+import asyncio
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Literal, Optional, get_args
+
+from pymongo import UpdateOne
+
+LIFETIME_ID = "all"
+GRANULARITIES = ("day", "week")
+TOP_PRODUCTS = 10
+
+OrderStatus = Literal["pending", "confirmed", "shipped", "delivered", "cancelled"]
+ORDER_STATUSES = get_args(OrderStatus)
+
+
+def day_key(moment: datetime) -> str:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def week_key(day: str) -> str:
+    year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _day_start(day: str) -> datetime:
+    return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def _status_path(status: str) -> str:
+    # Statuses become field paths in $inc, so never let an arbitrary string through
+    if status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown order status: {status!r}")
+    return f"status.{status}"
+
+
+def _order_increments(order: dict, product_islands: Dict[str, str]) -> dict:
+    inc = {
+        "orders": 1,
+        "revenue": order["total"],
+        _status_path(order.get("status", "pending")): 1,
+    }
+    for item in order["items"]:
+        line_revenue = item["price"] * item["quantity"]
+        inc["units"] = inc.get("units", 0) + item["quantity"]
+        for bucket, key in (("products", item["product_id"]),
+                            ("islands", product_islands.get(item["product_id"]))):
+            if key is None:
+                continue
+            inc[f"{bucket}.{key}.units"] = inc.get(f"{bucket}.{key}.units", 0) + item["quantity"]
+            inc[f"{bucket}.{key}.revenue"] = inc.get(f"{bucket}.{key}.revenue", 0) + line_revenue
+    return inc
+
+
+def _rollup_update(key: str, inc: dict) -> UpdateOne:
+    update = {"$inc": inc}
+    if key != LIFETIME_ID:
+        update["$setOnInsert"] = {"date": _day_start(key)}
+    return UpdateOne({"id": key}, update, upsert=True)
+
+
+async def _apply(db, day: str, inc: dict):
+    await db.order_daily_stats.bulk_write(
+        [_rollup_update(day, inc), _rollup_update(LIFETIME_ID, inc)], ordered=False
+    )
+
+
+async def record_order(db, order: dict, product_islands: Dict[str, str]):
+    """Fold a newly placed order into its day's rollup and the lifetime totals"""
+    await _apply(db, day_key(order["created_at"]), _order_increments(order, product_islands))
+
+
+async def record_status_change(db, order: dict, old_status: str, new_status: str):
+    """Move an order between status buckets of the day it was placed"""
+    if old_status == new_status:
+        return
+    inc = {_status_path(old_status): -1, _status_path(new_status): 1}
+    if new_status == "cancelled":
+        inc["cancelled_revenue"] = order["total"]
+    elif old_status == "cancelled":
+        inc["cancelled_revenue"] = -order["total"]
+    await _apply(db, day_key(order["created_at"]), inc)
+
+
+def _merge(target: dict, bucket: Dict[str, dict]):
+    for key, values in (bucket or {}).items():
+        entry = target[key]
+        entry["units"] += values.get("units", 0)
+        entry["revenue"] += values.get("revenue", 0)
+
+
+def _ranked(bucket: Dict[str, dict], names: Dict[str, str], limit: Optional[int] = None) -> list:
+    rows = [
+        {"id": key, "name": names.get(key, key), "units": values["units"], "revenue": round(values["revenue"], 2)}
+        for key, values in bucket.items()
+        if values["units"] or values["revenue"]
+    ]
+    rows.sort(key=lambda row: (-row["units"], -row["revenue"], row["name"]))
+    return rows[:limit] if limit else rows
+
+
+async def summarize(db, start: datetime, end: datetime, granularity: str = "day",
+                    product_names: Optional[Dict[str, str]] = None,
+                    island_names: Optional[Dict[str, str]] = None) -> dict:
+    """Analytics for orders placed in [start, end), read from the rollups only"""
+    days = await db.order_daily_stats.find(
+        {"date": {"$gte": start, "$lt": end}}, {"_id": 0}
+    ).sort("date", 1).to_list(None)
+    lifetime = await db.order_daily_stats.find_one({"id": LIFETIME_ID}, {"_id": 0}) or {}
+
+    series = defaultdict(lambda: {"orders": 0, "units": 0, "revenue": 0.0, "cancelled_revenue": 0.0})
+    status = defaultdict(int)
+    products = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+    islands = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+    for day in days:
+        period = day["id"] if granularity == "day" else week_key(day["id"])
+        point = series[period]
+        for field in point:
+            point[field] += day.get(field, 0)
+        for name, count in (day.get("status") or {}).items():
+            status[name] += count
+        _merge(products, day.get("products"))
+        _merge(islands, day.get("islands"))
+
+    orders = sum(point["orders"] for point in series.values())
+    revenue = sum((point["revenue"] for point in series.values()), 0.0)
+    cancelled_revenue = sum((point["cancelled_revenue"] for point in series.values()), 0.0)
+    return {
+        "range": {"from": start, "to": end, "granularity": granularity},
+        "totals": {
+            "orders": orders,
+            "units": sum(point["units"] for point in series.values()),
+            "revenue": round(revenue, 2),
+            "net_revenue": round(revenue - cancelled_revenue, 2),
+            "average_order_value": round(revenue / orders, 2) if orders else 0.0,
+        },
+        "revenue_series": [
+            {"period": period, **{k: round(v, 2) if isinstance(v, float) else v for k, v in point.items()}}
+            for period, point in series.items()
+        ],
+        "status_funnel": dict(status),
+        "top_products": _ranked(products, product_names or {}, TOP_PRODUCTS),
+        "islands": _ranked(islands, island_names or {}),
+        "lifetime": {
+            "orders": lifetime.get("orders", 0),
+            "revenue": round(lifetime.get("revenue", 0.0), 2),
+            "status": lifetime.get("status", {}),
+        },
+    }
+
+
+async def rebuild(db) -> int:
+    """Recompute all rollups from the orders collection, returns the number of days
+
+    Needs ``created_at`` stored as BSON dates (see migrate_dates.py). Run it
+    while no orders are being placed, since the rollups are replaced wholesale.
+    """
+    product_islands = {
+        product["id"]: product.get("island_id")
+        for product in await db.products.find({}, {"_id": 0, "id": 1, "island_id": 1}).to_list(None)
+    }
+    day_expr = {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+    rollups = defaultdict(lambda: defaultdict(int))
+
+    async for row in db.orders.aggregate([
+        {"$group": {
+            "_id": {"day": day_expr, "status": "$status"},
+            "orders": {"$sum": 1},
+            "revenue": {"$sum": "$total"},
+        }},
+    ]):
+        for key in (row["_id"]["day"], LIFETIME_ID):
+            rollup = rollups[key]
+            rollup["orders"] += row["orders"]
+            rollup["revenue"] += row["revenue"]
+            rollup[f"status.{row['_id']['status']}"] += row["orders"]
+            if row["_id"]["status"] == "cancelled":
+                rollup["cancelled_revenue"] += row["revenue"]
+
+    async for row in db.orders.aggregate([
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {"day": day_expr, "product_id": "$items.product_id"},
+            "units": {"$sum": "$items.quantity"},
+            "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}},
+        }},
+    ]):
+        product_id = row["_id"]["product_id"]
+        for key in (row["_id"]["day"], LIFETIME_ID):
+            rollup = rollups[key]
+            rollup["units"] += row["units"]
+            for bucket, bucket_key in (("products", product_id), ("islands", product_islands.get(product_id))):
+                if bucket_key is not None:
+                    rollup[f"{bucket}.{bucket_key}.units"] += row["units"]
+                    rollup[f"{bucket}.{bucket_key}.revenue"] += row["revenue"]
+
+    await db.order_daily_stats.delete_many({})
+    if rollups:
+        await db.order_daily_stats.bulk_write(
+            [_rollup_update(key, dict(inc)) for key, inc in rollups.items()], ordered=False
+        )
+    return len(rollups) - (1 if LIFETIME_ID in rollups else 0)
+
+
+def default_range(days: int) -> tuple:
+    """[start of the day ``days - 1`` days ago, start of tomorrow) in UTC"""
+    tomorrow = _day_start(day_key(datetime.now(timezone.utc))) + timedelta(days=1)
+    return tomorrow - timedelta(days=days), tomorrow
+
+
+async def main(command: str):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    if command == "rebuild":
+        days = await rebuild(db)
+        print(f"✅ Rebuilt order rollups for {days} days")
+    else:
+        print(f"Unknown command: {command} (expected 'rebuild')")
+        sys.exit(1)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "rebuild"))
@@ -0,0 +1,80 @@
+"""
+Server-side pricing and atomic stock reservation for checkout.
+
+Each order line is reserved with a conditional ``$inc`` that only matches
+while enough stock remains, so concurrent buyers can never drive stock below
+zero. When a line fails for any reason (no stock, a database error, the
+request being cancelled), the lines already reserved for that order are
+released again before the error propagates. This works on a standalone
+MongoDB without multi-document transactions.
+"""
+import asyncio
+from typing import Dict, List, Tuple
+
+from revisions import with_revision
+
+
+class OrderRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def merge_lines(items) -> Dict[str, int]:
+    """Collapse repeated products into a single quantity per product id"""
+    quantities: Dict[str, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+async def load_products(db, product_ids: List[str]) -> Dict[str, dict]:
+    """Fetch every referenced product in a single $in query"""
+    products = await db.products.find(
+        {"id": {"$in": product_ids}},
+        {"_id": 0, "id": 1, "name": 1, "price": 1, "stock": 1, "visible": 1, "island_id": 1}
+    ).to_list(len(product_ids))
+    return {product["id"]: product for product in products}
+
+
+def price_lines(quantities: Dict[str, int], products: Dict[str, dict]) -> Tuple[List[dict], float]:
+    """Build order items from catalog prices, returns (items, total)"""
+    items = []
+    total = 0.0
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None or product.get("visible") is False:
+            raise OrderRejected(400, f"Product {product_id} is not available")
+        items.append({
+            "product_id": product_id,
+            "product_name": product["name"],
+            "quantity": quantity,
+            "price": product["price"],
+        })
+        total += product["price"] * quantity
+    return items, round(total, 2)
+
+
+async def release_stock(db, reserved: Dict[str, int]):
+    for product_id, quantity in reserved.items():
+        await db.products.update_one({"id": product_id}, with_revision({"$inc": {"stock": quantity}}))
+
+
+async def reserve_stock(db, quantities: Dict[str, int], products: Dict[str, dict]):
+    """Decrement stock for every line or for none of them"""
+    reserved: Dict[str, int] = {}
+    try:
+        for product_id, quantity in quantities.items():
+            result = await db.products.update_one(
+                {"id": product_id, "stock": {"$gte": quantity}},
+                with_revision({"$inc": {"stock": -quantity}})
+            )
+            if result.modified_count == 0:
+                raise OrderRejected(409, f"Insufficient stock for {products[product_id]['name']}")
+            reserved[product_id] = quantity
+    except BaseException:
+        # Also on timeouts and cancellation: never leave earlier lines reserved
+        await asyncio.shield(release_stock(db, reserved))
+        raise
+    return reserved
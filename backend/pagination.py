@@ -0,0 +1,122 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A page is ordered by a sort field plus ``id`` as a tie-breaker, and the cursor
+is the (value, id) pair of the last row returned, encoded as URL-safe base64
+JSON. The next page starts strictly after that pair, so results stay stable
+while rows are inserted or removed between requests.
+"""
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_sort(sort: str, allowed: Iterable[str]) -> Tuple[str, int]:
+    """Parse ``field`` / ``-field`` into (field, direction)"""
+    direction = DESCENDING if sort.startswith("-") else ASCENDING
+    field = sort.lstrip("-")
+    if field not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort field '{field}', expected one of: {', '.join(sorted(allowed))}"
+        )
+    return field, direction
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(value: Any, row_id: str) -> str:
+    raw = json.dumps([_encode_value(value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _decode_value(value), row_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def mongo_sort(field: str, direction: int) -> List[Tuple[str, int]]:
+    return [(field, direction), ("id", direction)]
+
+
+def mongo_after(field: str, direction: int, cursor: Optional[str]) -> dict:
+    """Query fragment selecting rows that come after ``cursor``"""
+    if not cursor:
+        return {}
+    value, row_id = decode_cursor(cursor)
+    op = "$gt" if direction == ASCENDING else "$lt"
+    return {"$or": [
+        {field: {op: value}},
+        {field: value, "id": {op: row_id}},
+    ]}
+
+
+async def mongo_page(collection, query: dict, field: str, direction: int,
+                     after: Optional[str], limit: int, projection: Optional[dict] = None):
+    """Fetch one page from ``collection``, returning (rows, next_cursor)"""
+    keyset = mongo_after(field, direction, after)
+    if keyset:
+        query = {"$and": [query, keyset]} if query else keyset
+    rows = await collection.find(query, projection or {"_id": 0}) \
+        .sort(mongo_sort(field, direction)) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+    return _trim(rows, field, limit)
+
+
+def _trim(rows: List[dict], field: str, limit: int):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.get(field), last["id"])
+
+
+def sort_key(field: str) -> Callable[[dict], tuple]:
+    return lambda row: (row.get(field), row["id"])
+
+
+def memory_page(rows: List[dict], keys: List[tuple], field: str, direction: int,
+                after: Optional[str], limit: int,
+                predicate: Optional[Callable[[dict], bool]] = None):
+    """Page through ``rows`` already sorted ascending by ``keys``
+
+    ``keys[i]`` must be ``sort_key(field)(rows[i])``. Rows rejected by
+    ``predicate`` are skipped without counting towards ``limit``.
+    """
+    if direction == ASCENDING:
+        start = bisect_right(keys, decode_cursor(after)) if after else 0
+        indices = range(start, len(rows))
+    else:
+        end = bisect_left(keys, decode_cursor(after)) if after else len(rows)
+        indices = range(end - 1, -1, -1)
+
+    page = []
+    for i in indices:
+        row = rows[i]
+        if predicate is None or predicate(row):
+            page.append(row)
+            if len(page) > limit:
+                break
+    return _trim(page, field, limit)
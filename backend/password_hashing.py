@@ -0,0 +1,108 @@
+"""
+Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt deliberately costs 100-300 ms of CPU per call. Running it inline in an
+async handler blocks the event loop for that long, so every call is handed to
+a thread or process pool instead. A semaphore sized to the pool keeps the
+executor's own queue empty, which lets us count waiting callers precisely and
+shed load once too many logins pile up.
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPoolFull(Exception):
+    """Raised when more callers are waiting than the pool allows"""
+
+
+class PasswordHasher:
+    def __init__(self, executor: str = "thread", workers: int = 4, max_pending: int = 64):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hashing executor: {executor}")
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor = None
+        self._semaphore = asyncio.Semaphore(workers)
+
+        # Metrics
+        self.active = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _submit(self, fn, *args):
+        if self.active + self.queued >= self.max_pending:
+            self.rejected += 1
+            raise HashingPoolFull()
+
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        enqueued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - enqueued_at
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self.total_run_seconds += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "active": self.active,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(1000 * self.total_wait_seconds / self.completed, 2) if self.completed else 0.0,
+            "avg_run_ms": round(1000 * self.total_run_seconds / self.completed, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,53 @@
+"""
+Precompiled quiz scoring.
+
+The quiz document is compiled once into a lookup table that maps each option
+text to a dense weight vector over the islands mentioned in the quiz. Scoring
+a submission is then a single vectorised row sum instead of a nested loop over
+answers, questions and options.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class CompiledQuiz:
+    def __init__(self, island_ids: List[str], option_rows: Dict[str, int],
+                 weights: np.ndarray, weighted: np.ndarray):
+        self.island_ids = island_ids
+        self.option_rows = option_rows
+        # weights[row, col]: summed weight of every option with that text for an island
+        self.weights = weights
+        # weighted[row, col]: True when any such option mentions the island at all
+        self.weighted = weighted
+
+    @classmethod
+    def compile(cls, quiz: Optional[dict]) -> "CompiledQuiz":
+        island_columns: Dict[str, int] = {}
+        option_rows: Dict[str, int] = {}
+        entries = []
+        for question in (quiz or {}).get("questions", []):
+            for option in question["options"]:
+                row = option_rows.setdefault(option["text"], len(option_rows))
+                for island_id, weight in option["island_weights"].items():
+                    col = island_columns.setdefault(island_id, len(island_columns))
+                    entries.append((row, col, weight))
+
+        weights = np.zeros((len(option_rows), len(island_columns)), dtype=np.int64)
+        weighted = np.zeros(weights.shape, dtype=bool)
+        for row, col, weight in entries:
+            weights[row, col] += weight
+            weighted[row, col] = True
+        return cls(list(island_columns), option_rows, weights, weighted)
+
+    def recommend(self, answers: List[str]) -> Optional[str]:
+        """Id of the highest scoring island, None when no answer carries weights"""
+        rows = [self.option_rows[text] for text in answers if text in self.option_rows]
+        if not rows:
+            return None
+        # Only islands mentioned by a selected option are candidates
+        touched = self.weighted[rows].any(axis=0)
+        if not touched.any():
+            return None
+        totals = np.where(touched, self.weights[rows].sum(axis=0), np.iinfo(np.int64).min)
+        return self.island_ids[int(np.argmax(totals))]
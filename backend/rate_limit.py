@@ -0,0 +1,38 @@
+"""
+Fixed-window request limits per client, kept in process memory.
+
+Used for public write endpoints that need no account, such as posting a
+review. Each key (normally the client address) may make ``limit`` calls per
+``window_seconds``. Keys are held in an LRU of bounded size, so a flood of
+distinct addresses cannot grow memory without limit. Counts are per worker
+process; with N workers a client gets at most N × ``limit`` calls per window.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class RateLimiter:
+    def __init__(self, limit: int, window_seconds: float, maxsize: int = 10_000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.maxsize = maxsize
+        self._windows: "OrderedDict[str, list]" = OrderedDict()
+
+    def hit(self, key: str) -> Optional[int]:
+        """Count one call; returns the seconds to wait if ``key`` is over its limit"""
+        if self.limit <= 0:
+            return None
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.window_seconds:
+            window = [now, 0]
+            self._windows[key] = window
+        self._windows.move_to_end(key)
+        while len(self._windows) > self.maxsize:
+            self._windows.popitem(last=False)
+        if window[1] >= self.limit:
+            return max(1, math.ceil(window[0] + self.window_seconds - now))
+        window[1] += 1
+        return None
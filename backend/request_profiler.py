@@ -0,0 +1,233 @@
+"""
+Opt-in profiling of individual requests.
+
+``ProfilingMiddleware`` picks requests in two ways:
+
+    sampled  a random PROFILE_SAMPLE_RATE fraction, decided when the request
+             starts; these can also record a cProfile call tree
+    slow     any request slower than PROFILE_SLOW_MS, known only at the end,
+             so it gets the timing breakdown but no call tree
+
+Each kept request is written as one JSON file to a directory that keeps the
+newest ``keep`` files. The file holds:
+
+    total_ms      wall time, first byte received to last byte sent
+    handler_ms    time inside the endpoint function
+    framework_ms  the rest: dependencies (auth), body validation, response
+                  validation and serialisation
+    mongo_ms      summed driver time of the request's MongoDB commands, with
+                  the slowest commands listed
+    loop_cpu_ms   CPU used by the event loop thread meanwhile. It is exact
+                  only when nothing else ran concurrently, and the same holds
+                  for the call tree
+
+Mongo commands are attributed through a context variable, which Motor copies
+into its worker threads. When profiling is off, none of this is installed.
+When it is on, an unsampled request costs one random() call, plus a small
+per-request record if a slow threshold is set.
+"""
+import asyncio
+import cProfile
+import contextvars
+import io
+import json
+import os
+import pstats
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+from metrics import route_template
+
+MAX_COMMANDS = 20
+CALL_TREE_LINES = 40
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+class RequestProfile:
+    __slots__ = ("handler_seconds", "mongo_seconds", "mongo_count", "commands")
+
+    def __init__(self):
+        self.handler_seconds = 0.0
+        self.mongo_seconds = 0.0
+        self.mongo_count = 0
+        self.commands = []
+
+    def add_command(self, command: str, collection: str, seconds: float):
+        self.mongo_seconds += seconds
+        self.mongo_count += 1
+        self.commands.append((seconds, command, collection))
+        if len(self.commands) > MAX_COMMANDS * 2:
+            self.commands.sort(reverse=True)
+            del self.commands[MAX_COMMANDS:]
+
+
+class ProfilerCommandListener(monitoring.CommandListener):
+    """Charges each MongoDB command to the request that issued it"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        if _current.get() is not None:
+            target = event.command.get(event.command_name)
+            self._collections[(event.request_id, event.operation_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        profile = _current.get()
+        if profile is not None:
+            collection = self._collections.pop((event.request_id, event.operation_id), "")
+            profile.add_command(event.command_name, collection, event.duration_micros / 1e6)
+
+    failed = succeeded
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that times the endpoint function separately from the framework"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+        if not asyncio.iscoroutinefunction(call):
+            return
+
+        @wraps(call)
+        async def timed(*call_args, **call_kwargs):
+            profile = _current.get()
+            if profile is None:
+                return await call(*call_args, **call_kwargs)
+            started = time.perf_counter()
+            try:
+                return await call(*call_args, **call_kwargs)
+            finally:
+                profile.handler_seconds += time.perf_counter() - started
+
+        self.dependant.call = timed
+
+
+class ProfileStore:
+    """One JSON file per profile, the oldest removed beyond ``keep``"""
+
+    def __init__(self, directory: Path, keep: int = 200):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, record: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{record['id']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(record))
+        os.replace(tmp_path, path)
+        files = sorted(self.directory.glob("*.json"))
+        for old in files[:max(0, len(files) - self.keep)]:
+            old.unlink(missing_ok=True)
+
+    def list(self, limit: int = 50) -> List[dict]:
+        """Newest first, without the call trees"""
+        if not self.directory.exists():
+            return []
+        summaries = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True)[:limit]:
+            try:
+                record = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # pruned or half-written meanwhile
+            record.pop("call_tree", None)
+            record.pop("mongo_commands", None)
+            summaries.append(record)
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        path = self.directory / f"{Path(profile_id).name}.json"
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+
+def _call_tree(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(CALL_TREE_LINES)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Profiles sampled and slow requests into a ProfileStore"""
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0,
+                 slow_ms: float = 0.0, call_tree: bool = True):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_ms / 1000
+        self.call_tree = call_tree
+        self._profiling = False  # cProfile allows one active profiler per thread
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and not self.slow_seconds:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profiler = None
+        if sampled and self.call_tree and not self._profiling:
+            self._profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = time.perf_counter() - started
+            cpu = time.thread_time() - cpu_started
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            _current.reset(token)
+
+        if sampled or total >= self.slow_seconds:
+            record = {
+                "id": f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}",
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "reason": "sampled" if sampled else "slow",
+                "method": scope["method"],
+                "route": route_template(scope),
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status["code"],
+                "total_ms": round(total * 1000, 2),
+                "handler_ms": round(profile.handler_seconds * 1000, 2),
+                "framework_ms": round(max(0.0, total - profile.handler_seconds) * 1000, 2),
+                "mongo_ms": round(profile.mongo_seconds * 1000, 2),
+                "mongo_count": profile.mongo_count,
+                "loop_cpu_ms": round(cpu * 1000, 2),
+                "mongo_commands": [
+                    {"command": command, "collection": collection, "ms": round(seconds * 1000, 2)}
+                    for seconds, command, collection in sorted(profile.commands, reverse=True)[:MAX_COMMANDS]
+                ],
+                "call_tree": _call_tree(profiler) if profiler is not None else None,
+            }
+            await asyncio.get_running_loop().run_in_executor(None, self.store.save, record)
@@ -0,0 +1,89 @@
+"""
+Product reviews, stored in their own ``reviews`` collection.
+
+Each product carries a constant-size ``rating_summary`` instead of the review
+list:
+
+    {"count": 12, "total": 53, "histogram": {"1": 0, "2": 1, "3": 1, "4": 5, "5": 5}}
+
+The summary is kept current with a single ``$inc`` per review write, so it
+never needs recomputing from the reviews themselves. The mean is derived from
+``total / count`` when the summary is read. ``rebuild_summary`` recomputes it
+from scratch; the migration uses it, and it repairs drift if it ever occurs.
+"""
+from typing import Dict, Optional
+
+from revisions import with_revision
+
+RATINGS = (1, 2, 3, 4, 5)
+
+
+def empty_summary() -> dict:
+    return {"count": 0, "total": 0, "histogram": {str(rating): 0 for rating in RATINGS}}
+
+
+def summary_increment(rating: int, sign: int = 1) -> Dict[str, int]:
+    """``$inc`` document adding (or with sign=-1 removing) one rating"""
+    return {
+        "rating_summary.count": sign,
+        "rating_summary.total": sign * rating,
+        f"rating_summary.histogram.{rating}": sign,
+    }
+
+
+def summary_mean(summary: Optional[dict]) -> float:
+    if not summary or not summary.get("count"):
+        return 0.0
+    return round(summary["total"] / summary["count"], 2)
+
+
+async def add_review(db, review: dict) -> bool:
+    """Insert a review and fold it into the product summary
+
+    The review is written first and counted only once the insert succeeded,
+    so a failed insert can never leave a phantom rating in the summary.
+    Returns False (and stores nothing) when the product does not exist.
+    """
+    await db.reviews.insert_one(dict(review))
+    try:
+        result = await db.products.update_one(
+            {"id": review["product_id"]},
+            with_revision({"$inc": summary_increment(review["rating"])})
+        )
+    except Exception:
+        await db.reviews.delete_one({"id": review["id"]})
+        raise
+    if result.matched_count == 0:
+        await db.reviews.delete_one({"id": review["id"]})
+        return False
+    return True
+
+
+async def remove_review(db, review_id: str) -> Optional[dict]:
+    """Delete a review and take it out of the product summary
+
+    Mirrors add_review: the summary changes only after the delete succeeded.
+    """
+    review = await db.reviews.find_one_and_delete({"id": review_id}, {"_id": 0})
+    if review:
+        await db.products.update_one(
+            {"id": review["product_id"]},
+            with_revision({"$inc": summary_increment(review["rating"], sign=-1)})
+        )
+    return review
+
+
+async def rebuild_summary(db, product_id: str) -> dict:
+    """Recompute a product's summary from the reviews collection"""
+    summary = empty_summary()
+    rows = await db.reviews.aggregate([
+        {"$match": {"product_id": product_id}},
+        {"$group": {"_id": "$rating", "count": {"$sum": 1}}},
+    ]).to_list(None)
+    for row in rows:
+        if row["_id"] in RATINGS:
+            summary["count"] += row["count"]
+            summary["total"] += row["_id"] * row["count"]
+            summary["histogram"][str(row["_id"])] = row["count"]
+    await db.products.update_one({"id": product_id}, with_revision({"$set": {"rating_summary": summary}}))
+    return summary
@@ -0,0 +1,76 @@
+"""
+Persisted revisions of catalog documents, the basis of HTTP validators.
+
+Every write to a product or island goes through ``with_revision`` (or
+``stamp_new`` for inserts), which increments the document's ``revision`` and
+sets ``updated_at`` in the same update. Validators derived from those stored
+fields agree between worker processes and survive restarts, and
+``updated_at`` doubles as the document's Last-Modified time. Scripts that
+edit products or islands directly in MongoDB should do the same, otherwise
+clients may keep a cached copy until its next real change.
+
+A deleted document leaves no revision behind, so deletions record their time
+per collection in ``catalog_meta`` (``record_removal``); a section is as new
+as its newest document or its latest deletion.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def as_utc(moment: datetime) -> datetime:
+    """MongoDB returns naive datetimes, which are UTC"""
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def with_revision(update: dict, now: Optional[datetime] = None) -> dict:
+    """Add the revision increment and the updated_at stamp to an update document"""
+    now = now or datetime.now(timezone.utc)
+    return {
+        **update,
+        "$inc": {**update.get("$inc", {}), "revision": 1},
+        "$set": {**update.get("$set", {}), "updated_at": now},
+    }
+
+
+def stamp_new(doc: dict, now: Optional[datetime] = None) -> dict:
+    """Give a document about to be inserted its first revision, in place"""
+    doc["revision"] = 1
+    doc["updated_at"] = now or datetime.now(timezone.utc)
+    return doc
+
+
+def to_millis(moment: datetime) -> int:
+    """Milliseconds since the epoch, the precision MongoDB stores"""
+    moment = as_utc(moment)
+    return int(moment.timestamp()) * 1000 + moment.microsecond // 1000
+
+
+def modified_at(doc: dict) -> Optional[datetime]:
+    """When a document last changed; created_at for ones written before revisions"""
+    moment = doc.get("updated_at") or doc.get("created_at")
+    return as_utc(moment) if isinstance(moment, datetime) else None
+
+
+def document_tag(doc: dict) -> int:
+    """64-bit digest of a document's id, revision and modification time
+
+    The time keeps a document deleted and recreated under the same id from
+    repeating an earlier tag.
+    """
+    moment = modified_at(doc)
+    key = f"{doc['id']}:{doc.get('revision', 0)}:{to_millis(moment) if moment else 0}"
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+async def record_removal(db, collection: str, now: Optional[datetime] = None) -> datetime:
+    """Remember that a document of ``collection`` was just deleted"""
+    now = now or datetime.now(timezone.utc)
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)  # as MongoDB will store it
+    await db.catalog_meta.update_one({"id": collection}, {"$max": {"removed_at": now}}, upsert=True)
+    return now
+
+
+async def last_removal(db, collection: str) -> Optional[datetime]:
+    meta = await db.catalog_meta.find_one({"id": collection}, {"_id": 0, "removed_at": 1})
+    return as_utc(meta["removed_at"]) if meta and meta.get("removed_at") else None
@@ -1,9 +1,17 @@
+import argparse
 import asyncio
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 import sys
+from datetime import datetime, timezone
+
+from indexes import ensure_indexes
+from order_analytics import rebuild as rebuild_order_stats
+from reviews import empty_summary
+from seed_generator import BATCH_SIZE, SyntheticCatalog, insert_documents
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -12,6 +20,9 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Stored as a BSON date, like every timestamp the API writes
+SEED_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
 # Seed data for 6 islands
 islands_data = [
     {
@@ -27,7 +38,7 @@ islands_data = [
         },
         "image_url": "https://images.unsplash.com/photo-1695632646657-2ca8100fd6ee?crop=entropy&cs=srgb&fm=jpg&q=85",
         "visible": True,
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "island_sumba",
@@ -41,7 +52,7 @@ islands_data = [
             "base": ["Vanilla", "Cedarwood", "Tonka Bean"]
         },
         "image_url": "https://images.unsplash.com/photo-1664889050657-5ec9abd9ca00?crop=entropy&cs=srgb&fm=jpg&q=85",
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "island_alor",
@@ -55,7 +66,7 @@ islands_data = [
             "base": ["Ambergris", "Musk", "Vetiver"]
         },
         "image_url": "https://images.unsplash.com/photo-1633064017654-7008f7460762?crop=entropy&cs=srgb&fm=jpg&q=85",
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "island_komodo",
@@ -69,7 +80,7 @@ islands_data = [
             "base": ["Amber", "Smoke", "Patchouli"]
         },
         "image_url": "https://images.unsplash.com/photo-1624336887379-da6b45b5f9ad?crop=entropy&cs=srgb&fm=jpg&q=85",
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "island_nias",
@@ -83,7 +94,7 @@ islands_data = [
             "base": ["Vanilla", "Sandalwood", "Benzoin"]
         },
         "image_url": "https://images.unsplash.com/photo-1567461006814-9dafe04668c6?crop=entropy&cs=srgb&fm=jpg&q=85",
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "island_papua",
@@ -97,7 +108,7 @@ islands_data = [
             "base": ["Musk", "Amber", "Vanilla"]
         },
         "image_url": "https://images.unsplash.com/photo-1724227071836-8ca18287e2b7?crop=entropy&cs=srgb&fm=jpg&q=85",
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     }
 ]
 
@@ -121,8 +132,8 @@ products_data = [
         "mood": "Mystical, Grounded",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/y6oiucty_Artboard%201.png",
         "visible": True,
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     },
     {
         "id": "prod_sumba_50ml",
@@ -141,8 +152,8 @@ products_data = [
         "olfactive_family": "Oriental Spicy",
         "mood": "Warm, Free",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/bxew3p1b_Artboard%201%20copy%202.png",
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     },
     {
         "id": "prod_alor_50ml",
@@ -161,8 +172,8 @@ products_data = [
         "olfactive_family": "Aquatic Floral",
         "mood": "Deep, Tranquil",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/cw8vuegc_Artboard%201%20copy.png",
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     },
     {
         "id": "prod_komodo_50ml",
@@ -182,8 +193,8 @@ products_data = [
         "mood": "Powerful, Raw",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/y6oiucty_Artboard%201.png",
         "visible": True,
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     },
     {
         "id": "prod_nias_50ml",
@@ -202,8 +213,8 @@ products_data = [
         "olfactive_family": "Tropical Floral",
         "mood": "Warm, Sacred",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/bxew3p1b_Artboard%201%20copy%202.png",
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     },
     {
         "id": "prod_papua_50ml",
@@ -222,8 +233,8 @@ products_data = [
         "olfactive_family": "Floral Fruity",
         "mood": "Exotic, Paradise",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/cw8vuegc_Artboard%201%20copy.png",
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     },
     {
         "id": "prod_discovery_set",
@@ -242,8 +253,8 @@ products_data = [
         "olfactive_family": "Discovery Set",
         "mood": "Exploratory",
         "image_url": "https://customer-assets.emergentagent.com/job_fragrant-isles/artifacts/bxew3p1b_Artboard%201%20copy%202.png",
-        "reviews": [],
-        "created_at": "2025-01-01T00:00:00Z"
+        "rating_summary": empty_summary(),
+        "created_at": SEED_DATE
     }
 ]
 
@@ -340,7 +351,7 @@ quiz_data = {
             ]
         }
     ],
-    "updated_at": "2025-01-01T00:00:00Z"
+    "updated_at": SEED_DATE
 }
 
 # FAQ data
@@ -350,35 +361,35 @@ faq_data = [
         "question": "Apakah Archipelago Scent menggunakan bahan alami?",
         "answer": "Ya, kami menggunakan kombinasi ekstrak alami Indonesia dan molekul sintetis berkualitas tinggi yang aman dan tahan lama.",
         "order": 1,
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "faq_2",
         "question": "Berapa lama ketahanan aromanya?",
         "answer": "Eau de Parfum kami memiliki konsentrasi 15-20% yang bertahan 6-8 jam di kulit.",
         "order": 2,
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "faq_3",
         "question": "Bagaimana cara memilih varian yang tepat?",
         "answer": "Anda bisa menggunakan Scent Finder Quiz kami atau mencoba Discovery Set yang berisi semua varian.",
         "order": 3,
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "faq_4",
         "question": "Apakah ada kebijakan pengembalian?",
         "answer": "Kami menerima retur dalam 14 hari untuk produk yang belum dibuka dengan kondisi kemasan utuh.",
         "order": 4,
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     },
     {
         "id": "faq_5",
         "question": "Apakah produk cruelty-free?",
         "answer": "Ya, semua produk Archipelago Scent adalah cruelty-free dan tidak diuji pada hewan.",
         "order": 5,
-        "created_at": "2025-01-01T00:00:00Z"
+        "created_at": SEED_DATE
     }
 ]
 
@@ -393,7 +404,7 @@ theme_data = {
         "https://images.unsplash.com/photo-1624336887379-da6b45b5f9ad?crop=entropy&cs=srgb&fm=jpg&q=85",
         "https://images.unsplash.com/photo-1664889050657-5ec9abd9ca00?crop=entropy&cs=srgb&fm=jpg&q=85"
     ],
-    "updated_at": "2025-01-01T00:00:00Z"
+    "updated_at": SEED_DATE
 }
 
 async def seed_database():
@@ -403,6 +414,7 @@ async def seed_database():
     print("Clearing existing collections...")
     await db.islands.delete_many({})
     await db.products.delete_many({})
+    await db.reviews.delete_many({})
     await db.quiz.delete_many({})
     await db.faq.delete_many({})
     await db.theme.delete_many({})
@@ -427,6 +439,10 @@ async def seed_database():
     print("Inserting theme settings...")
     await db.theme.insert_one(theme_data)
     
+    # Create indexes
+    print("Ensuring indexes...")
+    await ensure_indexes(db)
+    
     print("\n✅ Database seeded successfully!")
     print("\n📊 Summary:")
     print(f"   - Islands: {len(islands_data)}")
@@ -438,9 +454,62 @@ async def seed_database():
     print("   Example: POST /api/auth/register")
     print("   Body: {\"username\": \"admin\", \"email\": \"admin@archipelago.com\", \"password\": \"admin123\"}")
 
+async def seed_synthetic(args):
+    """Replace the catalog with a generated one of the requested size"""
+    end = datetime.fromisoformat(args.end_date).replace(tzinfo=timezone.utc) if args.end_date else None
+    catalog = SyntheticCatalog(
+        seed=args.seed,
+        islands=args.islands,
+        products=args.products,
+        reviews=args.reviews,
+        orders=args.orders,
+        days=args.days,
+        end=end,
+        base_islands=islands_data
+    )
+    print(f"🌱 Generating a synthetic catalog (seed {args.seed}, {catalog.start:%Y-%m-%d} to {catalog.end:%Y-%m-%d})...")
+    
+    print("Clearing existing collections...")
+    for collection in ("islands", "products", "reviews", "orders", "order_daily_stats", "quiz", "faq", "theme"):
+        await db[collection].delete_many({})
+    
+    await db.quiz.insert_one(quiz_data)
+    await db.faq.insert_many(faq_data)
+    await db.theme.insert_one(theme_data)
+    
+    started = time.perf_counter()
+    
+    def report(collection, inserted):
+        elapsed = time.perf_counter() - started
+        print(f"   {collection:<8} {inserted:>10,} / {catalog.totals[collection]:,}  ({elapsed:.0f}s)")
+    
+    counts = await insert_documents(db, catalog.documents(), batch_size=args.batch_size, on_progress=report)
+    elapsed = time.perf_counter() - started
+    
+    print("Ensuring indexes...")
+    await ensure_indexes(db)
+    print("Rebuilding order analytics...")
+    await rebuild_order_stats(db)
+    
+    total = sum(counts.values())
+    print(f"\n✅ Inserted {total:,} documents in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s)")
+    for collection, count in counts.items():
+        print(f"   - {collection.capitalize()}: {count:,}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the database with the demo catalog or a synthetic one")
+    parser.add_argument("--synthetic", action="store_true", help="generate a catalog of the sizes below")
+    parser.add_argument("--islands", type=int, default=20)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--reviews", type=int, default=30000)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=365, help="period the reviews and orders span")
+    parser.add_argument("--end-date", help="YYYY-MM-DD the period ends on (default: today), fix it to reproduce a run exactly")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
     try:
-        asyncio.run(seed_database())
+        asyncio.run(seed_synthetic(args) if args.synthetic else seed_database())
     except KeyboardInterrupt:
         print("\n\n⚠️  Seeding interrupted by user")
         sys.exit(1)
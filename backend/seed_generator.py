@@ -0,0 +1,362 @@
+"""
+Synthetic catalogs of any size, for load and performance testing.
+
+``SyntheticCatalog`` describes a store with N islands, M products, K reviews
+and O orders, and ``documents()`` yields them as ``(collection, document)``
+pairs in the shape the API writes. The output depends only on the seed and
+the end date, so a regression seen at 100k products can be reproduced
+exactly. The data is shaped to look like production rather than uniform:
+
+    products  olfactive families weighted by popularity; each family has its
+              own note pyramid, with common notes far more frequent than rare
+              ones and the occasional note borrowed from another family
+    reviews   spread over products by a long-tailed popularity (a few
+              bestsellers hold most reviews); ``rating_summary`` matches them
+    orders    spread over ``days`` with volume growing toward the end date
+              and a daytime peak; 1-3 lines picked by the same popularity;
+              status follows age (recent orders are still pending)
+
+``insert_documents`` writes the stream with batched ``insert_many(ordered=
+False)``, overlapping generation with the inserts. ``python seed_data.py
+--synthetic`` drives it from the command line.
+"""
+import asyncio
+import random
+from bisect import bisect
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from reviews import RATINGS, empty_summary
+
+BATCH_SIZE = 5000
+MAX_PENDING_INSERTS = 4
+
+# family -> (market share weight, note pyramid, most common notes first)
+FAMILIES = {
+    "Woody Aromatic": (22, {
+        "top": ["Bergamot", "Cardamom", "Green Leaves", "Juniper", "Grapefruit", "Lavender"],
+        "heart": ["Vetiver", "Cedarwood", "Moss", "Cypress", "Pine", "Clary Sage"],
+        "base": ["Sandalwood", "Patchouli", "Amber", "Musk", "Guaiac Wood", "Oakmoss"],
+    }),
+    "Floral": (18, {
+        "top": ["Bergamot", "Pear", "Pink Pepper", "Mandarin", "Neroli", "Lychee"],
+        "heart": ["Jasmine", "Rose", "Tuberose", "Ylang-Ylang", "Frangipani", "Orchid", "Magnolia"],
+        "base": ["Musk", "Sandalwood", "Vanilla", "Amber", "Cashmeran"],
+    }),
+    "Oriental Spicy": (15, {
+        "top": ["Cinnamon", "Nutmeg", "Black Pepper", "Clove", "Ginger", "Saffron"],
+        "heart": ["Incense", "Cumin", "Rose", "Benzoin", "Myrrh"],
+        "base": ["Amber", "Vanilla", "Tonka Bean", "Labdanum", "Oud"],
+    }),
+    "Citrus Aromatic": (12, {
+        "top": ["Lemon", "Lime", "Bergamot", "Yuzu", "Calamansi", "Petitgrain"],
+        "heart": ["Lemongrass", "Basil", "Mint", "Neroli", "Rosemary"],
+        "base": ["White Musk", "Vetiver", "Cedarwood", "Ambrette"],
+    }),
+    "Aquatic": (10, {
+        "top": ["Sea Salt", "Ozone", "Marine Accord", "Lime", "Bergamot"],
+        "heart": ["Seaweed", "Water Lily", "Lotus", "Jasmine", "Rosemary"],
+        "base": ["Driftwood", "Ambergris", "Musk", "Cedarwood"],
+    }),
+    "Gourmand": (10, {
+        "top": ["Coconut", "Orange", "Pink Pepper", "Almond", "Pear"],
+        "heart": ["Coffee", "Cacao", "Caramel", "Palm Sugar", "Praline"],
+        "base": ["Vanilla", "Tonka Bean", "Benzoin", "Musk", "Sandalwood"],
+    }),
+    "Leather Oud": (8, {
+        "top": ["Saffron", "Black Pepper", "Raspberry", "Cardamom"],
+        "heart": ["Leather", "Oud", "Rose", "Birch Tar", "Smoke"],
+        "base": ["Oud", "Amber", "Castoreum", "Patchouli", "Agarwood"],
+    }),
+    "Tropical Fruity": (5, {
+        "top": ["Mango", "Passion Fruit", "Pineapple", "Guava", "Black Currant"],
+        "heart": ["Frangipani", "Tiare", "Jasmine", "Coconut Water"],
+        "base": ["Musk", "Vanilla", "Amber", "Sandalwood"],
+    }),
+}
+MOODS = ["Mystical", "Grounded", "Warm", "Free", "Deep", "Tranquil", "Powerful", "Raw", "Sacred",
+         "Exotic", "Fresh", "Sensual", "Playful", "Serene", "Bold", "Nostalgic"]
+# name, size, price in rupiah before per-product variation
+SIZES = [
+    ("Eau de Parfum", "50ml", 850000),
+    ("Eau de Parfum", "100ml", 1350000),
+    ("Eau de Toilette", "50ml", 550000),
+    ("Extrait de Parfum", "30ml", 1150000),
+    ("Travel Spray", "10ml", 225000),
+    ("Discovery Set", "6 x 5ml", 450000),
+]
+SIZE_WEIGHTS = [40, 15, 20, 8, 12, 5]
+DESCRIPTORS = ["Dawn", "Dusk", "Tide", "Forest", "Ember", "Mist", "Reef", "Harvest", "Monsoon",
+               "Summit", "Lagoon", "Ritual", "Bloom", "Spice", "Drift", "Night", "Shore", "Temple"]
+SYLLABLES = ["ba", "la", "ma", "ta", "ra", "lu", "nu", "ka", "ngi", "bo", "so", "we", "ti",
+             "ru", "me", "da", "ja", "wa", "pu", "ke", "sa", "lo", "ha", "mi"]
+FIRST_NAMES = ["Ayu", "Budi", "Citra", "Dewi", "Eka", "Fajar", "Gita", "Hendra", "Indah", "Joko",
+               "Kartika", "Lestari", "Made", "Nadia", "Putu", "Rina", "Sari", "Teguh", "Wayan", "Yusuf"]
+LAST_NAMES = ["Pratama", "Santoso", "Wijaya", "Saputra", "Hidayat", "Kusuma", "Lubis", "Siregar",
+              "Nugroho", "Wibowo", "Halim", "Tanjung", "Sihombing", "Rahman"]
+CITIES = ["Jakarta", "Surabaya", "Bandung", "Medan", "Denpasar", "Makassar", "Yogyakarta",
+          "Semarang", "Balikpapan", "Kupang", "Jayapura", "Palembang"]
+STREETS = ["Jl. Merdeka", "Jl. Sudirman", "Jl. Diponegoro", "Jl. Gajah Mada", "Jl. Pahlawan",
+           "Jl. Melati", "Jl. Kenanga", "Jl. Cendana"]
+COMMENTS = {
+    1: ["Tidak cocok untuk saya, aromanya cepat hilang.", "Kecewa, tidak sesuai deskripsi."],
+    2: ["Kurang tahan lama.", "Aromanya terlalu tajam di awal."],
+    3: ["Lumayan, tapi biasa saja.", "Cukup enak untuk sehari-hari."],
+    4: ["Wangi dan tahan lama.", "Suka sekali dengan base notes-nya.", "Pengiriman cepat, aroma bagus."],
+    5: ["Luar biasa, jadi parfum favorit saya!", "Sangat unik dan elegan.", "Banyak yang memuji aromanya."],
+}
+# Relative order volume per hour of day (WIB), quiet at night, peaking in the evening
+HOURLY = [1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 6, 7, 8, 7, 6, 6, 7, 8, 9, 10, 10, 8, 5, 2]
+
+
+def _zipf_pick(rng: random.Random, notes: List[str], k: int) -> List[str]:
+    """k distinct notes, the earlier ones in ``notes`` being more likely"""
+    pool = list(notes)
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    picked = []
+    for _ in range(min(k, len(pool))):
+        index = rng.choices(range(len(pool)), weights)[0]
+        picked.append(pool.pop(index))
+        weights.pop(index)
+    return picked
+
+
+class SyntheticCatalog:
+    """A reproducible store of the given size, generated lazily"""
+
+    def __init__(self, seed: int = 42, islands: int = 20, products: int = 10000,
+                 reviews: int = 30000, orders: int = 50000, days: int = 365,
+                 end: Optional[datetime] = None, base_islands: Optional[List[dict]] = None):
+        if products and islands < 1:
+            raise ValueError("Products need at least one island")
+        if end is None:
+            end = datetime.combine(datetime.now(timezone.utc).date(), time(), tzinfo=timezone.utc)
+        self.seed = seed
+        self.end = end
+        self.start = end - timedelta(days=days)
+        self.totals = {"islands": islands, "products": products, "reviews": reviews, "orders": orders}
+        # Real islands first, so the stored quiz still points at existing ids
+        self.base_islands = [dict(island) for island in (base_islands or [])][:islands]
+
+        # Per-product facts that reviews and orders need before products are written
+        rng = self._rng("plan")
+        families = list(FAMILIES)
+        family_weights = [FAMILIES[family][0] for family in families]
+        self._family = rng.choices(families, family_weights, k=products)
+        self._size = rng.choices(range(len(SIZES)), SIZE_WEIGHTS, k=products)
+        self._island = [rng.randrange(max(islands, 1)) for _ in range(products)]
+        self._price = [
+            float(round(SIZES[size][2] * rng.lognormvariate(0, 0.2), -4)) for size in self._size
+        ]
+        self._name_word = [rng.choice(DESCRIPTORS) for _ in range(products)]
+        # Long-tailed popularity, about 80/20
+        self._popularity = list(accumulate(rng.paretovariate(1.16) for _ in range(products)))
+        # Catalog grows over the period: products added before most of their sales
+        span = (end - self.start).total_seconds()
+        self._created = [self.start + timedelta(seconds=span * rng.random() ** 3) for _ in range(products)]
+        self._quality = [rng.gauss(4.1, 0.5) for _ in range(products)]
+        self._island_names = self._plan_island_names(islands)
+
+    def _rng(self, stream: str) -> random.Random:
+        # String seeds hash deterministically (unlike hash()), one stream per kind of document
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _plan_island_names(self, count: int) -> List[str]:
+        rng = self._rng("island-names")
+        names = [island["name"] for island in self.base_islands]
+        taken = {name.lower() for name in names}
+        while len(names) < count:
+            name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+            if name.lower() in taken:
+                name = f"{name} {len(names)}"
+            taken.add(name.lower())
+            names.append(name)
+        return names
+
+    def product_id(self, index: int) -> str:
+        return f"prod_syn_{index:07d}"
+
+    def island_id(self, index: int) -> str:
+        if index < len(self.base_islands):
+            return self.base_islands[index]["id"]
+        return f"island_syn_{index:05d}"
+
+    def _product_name(self, index: int) -> str:
+        line, size, _ = SIZES[self._size[index]]
+        return f"{self._island_names[self._island[index]]} {self._name_word[index]} {line} {size} No. {index}"
+
+    def _pick_product(self, rng: random.Random) -> int:
+        return bisect(self._popularity, rng.random() * self._popularity[-1])
+
+    def documents(self) -> Iterator[Tuple[str, dict]]:
+        """Every document, islands first and each product after its reviews"""
+        yield from (("islands", island) for island in self.islands())
+        yield from self._products_and_reviews()
+        yield from (("orders", order) for order in self.orders())
+
+    def islands(self) -> Iterator[dict]:
+        rng = self._rng("islands")
+        for index, name in enumerate(self._island_names):
+            if index < len(self.base_islands):
+                yield self.base_islands[index]
+                continue
+            family = rng.choices(list(FAMILIES), [weight for weight, _ in FAMILIES.values()])[0]
+            pyramid = FAMILIES[family][1]
+            notes = {tier: _zipf_pick(rng, pyramid[tier], rng.randint(2, 3)) for tier in pyramid}
+            yield {
+                "id": self.island_id(index),
+                "name": name,
+                "slug": f"{name.lower().replace(' ', '-')}",
+                "story": f"Pulau {name} menyimpan aroma {', '.join(notes['heart']).lower()} "
+                         f"yang dibawa angin dari {rng.choice(CITIES)}.",
+                "mood": ", ".join(rng.sample(MOODS, 3)),
+                "aroma_notes": notes,
+                "image_url": self.base_islands[index % len(self.base_islands)]["image_url"]
+                if self.base_islands else "",
+                "visible": rng.random() > 0.05,
+                "created_at": self.start,
+            }
+
+    def _products_and_reviews(self) -> Iterator[Tuple[str, dict]]:
+        products = self.totals["products"]
+        if not products:
+            return
+        review_rng = self._rng("reviews")
+        per_product = [0] * products
+        for _ in range(self.totals["reviews"]):
+            per_product[self._pick_product(review_rng)] += 1
+
+        rng = self._rng("products")
+        families = list(FAMILIES)
+        review_number = 0
+        for index in range(products):
+            summary = empty_summary()
+            created = self._created[index]
+            review_span = max((self.end - created).total_seconds(), 1)
+            for _ in range(per_product[index]):
+                rating = min(max(round(review_rng.gauss(self._quality[index], 0.9)), RATINGS[0]), RATINGS[-1])
+                summary["count"] += 1
+                summary["total"] += rating
+                summary["histogram"][str(rating)] += 1
+                yield "reviews", {
+                    "id": f"rev_syn_{review_number:08d}",
+                    "product_id": self.product_id(index),
+                    "reviewer_name": f"{review_rng.choice(FIRST_NAMES)} {review_rng.choice(LAST_NAMES)[0]}.",
+                    "rating": rating,
+                    "comment": review_rng.choice(COMMENTS[rating]),
+                    "date": created + timedelta(seconds=review_span * review_rng.random()),
+                }
+                review_number += 1
+
+            family = self._family[index]
+            pyramid = FAMILIES[family][1]
+            notes = {tier: _zipf_pick(rng, pyramid[tier], rng.randint(2, 4)) for tier in pyramid}
+            if rng.random() < 0.15:
+                tier = rng.choice(list(pyramid))
+                borrowed = rng.choice(FAMILIES[rng.choice(families)][1][tier])
+                if borrowed not in notes[tier]:
+                    notes[tier].append(borrowed)
+            island_index = self._island[index]
+            line, size, _ = SIZES[self._size[index]]
+            yield "products", {
+                "id": self.product_id(index),
+                "name": self._product_name(index),
+                "island_id": self.island_id(island_index),
+                "island_name": self._island_names[island_index],
+                "price": self._price[index],
+                "stock": int(rng.expovariate(1 / 60)),
+                "size": size,
+                "description": f"{line} yang terinspirasi dari {self._island_names[island_index]}. "
+                               f"{notes['heart'][0]} dan {notes['base'][0]} menciptakan aroma "
+                               f"{family.lower()} yang {rng.choice(MOODS).lower()}.",
+                "aroma_notes": notes,
+                "olfactive_family": family,
+                "mood": ", ".join(rng.sample(MOODS, 2)),
+                "image_url": self.base_islands[island_index % len(self.base_islands)]["image_url"]
+                if self.base_islands else "",
+                "visible": rng.random() > 0.03,
+                "rating_summary": summary,
+                "created_at": created,
+            }
+
+    def orders(self) -> Iterator[dict]:
+        if not self.totals["products"]:
+            return
+        rng = self._rng("orders")
+        days = (self.end - self.start).days
+        for number in range(self.totals["orders"]):
+            # Density grows linearly toward the end date
+            day = self.start + timedelta(days=int(days * rng.random() ** 0.5))
+            created = day + timedelta(hours=rng.choices(range(24), HOURLY)[0], seconds=rng.randrange(3600))
+            lines = {}
+            for _ in range(rng.choices((1, 2, 3), (70, 22, 8))[0]):
+                product = self._pick_product(rng)
+                lines[product] = lines.get(product, 0) + rng.choices((1, 2, 3), (85, 12, 3))[0]
+            items = [
+                {"product_id": self.product_id(product), "product_name": self._product_name(product),
+                 "quantity": quantity, "price": self._price[product]}
+                for product, quantity in lines.items()
+            ]
+            age = (self.end - created).days
+            if rng.random() < 0.05:
+                status = "cancelled"
+            elif age < 2:
+                status = rng.choice(("pending", "confirmed"))
+            elif age < 7:
+                status = rng.choice(("confirmed", "shipped"))
+            else:
+                status = "delivered"
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield {
+                "id": f"order_syn_{number:08d}",
+                "customer_name": f"{first} {last}",
+                "customer_email": f"{first}.{last}{rng.randrange(1000)}@example.com".lower(),
+                "customer_phone": f"08{rng.randrange(10**9, 10**10)}",
+                "customer_address": f"{rng.choice(STREETS)} No. {rng.randint(1, 200)}, {rng.choice(CITIES)}",
+                "items": items,
+                "total": sum(item["price"] * item["quantity"] for item in items),
+                "status": status,
+                "notes": None,
+                "created_at": created,
+            }
+
+
+async def insert_documents(db, documents: Iterator[Tuple[str, dict]], batch_size: int = BATCH_SIZE,
+                           on_progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """Insert a (collection, document) stream in unordered batches, returns counts
+
+    Up to MAX_PENDING_INSERTS batches are in flight while the next one is
+    generated. ``on_progress(collection, inserted)`` runs after each batch.
+    """
+    buffers = defaultdict(list)
+    counts = defaultdict(int)
+    pending = set()
+
+    async def write(collection: str, batch: List[dict]):
+        await db[collection].insert_many(batch, ordered=False)
+        counts[collection] += len(batch)
+        if on_progress:
+            on_progress(collection, counts[collection])
+
+    async def flush(collection: str):
+        batch, buffers[collection] = buffers[collection], []
+        if len(pending) >= MAX_PENDING_INSERTS:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            for task in done:
+                task.result()
+        pending.add(asyncio.ensure_future(write(collection, batch)))
+
+    for collection, document in documents:
+        buffers[collection].append(document)
+        if len(buffers[collection]) >= batch_size:
+            await flush(collection)
+            await asyncio.sleep(0)  # let finished inserts report
+    for collection in list(buffers):
+        if buffers[collection]:
+            await flush(collection)
+    if pending:
+        await asyncio.gather(*pending)
+    return dict(counts)
@@ -1,45 +1,139 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Query, Request, Response
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
+import asyncio
+import hmac
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, computed_field
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-import shutil
-from PIL import Image
-import io
+
+from catalog_cache import CatalogCache, PRODUCT_PROJECTION, prepare_product
+from pagination import NEXT_CURSOR_HEADER, parse_sort, mongo_page
+from indexes import ensure_indexes, PRODUCT_SORT_FIELDS, ORDER_SORT_FIELDS, REVIEW_SORT_FIELDS
+from password_hashing import PasswordHasher, HashingPoolFull
+from user_cache import UserCache
+from rate_limit import RateLimiter
+from image_pipeline import ImagePipeline
+from media_store import MediaStore
+from http_cache import UploadStaticFiles, catalog_cache_control, conditional_response, make_etag
+from search_index import SearchIndex
+from similarity import SimilarityIndex
+from fast_json import json_response
+from field_views import FULL_VIEW, select_view, mongo_projection, project
+from reviews import add_review, remove_review, empty_summary, summary_mean
+from revisions import record_removal, stamp_new, with_revision
+from order_placement import OrderRejected, merge_lines, load_products, price_lines, reserve_stock, release_stock
+from bulk_products import IMPORT_FORMATS, bulk_update, detect_format, import_products, read_rows
+from exports import EXPORT_BATCH_SIZE, check_format, export_orders, export_products
+from order_analytics import GRANULARITIES, OrderStatus, default_range, record_order, record_status_change, summarize
+from metrics import REGISTRY, CONTENT_TYPE, CallbackMetric, MetricsMiddleware, MongoCommandListener, monitor_event_loop
+from request_profiler import ProfileStore, ProfiledRoute, ProfilerCommandListener, ProfilingMiddleware
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Request profiling, off unless a sample rate or a slow threshold is set
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))  # fraction of requests, 0-1
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', '0'))  # also keep anything slower, 0 = off
+PROFILE_CALL_TREE = os.environ.get('PROFILE_CALL_TREE', 'true').lower() == 'true'
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '200'))
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or PROFILE_SLOW_MS > 0
+profile_store = ProfileStore(ROOT_DIR / "profiles", keep=PROFILE_KEEP)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_listeners = [MongoCommandListener()]
+if PROFILING_ENABLED:
+    mongo_listeners.append(ProfilerCommandListener())
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=mongo_listeners)
 db = client[os.environ['DB_NAME']]
 
+# Catalog cache settings
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '60'))  # seconds, 0 = never expire
+catalog = CatalogCache(db, ttl_seconds=CATALOG_CACHE_TTL)
+search_index = SearchIndex(catalog)
+similarity_index = SimilarityIndex(catalog)
+
+# Browser/CDN caching of public catalog responses
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', '0'))  # 0 = always revalidate via ETag
+CATALOG_STALE_WHILE_REVALIDATE = int(os.environ.get('CATALOG_STALE_WHILE_REVALIDATE', '60'))
+CATALOG_CACHE_CONTROL = catalog_cache_control(CATALOG_MAX_AGE, CATALOG_STALE_WHILE_REVALIDATE)
+
 # JWT settings
 SECRET_KEY = os.environ.get('JWT_SECRET', 'archipelago-scent-secret-key-change-in-production')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# Authenticated user lookups are cached this long; also bounds revocation delay across workers
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+
+# Anonymous review posts per client address and window, 0 = unlimited. Behind a
+# proxy, run uvicorn with --proxy-headers so the client address is the visitor's
+REVIEW_RATE_LIMIT = int(os.environ.get('REVIEW_RATE_LIMIT', '5'))
+REVIEW_RATE_WINDOW = float(os.environ.get('REVIEW_RATE_WINDOW', '3600'))  # seconds
+
+# Password hashing pool settings
+PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')  # thread or process
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '64'))
+
+# Pagination settings
+MAX_PAGE_SIZE = 1000
+
+# Bulk product writes; the JSON body is parsed and validated on the event loop,
+# so larger jobs should go through the streamed import instead
+MAX_BULK_UPDATES = int(os.environ.get('MAX_BULK_UPDATES', '5000'))
+
 # Upload settings
 UPLOAD_DIR = ROOT_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+media_store = MediaStore(db, UPLOAD_DIR)
+image_pipeline = ImagePipeline(
+    db, media_store, UPLOAD_DIR,
+    workers=IMAGE_WORKERS,
+    max_upload_bytes=MAX_UPLOAD_BYTES
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    executor=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING
+)
 security = HTTPBearer()
+user_cache = UserCache(maxsize=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL)
+review_limiter = RateLimiter(REVIEW_RATE_LIMIT, REVIEW_RATE_WINDOW)
+
+# Metrics; /api/metrics always requires "Authorization: Bearer <token>", where the token is
+# METRICS_TOKEN (set it for the Prometheus scraper) or an admin access token
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+EVENT_LOOP_SAMPLE_INTERVAL = float(os.environ.get('EVENT_LOOP_SAMPLE_INTERVAL', '0.5'))
+for _name, _kind, _attribute, _help in (
+    ("password_hash_active", "gauge", "active", "Hashes running in the pool"),
+    ("password_hash_queued", "gauge", "queued", "Hashes waiting for a worker"),
+    ("password_hash_completed_total", "counter", "completed", "Hashes finished"),
+    ("password_hash_rejected_total", "counter", "rejected", "Hashes refused because the queue was full"),
+    ("password_hash_wait_seconds_total", "counter", "total_wait_seconds", "Time hashes spent waiting for a worker"),
+    ("password_hash_run_seconds_total", "counter", "total_run_seconds", "Time spent hashing"),
+):
+    REGISTRY.register(CallbackMetric(
+        _name, _help, lambda attribute=_attribute: getattr(password_hasher, attribute), kind=_kind
+    ))
 
 app = FastAPI()
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=ProfiledRoute if PROFILING_ENABLED else APIRoute)
 
 # ========== MODELS ==========
 
@@ -80,6 +174,15 @@ class Island(BaseModel):
     visible: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class IslandCard(BaseModel):
+    """Compact island view for grids and listings"""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    name: str
+    slug: str
+    mood: str
+    image_url: str
+
 class IslandUpdate(BaseModel):
     name: Optional[str] = None
     story: Optional[str] = None
@@ -89,11 +192,29 @@ class IslandUpdate(BaseModel):
     visible: Optional[bool] = None
 
 class Review(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    product_id: str
     reviewer_name: str
-    rating: int
+    rating: int = Field(ge=1, le=5)
     comment: str
     date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class ReviewCreate(BaseModel):
+    reviewer_name: str = Field(min_length=1, max_length=100)
+    rating: int = Field(ge=1, le=5)
+    comment: str = Field(max_length=2000)
+
+class RatingSummary(BaseModel):
+    count: int = 0
+    total: int = 0
+    histogram: Dict[str, int] = Field(default_factory=lambda: empty_summary()["histogram"])
+
+    @computed_field
+    @property
+    def mean(self) -> float:
+        return summary_mean(self.model_dump(exclude={"mean"}))
+
 class Product(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -109,9 +230,24 @@ class Product(BaseModel):
     mood: str
     image_url: str
     visible: bool = True
-    reviews: List[Review] = []
+    rating_summary: RatingSummary = Field(default_factory=RatingSummary)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class ProductCard(BaseModel):
+    """Compact product view for grids and listings"""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    name: str
+    island_id: str
+    island_name: str
+    price: float
+    stock: int
+    size: str
+    olfactive_family: str
+    mood: str
+    image_url: str
+    rating_summary: RatingSummary = Field(default_factory=RatingSummary)
+
 class ProductCreate(BaseModel):
     name: str
     island_id: str
@@ -137,6 +273,31 @@ class ProductUpdate(BaseModel):
     image_url: Optional[str] = None
     visible: Optional[bool] = None
 
+class ProductImport(BaseModel):
+    """One row of a bulk import; an existing id updates, a missing one creates"""
+    id: Optional[str] = None
+    name: str
+    island_id: str
+    island_name: Optional[str] = None  # filled in from the island when left out
+    price: float = Field(..., ge=0)
+    stock: int = Field(..., ge=0)
+    size: str = "50ml"
+    description: str
+    aroma_notes: AromaNotes
+    olfactive_family: str
+    mood: str
+    image_url: str
+    visible: bool = True
+
+class ProductPatch(BaseModel):
+    id: str
+    price: Optional[float] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+    visible: Optional[bool] = None
+
+class ProductBulkUpdate(BaseModel):
+    updates: List[ProductPatch] = Field(..., max_length=MAX_BULK_UPDATES)
+
 class QuizOption(BaseModel):
     text: str
     island_weights: Dict[str, int]  # island_id -> weight score
@@ -174,16 +335,23 @@ class Order(BaseModel):
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class OrderItemCreate(BaseModel):
+    product_id: str
+    quantity: int = Field(..., ge=1)
+    # Accepted for compatibility but ignored: names and prices come from the catalog
+    product_name: Optional[str] = None
+    price: Optional[float] = None
+
 class OrderCreate(BaseModel):
     customer_name: str
     customer_email: EmailStr
     customer_phone: str
     customer_address: str
-    items: List[OrderItem]
+    items: List[OrderItemCreate] = Field(..., min_length=1)
     notes: Optional[str] = None
 
 class OrderStatusUpdate(BaseModel):
-    status: str
+    status: OrderStatus
 
 class ThemeSettings(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -218,13 +386,58 @@ class FAQUpdate(BaseModel):
     answer: Optional[str] = None
     order: Optional[int] = None
 
+# ========== HTTP CACHE HELPERS ==========
+
+async def catalog_not_modified(request: Request, response: Response, *sections: str) -> Optional[Response]:
+    """Attach catalog validators; returns a 304 response if the client is current"""
+    validators = [await catalog.validator(section) for section in sections]
+    modified = [await catalog.last_modified(section) for section in sections]
+    last_modified = max(modified) if None not in modified else None
+    return conditional_response(
+        request, response, make_etag(request, *validators), CATALOG_CACHE_CONTROL, last_modified
+    )
+
+async def document_not_modified(request: Request, response: Response, section: str, doc_id: str) -> Optional[Response]:
+    """Like catalog_not_modified, scoped to a single island or product"""
+    validator = await catalog.document_validator(section, doc_id)
+    last_modified = await catalog.document_last_modified(section, doc_id)
+    return conditional_response(
+        request, response, make_etag(request, validator), CATALOG_CACHE_CONTROL, last_modified
+    )
+
+# ========== QUERY HELPERS ==========
+
+def as_utc(value: datetime) -> datetime:
+    """Query-string datetimes without an offset are taken as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def order_filter(order_status: Optional[str], created_from: Optional[datetime],
+                 created_to: Optional[datetime]) -> dict:
+    """Status and [created_from, created_to) filter shared by listing and export"""
+    query = {}
+    if order_status:
+        query["status"] = order_status
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = as_utc(created_from)
+        if created_to:
+            query["created_at"]["$lt"] = as_utc(created_to)
+    return query
+
 # ========== AUTH HELPERS ==========
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HashingPoolFull:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HashingPoolFull:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -233,6 +446,23 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_token(user: dict) -> str:
+    """Access token carrying the principal and its current token version"""
+    return create_access_token(data={
+        "sub": user["username"],
+        "uid": user["id"],
+        "email": user["email"],
+        "ver": user.get("token_version", 0)
+    })
+
+async def load_user_record(username: str) -> Optional[dict]:
+    user = user_cache.get(username)
+    if user is None:
+        user = await db.users.find_one({"username": username}, {"_id": 0, "password": 0})
+        if user is not None:
+            user_cache.put(username, user)
+    return user
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     try:
@@ -243,59 +473,43 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication")
     
-    user = await db.users.find_one({"username": username}, {"_id": 0})
+    user = await load_user_record(username)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    # Tokens issued before the principal claims existed carry neither uid nor ver
+    if payload.get("uid", user["id"]) != user["id"] or payload.get("ver", 0) != user.get("token_version", 0):
+        raise HTTPException(status_code=401, detail="Token revoked")
     return User(**user)
 
 # ========== UPLOAD ROUTES ==========
 
-def optimize_image(file_path: Path, max_width: int = 1200, quality: int = 85):
-    """Optimize and compress image"""
-    try:
-        with Image.open(file_path) as img:
-            # Convert RGBA to RGB if necessary
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            
-            # Resize if too large
-            if img.width > max_width:
-                ratio = max_width / img.width
-                new_height = int(img.height * ratio)
-                img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Save optimized
-            img.save(file_path, 'JPEG', quality=quality, optimize=True)
-    except Exception as e:
-        logger.error(f"Image optimization failed: {e}")
-
 @api_router.post("/admin/upload")
 async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload and optimize image file, return URL"""
+    """Accept an image and queue its renditions, poll /admin/upload/{job_id} for completion"""
     try:
-        # Generate unique filename (always save as .jpg after optimization)
-        unique_filename = f"{uuid.uuid4()}.jpg"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file temporarily
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Optimize image
-        optimize_image(file_path)
-        
-        # Return URL
-        file_url = f"/api/uploads/{unique_filename}"
-        return {"url": file_url, "filename": unique_filename}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        source_path, source_digest = await image_pipeline.receive(file)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    job = await image_pipeline.submit(source_path, source_digest, file.filename)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "url": job["url"]
+    }
+
+@api_router.get("/admin/upload/{job_id}")
+async def get_upload_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    job = await image_pipeline.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return job
 
 # ========== AUTH ROUTES ==========
 
@@ -311,8 +525,8 @@ async def register(user_data: UserCreate):
     )
     
     user_dict = user.model_dump()
-    user_dict["password"] = get_password_hash(user_data.password)
-    user_dict["created_at"] = user_dict["created_at"].isoformat()
+    user_dict["password"] = await get_password_hash(user_data.password)
+    user_dict["token_version"] = 0
     
     await db.users.insert_one(user_dict)
     return user
@@ -320,43 +534,85 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login", response_model=Token)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"username": credentials.username}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user or not await verify_password(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    access_token = create_access_token(data={"sub": user["username"]})
+    access_token = create_user_token(user)
     return Token(access_token=access_token, token_type="bearer")
 
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+@api_router.post("/auth/revoke")
+async def revoke_tokens(current_user: User = Depends(get_current_user)):
+    """Invalidate every token issued to the current user"""
+    await db.users.update_one({"id": current_user.id}, {"$inc": {"token_version": 1}})
+    user_cache.invalidate(current_user.username)
+    return {"message": "All sessions revoked"}
+
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Prometheus scrape endpoint"""
+    if not (METRICS_TOKEN and hmac.compare_digest(credentials.credentials, METRICS_TOKEN)):
+        await get_current_user(credentials)
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@api_router.get("/admin/profiles")
+async def list_request_profiles(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """Recently profiled requests, newest first (see request_profiler.py)"""
+    profiles = await asyncio.get_running_loop().run_in_executor(None, profile_store.list, limit)
+    return {
+        "enabled": PROFILING_ENABLED,
+        "sample_rate": PROFILE_SAMPLE_RATE,
+        "slow_ms": PROFILE_SLOW_MS,
+        "profiles": profiles
+    }
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    profile = await asyncio.get_running_loop().run_in_executor(None, profile_store.get, profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@api_router.get("/admin/system/password-hashing")
+async def get_password_hashing_stats(current_user: User = Depends(get_current_user)):
+    """Queue depth and timing of the bcrypt worker pool"""
+    return password_hasher.stats()
+
 # ========== ISLANDS ROUTES ==========
 
-@api_router.get("/islands", response_model=List[Island])
-async def get_islands():
+@api_router.get("/islands", response_model=None)
+async def get_islands(request: Request, response: Response, fields: Optional[str] = None):
     # Public endpoint - only show visible islands
-    islands = await db.islands.find({"visible": {"$ne": False}}, {"_id": 0}).to_list(100)
-    for island in islands:
-        if isinstance(island.get("created_at"), str):
-            island["created_at"] = datetime.fromisoformat(island["created_at"])
-    return islands
+    view = select_view(fields, Island, IslandCard)
+    not_modified = await catalog_not_modified(request, response, "islands")
+    if not_modified:
+        return not_modified
+    islands = await catalog.islands()
+    return json_response([project(island, view) for island in islands[:100]], response)
 
 @api_router.get("/admin/islands", response_model=List[Island])
 async def get_all_islands_admin(current_user: User = Depends(get_current_user)):
     # Admin endpoint - show all islands including hidden
     islands = await db.islands.find({}, {"_id": 0}).to_list(100)
-    for island in islands:
-        if isinstance(island.get("created_at"), str):
-            island["created_at"] = datetime.fromisoformat(island["created_at"])
     return islands
 
 @api_router.get("/islands/{island_id}", response_model=Island)
-async def get_island(island_id: str):
-    island = await db.islands.find_one({"id": island_id}, {"_id": 0})
+async def get_island(island_id: str, request: Request, response: Response):
+    not_modified = await document_not_modified(request, response, "islands", island_id)
+    if not_modified:
+        return not_modified
+    island = await catalog.island(island_id)
     if not island:
         raise HTTPException(status_code=404, detail="Island not found")
-    if isinstance(island.get("created_at"), str):
-        island["created_at"] = datetime.fromisoformat(island["created_at"])
     return Island(**island)
 
 @api_router.put("/admin/islands/{island_id}", response_model=Island)
@@ -365,69 +621,128 @@ async def update_island(
     update_data: IslandUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    island = await db.islands.find_one({"id": island_id}, {"_id": 0})
+    update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
+    if not update_dict:
+        island = await db.islands.find_one({"id": island_id}, {"_id": 0})
+    else:
+        island = await db.islands.find_one_and_update(
+            {"id": island_id},
+            with_revision({"$set": update_dict}),
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
     if not island:
         raise HTTPException(status_code=404, detail="Island not found")
-    
-    update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     if update_dict:
-        await db.islands.update_one({"id": island_id}, {"$set": update_dict})
-    
-    updated_island = await db.islands.find_one({"id": island_id}, {"_id": 0})
-    if isinstance(updated_island.get("created_at"), str):
-        updated_island["created_at"] = datetime.fromisoformat(updated_island["created_at"])
-    return Island(**updated_island)
+        catalog.store_island(island)
+    return Island(**island)
 
 # ========== PRODUCTS ROUTES ==========
 
-@api_router.get("/products", response_model=List[Product])
+@api_router.get("/products", response_model=None)
 async def get_products(
+    request: Request,
+    response: Response,
     island_id: Optional[str] = None,
     mood: Optional[str] = None,
-    olfactive_family: Optional[str] = None
+    olfactive_family: Optional[str] = None,
+    sort: str = "created_at",
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None
 ):
     # Public endpoint - only show visible products
-    query = {"visible": {"$ne": False}}
-    if island_id:
-        query["island_id"] = island_id
-    if mood:
-        query["mood"] = mood
-    if olfactive_family:
-        query["olfactive_family"] = olfactive_family
-    
-    products = await db.products.find(query, {"_id": 0}).to_list(100)
-    for product in products:
-        if isinstance(product.get("created_at"), str):
-            product["created_at"] = datetime.fromisoformat(product["created_at"])
-        for review in product.get("reviews", []):
-            if isinstance(review.get("date"), str):
-                review["date"] = datetime.fromisoformat(review["date"])
-    return products
+    view = select_view(fields, Product, ProductCard)
+    not_modified = await catalog_not_modified(request, response, "products")
+    if not_modified:
+        return not_modified
+    field, direction = parse_sort(sort, PRODUCT_SORT_FIELDS)
+    products, next_cursor = await catalog.product_page(
+        field, direction, after, limit,
+        island_id=island_id,
+        mood=mood,
+        olfactive_family=olfactive_family
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response([project(product, view) for product in products], response)
 
 @api_router.get("/admin/products", response_model=List[Product])
-async def get_all_products_admin(current_user: User = Depends(get_current_user)):
+async def get_all_products_admin(
+    response: Response,
+    sort: str = "created_at",
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: str = FULL_VIEW,
+    current_user: User = Depends(get_current_user)
+):
     # Admin endpoint - show all products including hidden
-    products = await db.products.find({}, {"_id": 0}).to_list(100)
-    for product in products:
-        if isinstance(product.get("created_at"), str):
-            product["created_at"] = datetime.fromisoformat(product["created_at"])
-        for review in product.get("reviews", []):
-            if isinstance(review.get("date"), str):
-                review["date"] = datetime.fromisoformat(review["date"])
-    return products
+    field, direction = parse_sort(sort, PRODUCT_SORT_FIELDS)
+    view = select_view(fields, Product, ProductCard)
+    if view is Product:
+        projection = PRODUCT_PROJECTION
+    else:
+        # The sort field is needed for the cursor even when it isn't displayed
+        projection = {**mongo_projection(view), field: 1}
+    products, next_cursor = await mongo_page(
+        db.products, {}, field, direction, after, limit, projection=projection
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response([project(prepare_product(product), view) for product in products], response)
+
+@api_router.get("/admin/products/export")
+async def export_products_route(
+    export_format: str = Query("csv", alias="format"),
+    island_id: Optional[str] = None,
+    visible: Optional[bool] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """The full catalog (hidden products included unless visible= is given), streamed"""
+    check_format(export_format)
+    query = {}
+    if island_id:
+        query["island_id"] = island_id
+    if visible is not None:
+        # Older documents have no visible field and count as visible
+        query["visible"] = {"$ne": False} if visible else False
+    cursor = db.products.find(query, PRODUCT_PROJECTION) \
+        .sort("id", 1) \
+        .batch_size(EXPORT_BATCH_SIZE)
+    return export_products(cursor, export_format)
 
 @api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
+async def get_product(product_id: str, request: Request, response: Response):
+    not_modified = await document_not_modified(request, response, "products", product_id)
+    if not_modified:
+        return not_modified
+    product = await catalog.product(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    if isinstance(product.get("created_at"), str):
-        product["created_at"] = datetime.fromisoformat(product["created_at"])
-    for review in product.get("reviews", []):
-        if isinstance(review.get("date"), str):
-            review["date"] = datetime.fromisoformat(review["date"])
     return Product(**product)
 
+@api_router.get("/products/{product_id}/similar", response_model=None)
+async def get_similar_products(
+    product_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(6, ge=1, le=24),
+    fields: Optional[str] = None
+):
+    """Visible products closest in aroma notes, family and mood"""
+    view = select_view(fields, Product, ProductCard)
+    not_modified = await catalog_not_modified(request, response, "products")
+    if not_modified:
+        return not_modified
+    similar = await similarity_index.similar(product_id, k=limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # The score isn't a Product field, so put it back after projecting
+    return json_response(
+        [{**project(product, view), "similarity": product["similarity"]} for product in similar],
+        response
+    )
+
 @api_router.post("/admin/products", response_model=Product)
 async def create_product(
     product_data: ProductCreate,
@@ -435,29 +750,63 @@ async def create_product(
 ):
     product = Product(**product_data.model_dump())
     product_dict = product.model_dump()
-    product_dict["created_at"] = product_dict["created_at"].isoformat()
+    product_dict["rating_summary"] = empty_summary()  # the mean is derived, never stored
     
-    await db.products.insert_one(product_dict)
+    await db.products.insert_one(stamp_new(product_dict))
+    await catalog.refresh_product(product.id)
     return product
 
+@api_router.post("/admin/products/import")
+async def import_products_route(
+    file: UploadFile = File(...),
+    import_format: Optional[str] = Query(None, alias="format"),
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Upsert products from a CSV (export layout), NDJSON or JSON array upload"""
+    import_format = import_format or detect_format(file.filename)
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}"
+        )
+    islands = await catalog.islands(include_hidden=True)
+    return await import_products(
+        db, read_rows(file.file, import_format), ProductImport,
+        island_names={island["id"]: island["name"] for island in islands},
+        dry_run=dry_run,
+        on_batch=catalog.refresh_products
+    )
+
+@api_router.post("/admin/products/bulk-update")
+async def bulk_update_products(
+    payload: ProductBulkUpdate,
+    current_user: User = Depends(get_current_user)
+):
+    """Set price, stock and/or visible on many products by id"""
+    return await bulk_update(db, payload.updates, on_batch=catalog.refresh_products)
+
 @api_router.put("/admin/products/{product_id}", response_model=Product)
 async def update_product(
     product_id: str,
     update_data: ProductUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
+    update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
+    if not update_dict:
+        product = await db.products.find_one({"id": product_id}, PRODUCT_PROJECTION)
+    else:
+        product = await db.products.find_one_and_update(
+            {"id": product_id},
+            with_revision({"$set": update_dict}),
+            projection=PRODUCT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     if update_dict:
-        await db.products.update_one({"id": product_id}, {"$set": update_dict})
-    
-    updated_product = await db.products.find_one({"id": product_id}, {"_id": 0})
-    if isinstance(updated_product.get("created_at"), str):
-        updated_product["created_at"] = datetime.fromisoformat(updated_product["created_at"])
-    return Product(**updated_product)
+        catalog.store_product(product)
+    return Product(**product)
 
 @api_router.delete("/admin/products/{product_id}")
 async def delete_product(
@@ -467,47 +816,113 @@ async def delete_product(
     result = await db.products.delete_one({"id": product_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await db.reviews.delete_many({"product_id": product_id})
+    catalog.remove_product(product_id, await record_removal(db, "products"))
     return {"message": "Product deleted"}
 
+# ========== REVIEW ROUTES ==========
+
+@api_router.get("/products/{product_id}/reviews", response_model=List[Review])
+async def get_product_reviews(
+    product_id: str,
+    response: Response,
+    sort: str = "-date",
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None
+):
+    """Reviews of one product, newest first, paginated via X-Next-Cursor"""
+    if not await catalog.product(product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    field, direction = parse_sort(sort, REVIEW_SORT_FIELDS)
+    reviews, next_cursor = await mongo_page(
+        db.reviews, {"product_id": product_id}, field, direction, after, limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return reviews
+
+@api_router.post("/products/{product_id}/reviews", response_model=Review)
+async def create_review(product_id: str, review_data: ReviewCreate, request: Request):
+    retry_after = review_limiter.hit(request.client.host if request.client else "unknown")
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many reviews, please try again later",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    review = Review(product_id=product_id, **review_data.model_dump())
+    review_dict = review.model_dump()
+    
+    if not await add_review(db, review_dict):
+        raise HTTPException(status_code=404, detail="Product not found")
+    # Only the rating summary changed; no need to reload the whole product
+    await catalog.refresh_volatile([product_id])
+    return review
+
+@api_router.delete("/admin/reviews/{review_id}")
+async def delete_review(
+    review_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    review = await remove_review(db, review_id)
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    await catalog.refresh_volatile([review["product_id"]])
+    return {"message": "Review deleted"}
+
+# ========== SEARCH ROUTES ==========
+
+@api_router.get("/search")
+async def search_products(
+    q: str = "",
+    mood: Optional[str] = None,
+    olfactive_family: Optional[str] = None,
+    island_id: Optional[str] = None,
+    band: Optional[str] = Query(None, alias="price_band"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Ranked full-text search over products with facet counts"""
+    return await search_index.search(
+        q,
+        mood=mood,
+        olfactive_family=olfactive_family,
+        island_id=island_id,
+        band=band,
+        limit=limit,
+        offset=offset
+    )
+
 # ========== QUIZ ROUTES ==========
 
 @api_router.get("/quiz", response_model=Quiz)
 async def get_quiz():
-    quiz = await db.quiz.find_one({"id": "quiz_config"}, {"_id": 0})
+    quiz = await catalog.quiz()
     if not quiz:
         # Return default quiz if not exists
         return Quiz(questions=[])
-    if isinstance(quiz.get("updated_at"), str):
-        quiz["updated_at"] = datetime.fromisoformat(quiz["updated_at"])
     return Quiz(**quiz)
 
 @api_router.post("/quiz/submit")
 async def submit_quiz(submission: QuizSubmission):
-    quiz = await db.quiz.find_one({"id": "quiz_config"}, {"_id": 0})
-    if not quiz:
+    compiled_quiz = await catalog.compiled_quiz()
+    if not compiled_quiz:
         raise HTTPException(status_code=404, detail="Quiz not configured")
     
-    # Calculate scores for each island
-    island_scores = {}
-    for answer_text in submission.answers:
-        for question in quiz["questions"]:
-            for option in question["options"]:
-                if option["text"] == answer_text:
-                    for island_id, weight in option["island_weights"].items():
-                        island_scores[island_id] = island_scores.get(island_id, 0) + weight
-    
     # Get recommended island
-    if not island_scores:
+    recommended_island_id = compiled_quiz.recommend(submission.answers)
+    if recommended_island_id is None:
         raise HTTPException(status_code=400, detail="No valid answers")
     
-    recommended_island_id = max(island_scores, key=island_scores.get)
-    island = await db.islands.find_one({"id": recommended_island_id}, {"_id": 0})
+    island = await catalog.island(recommended_island_id)
     
     if not island:
         raise HTTPException(status_code=404, detail="Recommended island not found")
     
-    # Get products for this island
-    products = await db.products.find({"island_id": recommended_island_id}, {"_id": 0}).to_list(10)
+    # Get products for this island, most representative of its profile first
+    products = await catalog.products(include_hidden=True, island_id=recommended_island_id)
+    products = (await similarity_index.rank(products))[:10]
     
     return {
         "island": island,
@@ -520,40 +935,86 @@ async def update_quiz(
     current_user: User = Depends(get_current_user)
 ):
     quiz_dict = quiz_data.model_dump()
-    quiz_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    quiz_dict["updated_at"] = datetime.now(timezone.utc)
     
     await db.quiz.update_one(
         {"id": "quiz_config"},
         {"$set": quiz_dict},
         upsert=True
     )
+    await catalog.refresh("quiz")
     return quiz_data
 
 # ========== ORDERS ROUTES ==========
 
 @api_router.post("/orders", response_model=Order)
 async def create_order(order_data: OrderCreate):
-    # Calculate total
-    total = sum(item.price * item.quantity for item in order_data.items)
+    quantities = merge_lines(order_data.items)
+    products = await load_products(db, list(quantities))
+    
+    try:
+        # Price on the server, then reserve stock for every line or none
+        items, total = price_lines(quantities, products)
+        reserved = await reserve_stock(db, quantities, products)
+    except OrderRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
     order = Order(
-        **order_data.model_dump(),
+        **order_data.model_dump(exclude={"items"}),
+        items=items,
         total=total
     )
     
     order_dict = order.model_dump()
-    order_dict["created_at"] = order_dict["created_at"].isoformat()
     
-    await db.orders.insert_one(order_dict)
+    try:
+        await db.orders.insert_one(order_dict)
+    except BaseException:
+        await asyncio.shield(release_stock(db, reserved))
+        raise
+    finally:
+        await catalog.refresh_volatile(list(reserved))
+    
+    try:
+        await record_order(db, order_dict, {pid: p.get("island_id") for pid, p in products.items()})
+    except Exception as e:
+        # The order stands; `python order_analytics.py rebuild` repairs the rollups
+        logger.error(f"Order analytics update failed for {order.id}: {e}")
     return order
 
 @api_router.get("/admin/orders", response_model=List[Order])
-async def get_orders(current_user: User = Depends(get_current_user)):
-    orders = await db.orders.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for order in orders:
-        if isinstance(order.get("created_at"), str):
-            order["created_at"] = datetime.fromisoformat(order["created_at"])
-    return orders
+async def get_orders(
+    response: Response,
+    sort: str = "-created_at",
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    order_status: Optional[str] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Orders page; created_from (inclusive) / created_to (exclusive) filter by date"""
+    field, direction = parse_sort(sort, ORDER_SORT_FIELDS)
+    query = order_filter(order_status, created_from, created_to)
+    orders, next_cursor = await mongo_page(db.orders, query, field, direction, after, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response(orders, response)
+
+@api_router.get("/admin/orders/export")
+async def export_orders_route(
+    export_format: str = Query("csv", alias="format"),
+    order_status: Optional[str] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Every matching order, oldest first, streamed as CSV (one row per line item) or NDJSON"""
+    check_format(export_format)
+    cursor = db.orders.find(order_filter(order_status, created_from, created_to), {"_id": 0}) \
+        .sort([("created_at", 1), ("id", 1)]) \
+        .batch_size(EXPORT_BATCH_SIZE)
+    return export_orders(cursor, export_format)
 
 @api_router.put("/admin/orders/{order_id}", response_model=Order)
 async def update_order_status(
@@ -561,27 +1022,62 @@ async def update_order_status(
     status_update: OrderStatusUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.orders.update_one(
+    previous = await db.orders.find_one_and_update(
         {"id": order_id},
-        {"$set": {"status": status_update.status}}
+        {"$set": {"status": status_update.status}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if not previous:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    order = await db.orders.find_one({"id": order_id}, {"_id": 0})
-    if isinstance(order.get("created_at"), str):
-        order["created_at"] = datetime.fromisoformat(order["created_at"])
-    return Order(**order)
+    try:
+        await record_status_change(db, previous, previous["status"], status_update.status)
+    except Exception as e:
+        logger.error(f"Order analytics update failed for {order_id}: {e}")
+    return Order(**{**previous, "status": status_update.status})
+
+@api_router.get("/admin/analytics")
+async def get_analytics(
+    response: Response,
+    days: int = Query(30, ge=1, le=366),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    granularity: str = "day",
+    current_user: User = Depends(get_current_user)
+):
+    """Sales dashboard from the daily rollups; defaults to the last `days` days"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"granularity must be one of: {', '.join(GRANULARITIES)}"
+        )
+    start, end = default_range(days)
+    if created_from:
+        start = as_utc(created_from)
+    if created_to:
+        end = as_utc(created_to)
+    
+    products = await catalog.products(include_hidden=True)
+    islands = await catalog.islands(include_hidden=True)
+    analytics = await summarize(
+        db, start, end, granularity,
+        product_names={p["id"]: p["name"] for p in products},
+        island_names={i["id"]: i["name"] for i in islands}
+    )
+    analytics["catalog"] = {"products": len(products), "islands": len(islands)}
+    return json_response(analytics, response)
 
 # ========== THEME ROUTES ==========
 
 @api_router.get("/theme", response_model=ThemeSettings)
-async def get_theme():
-    theme = await db.theme.find_one({"id": "theme_settings"}, {"_id": 0})
+async def get_theme(request: Request, response: Response):
+    not_modified = await catalog_not_modified(request, response, "theme")
+    if not_modified:
+        return not_modified
+    theme = await catalog.theme()
     if not theme:
         return ThemeSettings()
-    if isinstance(theme.get("updated_at"), str):
-        theme["updated_at"] = datetime.fromisoformat(theme["updated_at"])
     return ThemeSettings(**theme)
 
 @api_router.put("/admin/theme", response_model=ThemeSettings)
@@ -590,28 +1086,27 @@ async def update_theme(
     current_user: User = Depends(get_current_user)
 ):
     update_dict = {k: v for k, v in theme_update.model_dump().items() if v is not None}
-    update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
     
-    await db.theme.update_one(
+    theme = await db.theme.find_one_and_update(
         {"id": "theme_settings"},
         {"$set": update_dict},
-        upsert=True
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
-    
-    theme = await db.theme.find_one({"id": "theme_settings"}, {"_id": 0})
-    if isinstance(theme.get("updated_at"), str):
-        theme["updated_at"] = datetime.fromisoformat(theme["updated_at"])
+    catalog.store_theme(theme)
     return ThemeSettings(**theme)
 
 # ========== FAQ ROUTES ==========
 
 @api_router.get("/faq", response_model=List[FAQItem])
-async def get_faqs():
-    faqs = await db.faq.find({}, {"_id": 0}).sort("order", 1).to_list(100)
-    for faq in faqs:
-        if isinstance(faq.get("created_at"), str):
-            faq["created_at"] = datetime.fromisoformat(faq["created_at"])
-    return faqs
+async def get_faqs(request: Request, response: Response):
+    not_modified = await catalog_not_modified(request, response, "faq")
+    if not_modified:
+        return not_modified
+    faqs = await catalog.faqs()
+    return faqs[:100]
 
 @api_router.post("/admin/faq", response_model=FAQItem)
 async def create_faq(
@@ -620,9 +1115,9 @@ async def create_faq(
 ):
     faq = FAQItem(**faq_data.model_dump())
     faq_dict = faq.model_dump()
-    faq_dict["created_at"] = faq_dict["created_at"].isoformat()
     
     await db.faq.insert_one(faq_dict)
+    await catalog.refresh("faq")
     return faq
 
 @api_router.put("/admin/faq/{faq_id}", response_model=FAQItem)
@@ -632,14 +1127,19 @@ async def update_faq(
     current_user: User = Depends(get_current_user)
 ):
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
+    if not update_dict:
+        faq = await db.faq.find_one({"id": faq_id}, {"_id": 0})
+    else:
+        faq = await db.faq.find_one_and_update(
+            {"id": faq_id},
+            {"$set": update_dict},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    if not faq:
+        raise HTTPException(status_code=404, detail="FAQ not found")
     if update_dict:
-        result = await db.faq.update_one({"id": faq_id}, {"$set": update_dict})
-        if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="FAQ not found")
-    
-    faq = await db.faq.find_one({"id": faq_id}, {"_id": 0})
-    if isinstance(faq.get("created_at"), str):
-        faq["created_at"] = datetime.fromisoformat(faq["created_at"])
+        catalog.store_faq(faq)
     return FAQItem(**faq)
 
 @api_router.delete("/admin/faq/{faq_id}")
@@ -650,13 +1150,14 @@ async def delete_faq(
     result = await db.faq.delete_one({"id": faq_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="FAQ not found")
+    await catalog.refresh("faq")
     return {"message": "FAQ deleted"}
 
 # Include router
 app.include_router(api_router)
 
 # Mount static files for uploads
-app.mount("/api/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.mount("/api/uploads", UploadStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 app.add_middleware(
     CORSMiddleware,
@@ -664,7 +1165,17 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        slow_ms=PROFILE_SLOW_MS,
+        call_tree=PROFILE_CALL_TREE
+    )
 
 logging.basicConfig(
     level=logging.INFO,
@@ -672,6 +1183,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def warm_catalog_cache():
+    try:
+        await catalog.load_all()
+        await search_index.sync()
+        await similarity_index.sync()
+    except Exception as e:
+        # Reads fall back to loading on first use
+        logger.error(f"Catalog cache warm-up failed: {e}")
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    app.state.event_loop_monitor = asyncio.create_task(monitor_event_loop(EVENT_LOOP_SAMPLE_INTERVAL))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.event_loop_monitor.cancel()
     client.close()
+    password_hasher.shutdown()
+    image_pipeline.shutdown()
@@ -0,0 +1,210 @@
+"""
+Aroma-note similarity between products, for "you may also like" and for
+ranking quiz results.
+
+Each product becomes a sparse feature vector, L2-normalised so a dot product
+is a cosine similarity. The features are:
+
+    note:<name>       weighted by tier (top < heart < base, base lingers longest)
+    family:<family>   plus one feature per word, so "Woody Aromatic" ~ "Woody Spicy"
+    mood:<mood>       one feature per comma-separated mood
+
+Vectors are stored as per-feature postings over product slots. Scoring one
+product against the whole catalog touches only the postings of the features
+it has, accumulated with NumPy. The top-k comes from ``argpartition``.
+Neighbour lists are memoised until the catalog changes.
+
+Like the search index, this follows the catalog cache versions and
+re-vectorises only the products that changed.
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+NOTE_TIER_WEIGHTS = {"top": 1.0, "heart": 1.5, "base": 2.0}
+FAMILY_WEIGHT = 2.0
+FAMILY_WORD_WEIGHT = 1.0
+MOOD_WEIGHT = 1.0
+
+
+def _normalise(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def product_vector(product: dict) -> Dict[str, float]:
+    """Sparse, unit-length feature vector for a product"""
+    features: Dict[str, float] = {}
+    notes = product.get("aroma_notes") or {}
+    for tier, weight in NOTE_TIER_WEIGHTS.items():
+        for note in notes.get(tier) or []:
+            key = f"note:{_normalise(note)}"
+            # A note listed in two tiers counts at its strongest tier
+            features[key] = max(features.get(key, 0.0), weight)
+
+    family = _normalise(product.get("olfactive_family") or "")
+    if family:
+        features[f"family:{family}"] = FAMILY_WEIGHT
+        for word in family.split():
+            features[f"family_word:{word}"] = FAMILY_WORD_WEIGHT
+
+    for mood in (product.get("mood") or "").split(","):
+        mood = _normalise(mood)
+        if mood:
+            features[f"mood:{mood}"] = MOOD_WEIGHT
+
+    norm = math.sqrt(sum(weight * weight for weight in features.values()))
+    if not norm:
+        return {}
+    return {key: weight / norm for key, weight in features.items()}
+
+
+class SimilarityIndex:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._seen_version = None
+        self._products: Dict[str, dict] = {}
+        self._vectors: Dict[str, Dict[str, float]] = {}
+        self._slots: Dict[str, int] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        # feature -> {slot: weight}, materialised to arrays on first use
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._posting_arrays: Dict[str, tuple] = {}
+        self._eligible: Optional[np.ndarray] = None
+        self._neighbours: Dict[str, List[tuple]] = {}
+
+    # ----- maintenance -----
+
+    def _remove(self, product_id: str):
+        slot = self._slots.pop(product_id, None)
+        if slot is None:
+            return
+        for feature in self._vectors.pop(product_id, {}):
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.pop(slot, None)
+                self._posting_arrays.pop(feature, None)
+                if not postings:
+                    del self._postings[feature]
+        self._slot_ids[slot] = None
+        self._free_slots.append(slot)
+        self._products.pop(product_id, None)
+
+    def _add(self, product: dict):
+        product_id = product["id"]
+        self._remove(product_id)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_ids[slot] = product_id
+        else:
+            slot = len(self._slot_ids)
+            self._slot_ids.append(product_id)
+        self._slots[product_id] = slot
+
+        vector = product_vector(product)
+        for feature, weight in vector.items():
+            self._postings.setdefault(feature, {})[slot] = weight
+            self._posting_arrays.pop(feature, None)
+        self._vectors[product_id] = vector
+        self._products[product_id] = product
+
+    async def sync(self):
+        """Bring the vectors in line with the catalog cache, re-vectorising only changes"""
+        products = await self.catalog.snapshot("products")
+        version = self.catalog.structure_version("products")
+        if version == self._seen_version:
+            return
+
+        for product_id in list(self._products):
+            if product_id not in products:
+                self._remove(product_id)
+        for product_id, product in products.items():
+            current = self._products.get(product_id)
+            if current is None or (current is not product and current != product):
+                self._add(product)
+            else:
+                self._products[product_id] = product
+
+        self._eligible = None
+        self._neighbours = {}
+        self._seen_version = version
+
+    # ----- querying -----
+
+    def _posting_array(self, feature: str) -> tuple:
+        arrays = self._posting_arrays.get(feature)
+        if arrays is None:
+            postings = self._postings[feature]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+            self._posting_arrays[feature] = arrays
+        return arrays
+
+    def _eligible_mask(self) -> np.ndarray:
+        """Slots holding a visible product"""
+        if self._eligible is None:
+            self._eligible = np.array([
+                product_id is not None and self._products[product_id].get("visible") is not False
+                for product_id in self._slot_ids
+            ], dtype=bool)
+        return self._eligible
+
+    def _scores(self, vector: Dict[str, float]) -> np.ndarray:
+        """Cosine similarity of ``vector`` against every slot"""
+        scores = np.zeros(len(self._slot_ids))
+        for feature, weight in vector.items():
+            if feature in self._postings:
+                slots, weights = self._posting_array(feature)
+                scores[slots] += weights * weight
+        return scores
+
+    def _top(self, scores: np.ndarray, k: int, exclude: Optional[int] = None) -> List[tuple]:
+        scores = np.where(self._eligible_mask(), scores, -np.inf)
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = sorted(candidates, key=lambda slot: (-scores[slot], self._slot_ids[slot]))
+        return [(self._slot_ids[slot], float(scores[slot])) for slot in candidates]
+
+    async def similar(self, product_id: str, k: int = 6) -> Optional[List[dict]]:
+        """Most similar visible products, or None if the product is unknown"""
+        await self.sync()
+        if product_id not in self._products:
+            return None
+        neighbours = self._neighbours.get(product_id)
+        if neighbours is None or len(neighbours) < k:
+            neighbours = self._top(
+                self._scores(self._vectors[product_id]), k, exclude=self._slots[product_id]
+            )
+            self._neighbours[product_id] = neighbours
+        return [
+            {**self._products[neighbour_id], "similarity": round(score, 4)}
+            for neighbour_id, score in neighbours[:k]
+        ]
+
+    async def rank(self, products: List[dict]) -> List[dict]:
+        """Order ``products`` by closeness to their profile vector (most typical first)
+
+        The profile is the centroid of the products' vectors, e.g. an island's
+        aroma profile when ranking quiz results for that island.
+        """
+        await self.sync()
+        vectors = [self._vectors.get(product["id"]) or product_vector(product) for product in products]
+        centroid: Dict[str, float] = {}
+        for vector in vectors:
+            for feature, weight in vector.items():
+                centroid[feature] = centroid.get(feature, 0.0) + weight
+
+        def closeness(vector):
+            return sum(weight * centroid.get(feature, 0.0) for feature, weight in vector.items())
+
+        ranked = sorted(
+            zip(products, vectors),
+            key=lambda pair: (-closeness(pair[1]), pair[0].get("name", ""))
+        )
+        return [product for product, _ in ranked]
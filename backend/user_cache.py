@@ -0,0 +1,43 @@
+"""
+Small TTL + LRU cache of user records for request authentication.
+
+Access tokens carry the principal (id, username, email, token version), so an
+authenticated request only needs the stored record to confirm the token has
+not been revoked. Records are kept for a short TTL, which bounds how long a
+revoked token stays usable on other worker processes.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class UserCache:
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 60):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[dict]:
+        entry = self._entries.get(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, record = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[username]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(username)
+        self.hits += 1
+        return record
+
+    def put(self, username: str, record: dict):
+        self._entries[username] = (time.monotonic() + self.ttl_seconds, record)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        self._entries.pop(username, None)
@@ -1,9 +1,15 @@
 import React, { useState } from 'react';
+import { renditionSrcSet } from '../lib/uploads';
 
-const OptimizedImage = ({ src, alt, className, loading = 'lazy', ...props }) => {
+const OptimizedImage = ({ src, alt, className, loading = 'lazy', sizes = '100vw', ...props }) => {
   const [isLoaded, setIsLoaded] = useState(false);
   const [hasError, setHasError] = useState(false);
 
+  // Pipeline uploads have width renditions in WebP and JPEG next to the primary URL,
+  // up to the source width (see renditionSrcSet)
+  const webpSrcSet = renditionSrcSet(src, 'webp');
+  const jpegSrcSet = renditionSrcSet(src, 'jpg');
+
   return (
     <div className={`relative ${className}`}>
       {!isLoaded && !hasError && (
@@ -16,15 +22,20 @@ const OptimizedImage = ({ src, alt, className, loading = 'lazy', ...props }) =>
           Failed to load
         </div>
       ) : (
-        <img
-          src={src}
-          alt={alt}
-          className={`${className} ${!isLoaded ? 'opacity-0' : 'opacity-100'} transition-opacity duration-300`}
-          loading={loading}
-          onLoad={() => setIsLoaded(true)}
-          onError={() => setHasError(true)}
-          {...props}
-        />
+        <picture>
+          {webpSrcSet && <source type="image/webp" srcSet={webpSrcSet} sizes={sizes} />}
+          <img
+            src={src}
+            srcSet={jpegSrcSet || undefined}
+            sizes={jpegSrcSet ? sizes : undefined}
+            alt={alt}
+            className={`${className} ${!isLoaded ? 'opacity-0' : 'opacity-100'} transition-opacity duration-300`}
+            loading={loading}
+            onLoad={() => setIsLoaded(true)}
+            onError={() => setHasError(true)}
+            {...props}
+          />
+        </picture>
       )}
     </div>
   );
@@ -0,0 +1,44 @@
+import axios from 'axios';
+
+const POLL_INTERVAL_MS = 500;
+const POLL_TIMEOUT_MS = 60000;
+
+export const RENDITION_WIDTHS = [400, 800, 1200, 1600];
+
+// Matches primary URLs produced by the upload pipeline: .../api/uploads/r/<name>/1200.jpg.
+// Images narrower than the largest width end in ?w=<widest rendition>, e.g. 1200.jpg?w=1400
+const RENDITION_PATTERN = /^(.*\/api\/uploads\/r\/[^/]+)\/\d+\.jpg(?:\?w=(\d+))?$/;
+
+export async function uploadImage(API, file) {
+  const formData = new FormData();
+  formData.append('file', file);
+
+  const response = await axios.post(`${API}/admin/upload`, formData, {
+    headers: { 'Content-Type': 'multipart/form-data' }
+  });
+  const jobId = response.data.job_id;
+  let job = response.data;
+
+  // Renditions are produced in the background; wait until they exist
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (job.status === 'processing') {
+    if (Date.now() > deadline) {
+      throw new Error('Image processing timed out');
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    job = (await axios.get(`${API}/admin/upload/${jobId}`)).data;
+  }
+  if (job.status !== 'done') {
+    throw new Error(job.error || 'Image processing failed');
+  }
+  return `${process.env.REACT_APP_BACKEND_URL}${job.url}`;
+}
+
+export function renditionSrcSet(src, format) {
+  const match = src && src.match(RENDITION_PATTERN);
+  if (!match) return null;
+  // Renditions are named after their real width and never upscaled
+  const widest = match[2] ? Number(match[2]) : RENDITION_WIDTHS[RENDITION_WIDTHS.length - 1];
+  const widths = RENDITION_WIDTHS.filter((width) => width < widest).concat(widest);
+  return widths.map((width) => `${match[1]}/${width}.${format} ${width}w`).join(', ');
+}
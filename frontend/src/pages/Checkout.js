@@ -51,7 +51,9 @@ const Checkout = () => {
       navigate('/');
     } catch (error) {
       console.error('Failed to place order:', error);
-      toast.error('Failed to place order. Please try again.');
+      // Stock and availability problems come back with a specific message
+      const detail = error.response?.status < 500 && error.response?.data?.detail;
+      toast.error(typeof detail === 'string' ? detail : 'Failed to place order. Please try again.');
     } finally {
       setLoading(false);
     }
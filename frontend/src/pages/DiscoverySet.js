@@ -18,13 +18,12 @@ const DiscoverySet = () => {
 
   const fetchData = async () => {
     try {
-      const [productsRes, islandsRes] = await Promise.all([
-        axios.get(`${API}/products`),
-        axios.get(`${API}/islands`)
+      const [productRes, islandsRes] = await Promise.all([
+        axios.get(`${API}/products/prod_discovery_set`),
+        axios.get(`${API}/islands`, { params: { fields: 'id,name,slug,mood,story' } })
       ]);
 
-      const discoveryProduct = productsRes.data.find(p => p.id === 'prod_discovery_set');
-      setDiscoverySet(discoveryProduct);
+      setDiscoverySet(productRes.data);
       setIslands(islandsRes.data);
     } catch (error) {
       console.error('Failed to fetch data:', error);
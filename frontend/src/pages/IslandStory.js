@@ -18,7 +18,7 @@ const IslandStory = () => {
 
   const fetchData = async () => {
     try {
-      const islandsRes = await axios.get(`${API}/islands`);
+      const islandsRes = await axios.get(`${API}/islands`, { params: { fields: 'full' } });
       const foundIsland = islandsRes.data.find(i => i.slug === slug);
       
       if (!foundIsland) {
@@ -15,7 +15,9 @@ const IslandsCollection = () => {
 
   const fetchIslands = async () => {
     try {
-      const response = await axios.get(`${API}/islands`);
+      const response = await axios.get(`${API}/islands`, {
+        params: { fields: 'id,name,slug,mood,image_url,story' }
+      });
       setIslands(response.data);
     } catch (error) {
       console.error('Failed to fetch islands:', error);
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { useParams, useNavigate } from 'react-router-dom';
+import { useParams, useNavigate, Link } from 'react-router-dom';
 import { Star, Plus, Minus } from 'lucide-react';
 import axios from 'axios';
 import { useCart } from '../contexts/CartContext';
@@ -9,6 +9,11 @@ const ProductDetail = () => {
   const { id } = useParams();
   const navigate = useNavigate();
   const [product, setProduct] = useState(null);
+  const [similarProducts, setSimilarProducts] = useState([]);
+  const [reviews, setReviews] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
+  const [reviewForm, setReviewForm] = useState({ reviewer_name: '', rating: 5, comment: '' });
+  const [submittingReview, setSubmittingReview] = useState(false);
   const [quantity, setQuantity] = useState(1);
   const [loading, setLoading] = useState(true);
   const { addToCart } = useCart();
@@ -17,6 +22,8 @@ const ProductDetail = () => {
 
   useEffect(() => {
     fetchProduct();
+    fetchSimilarProducts();
+    fetchReviews();
   }, [id]);
 
   const fetchProduct = async () => {
@@ -31,6 +38,48 @@ const ProductDetail = () => {
     }
   };
 
+  const fetchSimilarProducts = async () => {
+    try {
+      const response = await axios.get(`${API}/products/${id}/similar`, { params: { limit: 4 } });
+      setSimilarProducts(response.data);
+    } catch (error) {
+      console.error('Failed to fetch similar products:', error);
+      setSimilarProducts([]);
+    }
+  };
+
+  const fetchReviews = async (after = null) => {
+    try {
+      const params = after ? { after } : {};
+      const response = await axios.get(`${API}/products/${id}/reviews`, { params });
+      setReviews(prev => (after ? [...prev, ...response.data] : response.data));
+      setReviewsCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Failed to fetch reviews:', error);
+    }
+  };
+
+  const handleSubmitReview = async (e) => {
+    e.preventDefault();
+    setSubmittingReview(true);
+    try {
+      await axios.post(`${API}/products/${id}/reviews`, {
+        ...reviewForm,
+        rating: Number(reviewForm.rating)
+      });
+      toast.success('Thank you for your review!');
+      setReviewForm({ reviewer_name: '', rating: 5, comment: '' });
+      await Promise.all([fetchProduct(), fetchReviews()]);
+    } catch (error) {
+      console.error('Failed to submit review:', error);
+      toast.error(error.response?.status === 429
+        ? 'You have posted several reviews recently, please try again later'
+        : 'Failed to submit review');
+    } finally {
+      setSubmittingReview(false);
+    }
+  };
+
   const handleAddToCart = () => {
     addToCart(product, quantity);
     toast.success(`${product.name} added to cart!`);
@@ -46,9 +95,8 @@ const ProductDetail = () => {
 
   if (!product) return null;
 
-  const averageRating = product.reviews.length > 0
-    ? product.reviews.reduce((sum, r) => sum + r.rating, 0) / product.reviews.length
-    : 0;
+  const reviewCount = product.rating_summary?.count || 0;
+  const averageRating = product.rating_summary?.mean || 0;
 
   return (
     <div className="min-h-screen bg-[#F2EFE9]" data-testid="product-detail-page">
@@ -219,7 +267,7 @@ const ProductDetail = () => {
             >
               Reviews
             </h2>
-            {product.reviews.length === 0 ? (
+            {reviewCount === 0 ? (
               <p className="text-[#5C6B70]" data-testid="no-reviews">No reviews yet. Be the first to review this product!</p>
             ) : (
               <>
@@ -235,12 +283,12 @@ const ProductDetail = () => {
                     ))}
                   </div>
                   <span className="text-sm text-[#5C6B70]" data-testid="review-count">
-                    {averageRating.toFixed(1)} ({product.reviews.length} reviews)
+                    {averageRating.toFixed(1)} ({reviewCount} reviews)
                   </span>
                 </div>
                 <div className="space-y-6">
-                  {product.reviews.map((review, index) => (
-                    <div key={index} className="border-b border-[#D1CCC0] pb-6 last:border-0" data-testid={`review-${index}`}>
+                  {reviews.map((review, index) => (
+                    <div key={review.id} className="border-b border-[#D1CCC0] pb-6 last:border-0" data-testid={`review-${index}`}>
                       <div className="flex items-center gap-2 mb-2">
                         <div className="flex">
                           {[...Array(5)].map((_, i) => (
@@ -258,9 +306,110 @@ const ProductDetail = () => {
                     </div>
                   ))}
                 </div>
+                {reviewsCursor && (
+                  <button
+                    onClick={() => fetchReviews(reviewsCursor)}
+                    className="mt-6 text-sm uppercase tracking-widest text-[#A27B5C] hover:text-[#2C3639] transition-colors"
+                    data-testid="load-more-reviews"
+                  >
+                    Load more reviews
+                  </button>
+                )}
               </>
             )}
+
+            {/* Write a Review */}
+            <form onSubmit={handleSubmitReview} className="mt-8 space-y-4" data-testid="review-form">
+              <h3 className="text-sm uppercase tracking-widest text-[#A27B5C] font-medium">Write a Review</h3>
+              <input
+                type="text"
+                required
+                maxLength={100}
+                value={reviewForm.reviewer_name}
+                onChange={(e) => setReviewForm({ ...reviewForm, reviewer_name: e.target.value })}
+                placeholder="Your name"
+                className="w-full px-4 py-3 border border-[#D1CCC0] bg-white focus:outline-none focus:border-[#A27B5C]"
+                data-testid="review-name-input"
+              />
+              <div className="flex gap-1" data-testid="review-rating-input">
+                {[1, 2, 3, 4, 5].map((value) => (
+                  <button
+                    key={value}
+                    type="button"
+                    onClick={() => setReviewForm({ ...reviewForm, rating: value })}
+                    aria-label={`${value} stars`}
+                  >
+                    <Star
+                      size={20}
+                      fill={value <= reviewForm.rating ? '#A27B5C' : 'none'}
+                      stroke={value <= reviewForm.rating ? '#A27B5C' : '#D1CCC0'}
+                    />
+                  </button>
+                ))}
+              </div>
+              <textarea
+                required
+                maxLength={2000}
+                rows={3}
+                value={reviewForm.comment}
+                onChange={(e) => setReviewForm({ ...reviewForm, comment: e.target.value })}
+                placeholder="Share your experience"
+                className="w-full px-4 py-3 border border-[#D1CCC0] bg-white focus:outline-none focus:border-[#A27B5C]"
+                data-testid="review-comment-input"
+              />
+              <button
+                type="submit"
+                disabled={submittingReview}
+                className="btn-primary disabled:opacity-50"
+                data-testid="submit-review-button"
+              >
+                {submittingReview ? 'Submitting...' : 'Submit Review'}
+              </button>
+            </form>
           </div>
+
+          {/* You May Also Like */}
+          {similarProducts.length > 0 && (
+            <div data-testid="similar-products">
+              <h2
+                className="text-2xl mb-6"
+                style={{ fontFamily: 'Cormorant Garamond, serif' }}
+              >
+                You May Also Like
+              </h2>
+              <div className="grid grid-cols-2 gap-6">
+                {similarProducts.map((similar) => (
+                  <Link
+                    key={similar.id}
+                    to={`/products/${similar.id}`}
+                    className="group"
+                    data-testid={`similar-product-${similar.id}`}
+                  >
+                    <div className="relative overflow-hidden aspect-square mb-3 image-zoom bg-white">
+                      <img
+                        src={similar.image_url}
+                        alt={similar.name}
+                        className="w-full h-full object-cover"
+                        loading="lazy"
+                      />
+                    </div>
+                    <p className="text-xs uppercase tracking-widest text-[#A27B5C] mb-1">
+                      {similar.island_name}
+                    </p>
+                    <h3
+                      className="text-lg group-hover:text-[#A27B5C] transition-colors"
+                      style={{ fontFamily: 'Cormorant Garamond, serif' }}
+                    >
+                      {similar.name}
+                    </h3>
+                    <p className="text-sm font-medium text-[#2C3639]">
+                      Rp {similar.price.toLocaleString('id-ID')}
+                    </p>
+                  </Link>
+                ))}
+              </div>
+            </div>
+          )}
         </div>
       </div>
     </div>
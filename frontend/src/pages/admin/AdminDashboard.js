@@ -1,16 +1,22 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
-import { Package, MapPin, ShoppingCart, TrendingUp } from 'lucide-react';
+import { Package, MapPin, ShoppingCart, TrendingUp, Wallet, Receipt } from 'lucide-react';
 import AdminLayout from '../../components/AdminLayout';
 
+const formatRupiah = (value) => `Rp ${Math.round(value).toLocaleString('id-ID')}`;
+
 const AdminDashboard = () => {
   const [stats, setStats] = useState({
     totalProducts: 0,
-    totalIslands: 6,
+    totalIslands: 0,
     totalOrders: 0,
-    pendingOrders: 0
+    pendingOrders: 0,
+    revenue: 0,
+    averageOrderValue: 0
   });
+  const [revenueSeries, setRevenueSeries] = useState([]);
+  const [topProducts, setTopProducts] = useState([]);
   const [recentOrders, setRecentOrders] = useState([]);
   const [loading, setLoading] = useState(true);
 
@@ -22,19 +28,25 @@ const AdminDashboard = () => {
 
   const fetchDashboardData = async () => {
     try {
-      const [productsRes, ordersRes] = await Promise.all([
-        axios.get(`${API}/products`),
-        axios.get(`${API}/admin/orders`)
+      // Totals come from the daily rollups, so this stays cheap however many orders exist
+      const [analyticsRes, ordersRes] = await Promise.all([
+        axios.get(`${API}/admin/analytics`, { params: { days: 30 } }),
+        axios.get(`${API}/admin/orders`, { params: { limit: 5 } })
       ]);
+      const analytics = analyticsRes.data;
 
       setStats({
-        totalProducts: productsRes.data.length,
-        totalIslands: 6,
-        totalOrders: ordersRes.data.length,
-        pendingOrders: ordersRes.data.filter(o => o.status === 'pending').length
+        totalProducts: analytics.catalog.products,
+        totalIslands: analytics.catalog.islands,
+        totalOrders: analytics.lifetime.orders,
+        pendingOrders: analytics.lifetime.status.pending || 0,
+        revenue: analytics.totals.revenue,
+        averageOrderValue: analytics.totals.average_order_value
       });
+      setRevenueSeries(analytics.revenue_series);
+      setTopProducts(analytics.top_products.slice(0, 5));
 
-      setRecentOrders(ordersRes.data.slice(0, 5));
+      setRecentOrders(ordersRes.data);
     } catch (error) {
       console.error('Failed to fetch dashboard data:', error);
     } finally {
@@ -57,7 +69,10 @@ const AdminDashboard = () => {
     { label: 'Islands', value: stats.totalIslands, icon: MapPin, color: 'bg-[#5F7161]' },
     { label: 'Total Orders', value: stats.totalOrders, icon: ShoppingCart, color: 'bg-[#3F4E4F]' },
     { label: 'Pending Orders', value: stats.pendingOrders, icon: TrendingUp, color: 'bg-[#D4AF37]' },
+    { label: 'Revenue (30 days)', value: formatRupiah(stats.revenue), icon: Wallet, color: 'bg-[#A27B5C]' },
+    { label: 'Avg Order Value', value: formatRupiah(stats.averageOrderValue), icon: Receipt, color: 'bg-[#5F7161]' },
   ];
+  const peakRevenue = Math.max(1, ...revenueSeries.map((point) => point.revenue));
 
   return (
     <AdminLayout>
@@ -70,7 +85,7 @@ const AdminDashboard = () => {
         </h1>
 
         {/* Stats Grid */}
-        <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mb-12">
+        <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6 mb-12">
           {statCards.map((stat) => {
             const Icon = stat.icon;
             return (
@@ -91,6 +106,53 @@ const AdminDashboard = () => {
           })}
         </div>
 
+        {/* Last 30 days */}
+        <div className="grid grid-cols-1 lg:grid-cols-3 gap-6 mb-12">
+          <div className="bg-white p-6 rounded-lg shadow-sm lg:col-span-2" data-testid="revenue-chart">
+            <h2
+              className="text-2xl mb-6"
+              style={{ fontFamily: 'Cormorant Garamond, serif' }}
+            >
+              Daily Revenue
+            </h2>
+            {revenueSeries.length === 0 ? (
+              <p className="text-[#5C6B70]">No orders in the last 30 days.</p>
+            ) : (
+              <div className="flex items-end gap-1 h-40">
+                {revenueSeries.map((point) => (
+                  <div
+                    key={point.period}
+                    className="flex-1 bg-[#A27B5C] rounded-t"
+                    style={{ height: `${(point.revenue / peakRevenue) * 100}%` }}
+                    title={`${point.period}: ${formatRupiah(point.revenue)} (${point.orders} orders)`}
+                  />
+                ))}
+              </div>
+            )}
+          </div>
+
+          <div className="bg-white p-6 rounded-lg shadow-sm" data-testid="top-products">
+            <h2
+              className="text-2xl mb-6"
+              style={{ fontFamily: 'Cormorant Garamond, serif' }}
+            >
+              Top Products
+            </h2>
+            {topProducts.length === 0 ? (
+              <p className="text-[#5C6B70]">No sales yet.</p>
+            ) : (
+              <ul className="space-y-3">
+                {topProducts.map((product) => (
+                  <li key={product.id} className="flex justify-between text-sm">
+                    <span>{product.name}</span>
+                    <span className="text-[#5C6B70]">{product.units} sold</span>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
+        </div>
+
         {/* Recent Orders */}
         <div className="bg-white p-6 rounded-lg shadow-sm">
           <div className="flex items-center justify-between mb-6">
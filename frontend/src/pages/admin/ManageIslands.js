@@ -3,6 +3,7 @@ import axios from 'axios';
 import { Edit, Save, X } from 'lucide-react';
 import { toast } from 'sonner';
 import AdminLayout from '../../components/AdminLayout';
+import { uploadImage } from '../../lib/uploads';
 
 const ManageIslands = () => {
   const [islands, setIslands] = useState([]);
@@ -55,14 +56,8 @@ const ManageIslands = () => {
     const file = e.target.files[0];
     if (!file) return;
 
-    const formData = new FormData();
-    formData.append('file', file);
-
     try {
-      const response = await axios.post(`${API}/admin/upload`, formData, {
-        headers: { 'Content-Type': 'multipart/form-data' }
-      });
-      const fullUrl = `${process.env.REACT_APP_BACKEND_URL}${response.data.url}`;
+      const fullUrl = await uploadImage(API, file);
       setEditData({ ...editData, image_url: fullUrl });
       toast.success('Image uploaded successfully');
     } catch (error) {
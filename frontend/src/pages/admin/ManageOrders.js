@@ -3,20 +3,40 @@ import axios from 'axios';
 import { toast } from 'sonner';
 import AdminLayout from '../../components/AdminLayout';
 
+const PAGE_SIZE = 100;
+
+// The date inputs are inclusive days; the API's created_to is exclusive
+const nextDay = (date) => {
+  const day = new Date(`${date}T00:00:00Z`);
+  day.setUTCDate(day.getUTCDate() + 1);
+  return day.toISOString().slice(0, 10);
+};
+
 const ManageOrders = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [dateRange, setDateRange] = useState({ from: '', to: '' });
 
   const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
   useEffect(() => {
     fetchOrders();
-  }, []);
+  }, [dateRange]);
+
+  const rangeParams = () => ({
+    ...(dateRange.from && { created_from: dateRange.from }),
+    ...(dateRange.to && { created_to: nextDay(dateRange.to) })
+  });
 
   const fetchOrders = async () => {
     try {
-      const response = await axios.get(`${API}/admin/orders`);
+      const response = await axios.get(`${API}/admin/orders`, {
+        params: { limit: PAGE_SIZE, ...rangeParams() }
+      });
       setOrders(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch orders:', error);
       toast.error('Failed to load orders');
@@ -25,6 +45,22 @@ const ManageOrders = () => {
     }
   };
 
+  const fetchMoreOrders = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/admin/orders`, {
+        params: { limit: PAGE_SIZE, after: nextCursor, ...rangeParams() }
+      });
+      setOrders((prev) => [...prev, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Failed to fetch orders:', error);
+      toast.error('Failed to load orders');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleStatusUpdate = async (orderId, newStatus) => {
     try {
       await axios.put(`${API}/admin/orders/${orderId}`, { status: newStatus });
@@ -67,6 +103,37 @@ const ManageOrders = () => {
           Manage Orders
         </h1>
 
+        <div className="flex flex-wrap items-end gap-4 mb-6" data-testid="order-date-filter">
+          <label className="text-sm">
+            <span className="block uppercase tracking-widest text-[#5C6B70] mb-1">From</span>
+            <input
+              type="date"
+              value={dateRange.from}
+              onChange={(e) => setDateRange({ ...dateRange, from: e.target.value })}
+              className="px-3 py-2 border border-[#D1CCC0] rounded bg-white"
+              data-testid="order-date-from"
+            />
+          </label>
+          <label className="text-sm">
+            <span className="block uppercase tracking-widest text-[#5C6B70] mb-1">To</span>
+            <input
+              type="date"
+              value={dateRange.to}
+              onChange={(e) => setDateRange({ ...dateRange, to: e.target.value })}
+              className="px-3 py-2 border border-[#D1CCC0] rounded bg-white"
+              data-testid="order-date-to"
+            />
+          </label>
+          {(dateRange.from || dateRange.to) && (
+            <button
+              onClick={() => setDateRange({ from: '', to: '' })}
+              className="text-sm uppercase tracking-widest text-[#A27B5C] hover:text-[#2C3639] pb-2"
+            >
+              Clear
+            </button>
+          )}
+        </div>
+
         {orders.length === 0 ? (
           <div className="bg-white p-12 rounded-lg text-center" data-testid="no-orders">
             <p className="text-[#5C6B70] text-lg">No orders yet.</p>
@@ -132,6 +199,18 @@ const ManageOrders = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="p-4 text-center">
+                <button
+                  onClick={fetchMoreOrders}
+                  disabled={loadingMore}
+                  className="text-sm uppercase tracking-widest text-[#A27B5C] hover:underline disabled:opacity-50"
+                  data-testid="load-more-orders"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -1,8 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
-import { Plus, Edit, Trash2, X } from 'lucide-react';
+import { Plus, Edit, Trash2, X, Upload } from 'lucide-react';
 import { toast } from 'sonner';
 import AdminLayout from '../../components/AdminLayout';
+import { uploadImage } from '../../lib/uploads';
 
 const ManageProducts = () => {
   const [products, setProducts] = useState([]);
@@ -29,6 +30,7 @@ const ManageProducts = () => {
 
   const [formData, setFormData] = useState(emptyProduct);
   const [uploadingImage, setUploadingImage] = useState(false);
+  const [importing, setImporting] = useState(false);
 
   useEffect(() => {
     fetchData();
@@ -67,14 +69,9 @@ const ManageProducts = () => {
     if (!file) return;
 
     setUploadingImage(true);
-    const formDataUpload = new FormData();
-    formDataUpload.append('file', file);
 
     try {
-      const response = await axios.post(`${API}/admin/upload`, formDataUpload, {
-        headers: { 'Content-Type': 'multipart/form-data' }
-      });
-      const fullUrl = `${process.env.REACT_APP_BACKEND_URL}${response.data.url}`;
+      const fullUrl = await uploadImage(API, file);
       setFormData({ ...formData, image_url: fullUrl });
       toast.success('Image uploaded successfully');
     } catch (error) {
@@ -85,6 +82,32 @@ const ManageProducts = () => {
     }
   };
 
+  const handleImport = async (e) => {
+    const file = e.target.files[0];
+    e.target.value = '';
+    if (!file) return;
+
+    setImporting(true);
+    try {
+      const body = new FormData();
+      body.append('file', file);
+      const { data } = await axios.post(`${API}/admin/products/import`, body);
+      const summary = `${data.inserted} added, ${data.updated} updated`;
+      if (data.failed) {
+        console.warn('Rejected import rows:', data.errors);
+        toast.warning(`${summary}, ${data.failed} rows rejected (see console)`);
+      } else {
+        toast.success(`Import finished: ${summary}`);
+      }
+      fetchData();
+    } catch (error) {
+      console.error('Failed to import products:', error);
+      toast.error(error.response?.data?.detail || 'Failed to import products');
+    } finally {
+      setImporting(false);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     
@@ -163,14 +186,29 @@ const ManageProducts = () => {
           >
             Manage Products
           </h1>
-          <button
-            onClick={() => openModal()}
-            className="flex items-center gap-2 px-6 py-3 bg-[#A27B5C] text-white rounded-full hover:bg-[#8B6A4D] transition-colors"
-            data-testid="add-product-button"
-          >
-            <Plus size={20} />
-            Add Product
-          </button>
+          <div className="flex items-center gap-3">
+            <label
+              className={`flex items-center gap-2 px-6 py-3 border border-[#A27B5C] text-[#A27B5C] rounded-full hover:bg-[#EAE7E2] transition-colors ${importing ? 'opacity-50 pointer-events-none' : 'cursor-pointer'}`}
+              data-testid="import-products-button"
+            >
+              <Upload size={20} />
+              {importing ? 'Importing...' : 'Import CSV'}
+              <input
+                type="file"
+                accept=".csv,.ndjson,.jsonl,.json"
+                onChange={handleImport}
+                className="hidden"
+              />
+            </label>
+            <button
+              onClick={() => openModal()}
+              className="flex items-center gap-2 px-6 py-3 bg-[#A27B5C] text-white rounded-full hover:bg-[#8B6A4D] transition-colors"
+              data-testid="add-product-button"
+            >
+              <Plus size={20} />
+              Add Product
+            </button>
+          </div>
         </div>
 
         <div className="bg-white rounded-lg shadow-sm overflow-hidden">
@@ -3,6 +3,7 @@ import axios from 'axios';
 import { Save, Upload, X } from 'lucide-react';
 import { toast } from 'sonner';
 import AdminLayout from '../../components/AdminLayout';
+import { uploadImage } from '../../lib/uploads';
 
 const ThemeSettings = () => {
   const [theme, setTheme] = useState({
@@ -36,14 +37,9 @@ const ThemeSettings = () => {
     if (!file) return;
 
     setUploading(true);
-    const formData = new FormData();
-    formData.append('file', file);
 
     try {
-      const response = await axios.post(`${API}/admin/upload`, formData, {
-        headers: { 'Content-Type': 'multipart/form-data' }
-      });
-      const fullUrl = `${process.env.REACT_APP_BACKEND_URL}${response.data.url}`;
+      const fullUrl = await uploadImage(API, file);
       setTheme({ ...theme, hero_images: [...theme.hero_images, fullUrl] });
       toast.success('Image uploaded successfully');
     } catch (error) {
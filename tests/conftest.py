@@ -0,0 +1,87 @@
+"""
+Shared fixtures: the FastAPI app running against an in-memory MongoDB.
+
+``mongomock-motor`` stands in for Motor, so the suite needs no database
+server. The client is patched in before ``server`` is imported, and every
+test starts from a freshly seeded catalog with empty in-process caches.
+"""
+import copy
+import os
+import sys
+from pathlib import Path
+
+import motor.motor_asyncio
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "archipelago_test")
+
+motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+import seed_data  # noqa: E402
+import server  # noqa: E402
+from catalog_cache import CatalogCache  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from rate_limit import RateLimiter  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from similarity import SimilarityIndex  # noqa: E402
+from user_cache import UserCache  # noqa: E402
+
+ORDER_CUSTOMER = {
+    "customer_name": "Test Customer",
+    "customer_email": "customer@example.com",
+    "customer_phone": "08123456789",
+    "customer_address": "Jl. Test 1, Jakarta",
+}
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    with TestClient(server.app) as client:
+        yield client
+
+
+async def _reset_database():
+    db = server.db
+    for name in await db.list_collection_names():
+        await db.drop_collection(name)
+    await ensure_indexes(db)
+    await db.islands.insert_many(copy.deepcopy(seed_data.islands_data))
+    await db.products.insert_many(copy.deepcopy(seed_data.products_data))
+    await db.quiz.insert_one(copy.deepcopy(seed_data.quiz_data))
+    await db.faq.insert_many(copy.deepcopy(seed_data.faq_data))
+    await db.theme.insert_one(copy.deepcopy(seed_data.theme_data))
+
+
+@pytest.fixture
+def client(app_client):
+    """Test client over a freshly seeded database and cold caches"""
+    app_client.portal.call(_reset_database)
+    server.catalog = CatalogCache(server.db, ttl_seconds=server.CATALOG_CACHE_TTL)
+    server.search_index = SearchIndex(server.catalog)
+    server.similarity_index = SimilarityIndex(server.catalog)
+    server.user_cache = UserCache(maxsize=server.USER_CACHE_SIZE, ttl_seconds=server.USER_CACHE_TTL)
+    server.review_limiter = RateLimiter(server.REVIEW_RATE_LIMIT, server.REVIEW_RATE_WINDOW)
+    return app_client
+
+
+@pytest.fixture
+def db(client):
+    """Run a coroutine function against the test database: ``db(lambda d: d.x.find_one())``"""
+    return lambda query: client.portal.call(query, server.db)
+
+
+@pytest.fixture
+def admin_headers(client):
+    credentials = {"username": "admin", "email": "admin@example.com", "password": "admin-password"}
+    client.post("/api/auth/register", json=credentials)
+    response = client.post("/api/auth/login", json={
+        "username": credentials["username"],
+        "password": credentials["password"],
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,119 @@
+import io
+import json
+
+import server
+from bulk_products import read_rows
+
+NEW_PRODUCT = {
+    "name": "Flores Eau de Parfum",
+    "island_id": "island_alor",
+    "price": 700000,
+    "stock": 12,
+    "description": "Sea breeze and tamarillo",
+    "aroma_notes": {"top": ["Sea Salt"], "heart": ["Frangipani"], "base": ["Driftwood"]},
+    "olfactive_family": "Aquatic Floral",
+    "mood": "Free",
+    "image_url": "/img/flores.jpg",
+}
+
+
+def upload(client, headers, name, body, **params):
+    query = "&".join(f"{key}={value}" for key, value in params.items())
+    return client.post(f"/api/admin/products/import?{query}", files={"file": (name, body)}, headers=headers)
+
+
+def test_csv_export_round_trips_through_import(client, admin_headers, db):
+    exported = client.get("/api/admin/products/export", headers=admin_headers).text
+    lines = exported.splitlines()
+    lines[1] = lines[1].replace(",850000,", ",900000,", 1)
+
+    report = upload(client, admin_headers, "products.csv", "\n".join(lines).encode()).json()
+
+    assert report["rows"] == 7
+    assert report["updated"] == 7
+    assert report["inserted"] == 0
+    assert report["failed"] == 0
+    first_id = lines[1].split(",", 1)[0]
+    assert db(lambda d: d.products.find_one({"id": first_id}))["price"] == 900000
+
+
+def test_import_creates_products_and_reports_bad_rows(client, admin_headers):
+    rows = [
+        NEW_PRODUCT,
+        {**NEW_PRODUCT, "price": "free"},
+        {**NEW_PRODUCT, "island_id": "island_unknown"},
+    ]
+    body = ("\n".join(json.dumps(row) for row in rows) + "\nnot json\n").encode()
+
+    report = upload(client, admin_headers, "products.ndjson", body).json()
+
+    assert (report["rows"], report["valid"], report["inserted"], report["failed"]) == (4, 1, 1, 3)
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    names = [product["name"] for product in client.get("/api/products?limit=100").json()]
+    assert "Flores Eau de Parfum" in names
+    hits = client.get("/api/search?q=tamarillo").json()["results"]
+    assert [hit["name"] for hit in hits] == ["Flores Eau de Parfum"]
+
+
+def test_dry_run_writes_nothing(client, admin_headers, db):
+    body = json.dumps([NEW_PRODUCT]).encode()
+
+    report = upload(client, admin_headers, "products.json", body, dry_run="true").json()
+
+    assert report["valid"] == 1
+    assert report["inserted"] == 0
+    assert db(lambda d: d.products.count_documents({})) == 7
+
+
+def test_import_spans_several_batches(client, admin_headers, db, monkeypatch):
+    monkeypatch.setattr("bulk_products.BULK_BATCH_SIZE", 3)
+    rows = [{**NEW_PRODUCT, "id": f"prod_gen_{i}", "name": f"Generated {i}"} for i in range(10)]
+    client.get("/api/products")  # warm the catalog cache, so the import has to refresh it
+
+    report = upload(client, admin_headers, "products.json", json.dumps(rows).encode()).json()
+
+    assert report["inserted"] == 10
+    assert db(lambda d: d.products.count_documents({"id": {"$regex": "^prod_gen_"}})) == 10
+    assert len([p for p in client.get("/api/products?limit=100").json() if p["id"].startswith("prod_gen_")]) == 10
+
+
+def test_unknown_format_is_rejected(client, admin_headers):
+    assert upload(client, admin_headers, "products.txt", b"").status_code == 400
+
+
+def test_read_rows_flags_unreadable_records():
+    rows = list(read_rows(io.BytesIO(b'{"a": 1}\n[1]\n{oops\n'), "ndjson"))
+
+    assert rows[0] == {"a": 1}
+    assert all(isinstance(row, ValueError) for row in rows[1:])
+
+
+def test_bulk_update_patches_and_reports_missing_ids(client, admin_headers, db):
+    response = client.post("/api/admin/products/bulk-update", headers=admin_headers, json={"updates": [
+        {"id": "prod_buton_50ml", "price": 800000, "visible": False},
+        {"id": "prod_sumba_50ml", "stock": 7},
+        {"id": "prod_missing", "stock": 1},
+    ]})
+
+    assert response.json() == {
+        "rows": 3, "matched": 2, "modified": 2, "not_found": 1, "missing_ids": ["prod_missing"],
+    }
+    buton = db(lambda d: d.products.find_one({"id": "prod_buton_50ml"}))
+    assert (buton["price"], buton["visible"]) == (800000, False)
+    assert "prod_buton_50ml" not in [p["id"] for p in client.get("/api/products").json()]
+    assert client.get("/api/products/prod_sumba_50ml").json()["stock"] == 7
+
+
+def test_bulk_update_validates_values(client, admin_headers):
+    response = client.post("/api/admin/products/bulk-update", headers=admin_headers,
+                           json={"updates": [{"id": "prod_buton_50ml", "price": -1}]})
+
+    assert response.status_code == 422
+
+
+def test_bulk_update_is_capped(client, admin_headers):
+    updates = [{"id": f"prod_{i}", "stock": 1} for i in range(server.MAX_BULK_UPDATES + 1)]
+
+    response = client.post("/api/admin/products/bulk-update", headers=admin_headers, json={"updates": updates})
+
+    assert response.status_code == 422
@@ -0,0 +1,104 @@
+import catalog_cache
+import server
+from revisions import with_revision
+
+
+def product(client, product_id):
+    return client.get(f"/api/products/{product_id}").json()
+
+
+def test_admin_product_writes_are_visible_immediately(client, admin_headers):
+    assert product(client, "prod_buton_50ml")["price"] == 850000
+
+    client.put("/api/admin/products/prod_buton_50ml", json={"price": 870000}, headers=admin_headers)
+    assert product(client, "prod_buton_50ml")["price"] == 870000
+
+    client.put("/api/admin/products/prod_buton_50ml", json={"visible": False}, headers=admin_headers)
+    assert "prod_buton_50ml" not in [p["id"] for p in client.get("/api/products").json()]
+
+    client.delete("/api/admin/products/prod_buton_50ml", headers=admin_headers)
+    assert client.get("/api/products/prod_buton_50ml").status_code == 404
+
+
+def test_admin_island_and_content_writes_are_visible_immediately(client, admin_headers):
+    for path in ("/api/islands", "/api/theme", "/api/faq"):
+        client.get(path)
+
+    client.put("/api/admin/islands/island_buton", json={"name": "Buton Raya"}, headers=admin_headers)
+    client.put("/api/admin/theme", json={"accent_color": "#000000"}, headers=admin_headers)
+    created = client.post("/api/admin/faq", json={"question": "Q?", "answer": "A.", "order": 99},
+                          headers=admin_headers).json()
+
+    assert client.get("/api/islands/island_buton").json()["name"] == "Buton Raya"
+    assert client.get("/api/theme").json()["accent_color"] == "#000000"
+    assert client.get("/api/faq").json()[-1]["id"] == created["id"]
+
+    client.delete(f"/api/admin/faq/{created['id']}", headers=admin_headers)
+    assert created["id"] not in [faq["id"] for faq in client.get("/api/faq").json()]
+
+
+def rename_out_of_band(db, product_id, name):
+    db(lambda d: d.products.update_one({"id": product_id}, with_revision({"$set": {"name": name}})))
+
+
+def expire_and_refresh(client, monkeypatch):
+    """Let the TTL lapse, serve one request and wait for the refresh it started"""
+    monkeypatch.setattr(server.catalog, "ttl_seconds", 1e-9)
+    stale = client.get("/api/products")
+    client.portal.call(server.catalog.wait_for_refreshes)
+    monkeypatch.setattr(server.catalog, "ttl_seconds", 3600)
+    return stale
+
+
+def test_out_of_band_writes_are_refreshed_in_the_background(client, db, monkeypatch):
+    assert product(client, "prod_buton_50ml")["name"] == "Buton Eau de Parfum"
+    rename_out_of_band(db, "prod_buton_50ml", "Renamed")
+
+    assert product(client, "prod_buton_50ml")["name"] == "Buton Eau de Parfum"
+
+    stale = expire_and_refresh(client, monkeypatch)
+    assert "Renamed" not in [p["name"] for p in stale.json()]
+    assert product(client, "prod_buton_50ml")["name"] == "Renamed"
+
+
+def test_unchanged_section_is_not_refetched(client, monkeypatch):
+    client.get("/api/products")
+
+    async def fetch(name):
+        raise AssertionError(f"{name} was refetched")
+    monkeypatch.setattr(server.catalog, "_fetch", fetch)
+
+    expire_and_refresh(client, monkeypatch)
+    assert client.get("/api/products").status_code == 200
+
+
+def test_refresh_prepares_only_changed_documents(client, db, monkeypatch):
+    client.get("/api/products")
+    rename_out_of_band(db, "prod_sumba_50ml", "Sumba Extrait")
+    prepared = []
+    monkeypatch.setattr(catalog_cache, "prepare_product",
+                        lambda doc: prepared.append(doc["id"]) or server.prepare_product(doc))
+
+    expire_and_refresh(client, monkeypatch)
+
+    assert prepared == ["prod_sumba_50ml"]
+    assert product(client, "prod_sumba_50ml")["name"] == "Sumba Extrait"
+
+
+def test_failed_refresh_keeps_serving_the_cache(client, monkeypatch):
+    client.get("/api/products")
+
+    async def marker(name):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(server.catalog, "_marker", marker)
+
+    expire_and_refresh(client, monkeypatch)
+    assert product(client, "prod_buton_50ml")["name"] == "Buton Eau de Parfum"
+
+
+def test_zero_ttl_never_expires(client, db, monkeypatch):
+    monkeypatch.setattr(server.catalog, "ttl_seconds", 0)
+    client.get("/api/products")
+    db(lambda d: d.products.delete_one({"id": "prod_buton_50ml"}))
+
+    assert product(client, "prod_buton_50ml")["id"] == "prod_buton_50ml"
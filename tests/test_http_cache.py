@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import server
+from catalog_cache import CatalogCache
+from revisions import with_revision
+from tests.conftest import ORDER_CUSTOMER
+
+
+def revalidate(client, path, etag):
+    return client.get(path, headers={"If-None-Match": etag})
+
+
+def test_matching_etag_gets_an_empty_304(client):
+    first = client.get("/api/products")
+    etag = first.headers["ETag"]
+
+    second = revalidate(client, "/api/products", etag)
+
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+    assert "Cache-Control" in second.headers
+
+
+def test_etag_depends_on_the_query(client):
+    assert client.get("/api/products").headers["ETag"] != client.get("/api/products?limit=2").headers["ETag"]
+    assert revalidate(client, "/api/products?limit=2", client.get("/api/products").headers["ETag"]).status_code == 200
+
+
+def test_weak_and_listed_etags_match(client):
+    etag = client.get("/api/islands").headers["ETag"]
+
+    assert revalidate(client, "/api/islands", f'"other", {etag}').status_code == 304
+    assert revalidate(client, "/api/islands", etag.removeprefix("W/")).status_code == 304
+    assert revalidate(client, "/api/islands", "*").status_code == 304
+
+
+def test_admin_edit_invalidates_listing_and_item(client, admin_headers):
+    listing = client.get("/api/products").headers["ETag"]
+    item = client.get("/api/products/prod_buton_50ml").headers["ETag"]
+
+    client.put("/api/admin/products/prod_buton_50ml", json={"price": 870000}, headers=admin_headers)
+
+    assert revalidate(client, "/api/products", listing).status_code == 200
+    response = revalidate(client, "/api/products/prod_buton_50ml", item)
+    assert response.status_code == 200
+    assert response.json()["price"] == 870000
+
+
+def test_stock_change_is_scoped_to_the_ordered_product(client):
+    listing = client.get("/api/products").headers["ETag"]
+    ordered = client.get("/api/products/prod_buton_50ml").headers["ETag"]
+    other = client.get("/api/products/prod_sumba_50ml").headers["ETag"]
+
+    client.post("/api/orders", json={**ORDER_CUSTOMER, "items": [{"product_id": "prod_buton_50ml", "quantity": 1}]})
+
+    # Listings show stock, so they change; untouched products keep their validator
+    assert revalidate(client, "/api/products", listing).status_code == 200
+    assert revalidate(client, "/api/products/prod_buton_50ml", ordered).status_code == 200
+    assert revalidate(client, "/api/products/prod_sumba_50ml", other).status_code == 304
+
+
+def test_ttl_reload_only_changes_etags_of_changed_documents(client, db, monkeypatch):
+    listing = client.get("/api/products").headers["ETag"]
+    item = client.get("/api/products/prod_buton_50ml").headers["ETag"]
+    monkeypatch.setattr(server.catalog, "ttl_seconds", 1e-9)
+
+    assert revalidate(client, "/api/products", listing).status_code == 304
+
+    db(lambda d: d.products.update_one({"id": "prod_sumba_50ml"}, with_revision({"$set": {"name": "Sumba Extrait"}})))
+    # The first request after the write still gets the cached copy and starts a refresh
+    revalidate(client, "/api/products", listing)
+    client.portal.call(server.catalog.wait_for_refreshes)
+    monkeypatch.setattr(server.catalog, "ttl_seconds", 3600)
+
+    assert revalidate(client, "/api/products", listing).status_code == 200
+    assert revalidate(client, "/api/products/prod_buton_50ml", item).status_code == 304
+    assert client.get("/api/products/prod_sumba_50ml").json()["name"] == "Sumba Extrait"
+
+
+def test_validators_agree_between_processes(client, admin_headers, db):
+    client.put("/api/admin/products/prod_buton_50ml", json={"price": 870000}, headers=admin_headers)
+    other_worker = CatalogCache(server.db)
+
+    assert client.portal.call(other_worker.validator, "products") == \
+        client.portal.call(server.catalog.validator, "products")
+    assert client.portal.call(other_worker.document_validator, "products", "prod_buton_50ml") == \
+        client.portal.call(server.catalog.document_validator, "products", "prod_buton_50ml")
+    assert client.portal.call(other_worker.validator, "theme") == client.portal.call(server.catalog.validator, "theme")
+
+
+def test_if_modified_since_without_etag(client, admin_headers):
+    last_modified = client.get("/api/products/prod_buton_50ml").headers["Last-Modified"]
+
+    response = client.get("/api/products/prod_buton_50ml", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    assert response.headers["Last-Modified"] == last_modified
+
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+    client.put("/api/admin/products/prod_buton_50ml", json={"price": 870000}, headers=admin_headers)
+    assert client.get("/api/products/prod_buton_50ml", headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+def test_if_none_match_takes_precedence(client):
+    response = client.get("/api/products")
+
+    stale = client.get("/api/products", headers={
+        "If-None-Match": '"other"', "If-Modified-Since": response.headers["Last-Modified"],
+    })
+    assert stale.status_code == 200
+
+
+def test_deletion_moves_the_listing_last_modified(client, admin_headers):
+    before = client.get("/api/products").headers["Last-Modified"]
+    seed_time = datetime.strptime(before, "%a, %d %b %Y %H:%M:%S GMT").replace(tzinfo=timezone.utc)
+
+    client.delete("/api/admin/products/prod_sumba_50ml", headers=admin_headers)
+
+    assert client.get("/api/products", headers={"If-Modified-Since": before}).status_code == 200
+    fresh = CatalogCache(server.db)
+    assert client.portal.call(fresh.last_modified, "products") > seed_time
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from image_pipeline import render_renditions, rendition_widths
+
+
+@pytest.mark.parametrize("source_width, expected", [
+    (2000, [400, 800, 1200, 1600]),
+    (1600, [400, 800, 1200, 1600]),
+    (1400, [400, 800, 1200, 1400]),
+    (1200, [400, 800, 1200]),
+    (300, [300]),
+])
+def test_widths_never_exceed_the_source(source_width, expected):
+    assert rendition_widths(source_width) == expected
+
+
+def render(tmp_path, width, height=100):
+    source = tmp_path / "source.png"
+    Image.new("RGB", (width, height), (200, 120, 80)).save(source)
+    return render_renditions(str(source), str(tmp_path / "out"))
+
+
+def test_files_are_named_after_their_real_width(tmp_path):
+    result = render(tmp_path, 1000)
+
+    jpegs = [r for r in result["renditions"] if r["format"] == "jpg"]
+    assert [r["width"] for r in jpegs] == [400, 800, 1000]
+    for rendition in jpegs:
+        with Image.open(Path(tmp_path, "out", rendition["filename"])) as img:
+            assert img.width == rendition["width"]
+    assert (result["primary_filename"], result["primary_query"]) == ("1000.jpg", "?w=1000")
+
+
+def test_full_set_keeps_the_plain_primary_url(tmp_path):
+    result = render(tmp_path, 1800)
+
+    assert (result["primary_filename"], result["primary_query"]) == ("1200.jpg", "")
+
+
+def test_partial_set_above_the_primary_width(tmp_path):
+    result = render(tmp_path, 1400)
+
+    assert (result["primary_filename"], result["primary_query"]) == ("1200.jpg", "?w=1400")
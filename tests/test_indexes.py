@@ -0,0 +1,15 @@
+from pymongo import ASCENDING
+
+import server
+from indexes import ensure_indexes
+
+
+def test_obsolete_indexes_are_dropped(client, db):
+    db(lambda d: d.products.create_index([("mood", ASCENDING), ("visible", ASCENDING),
+                                          ("created_at", ASCENDING), ("id", ASCENDING)]))
+
+    client.portal.call(ensure_indexes, server.db)
+
+    names = db(lambda d: d.products.index_information())
+    assert "mood_1_visible_1_created_at_1_id_1" not in names
+    assert {"id_1", "price_1_id_1", "created_at_1_id_1", "name_1_id_1"} <= set(names)
@@ -0,0 +1,47 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from media_store import MediaStore
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def store(client, tmp_path):
+    return MediaStore(server.db, tmp_path)
+
+
+def stored_image(store, db, digest, age_seconds):
+    directory = store.rendition_root / digest
+    directory.mkdir(parents=True)
+    (directory / "800.jpg").write_bytes(b"jpeg")
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    db(lambda d: d.media.insert_one({"id": digest, "created_at": created_at}))
+    return store.url_for(digest, "800.jpg")
+
+
+def test_gc_removes_only_old_unreferenced_images(client, admin_headers, db, store):
+    used = stored_image(store, db, "used", 2 * DAY)
+    stored_image(store, db, "orphan", 2 * DAY)
+    stored_image(store, db, "fresh", 60)
+    client.put("/api/admin/products/prod_buton_50ml", json={"image_url": used}, headers=admin_headers)
+
+    report = client.portal.call(lambda: store.collect_garbage(delete=True))
+
+    assert [item["name"] for item in report["unreferenced"]] == ["orphan"]
+    assert sorted(path.name for path in store.rendition_root.iterdir()) == ["fresh", "used"]
+    assert db(lambda d: d.media.find_one({"id": "orphan"})) is None
+
+
+def test_grace_period_follows_created_at_not_file_time(client, db, store):
+    stored_image(store, db, "recent", 60)
+    old = time.time() - 2 * DAY
+    os.utime(store.rendition_root / "recent", (old, old))
+
+    report = client.portal.call(lambda: store.collect_garbage(delete=False))
+
+    assert report["unreferenced"] == []
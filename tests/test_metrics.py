@@ -0,0 +1,13 @@
+import server
+
+
+def test_metrics_require_a_token(client, admin_headers, monkeypatch):
+    assert client.get("/api/metrics").status_code == 403
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/api/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+    monkeypatch.setattr(server, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
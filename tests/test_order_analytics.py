@@ -0,0 +1,76 @@
+import pytest
+
+from order_analytics import record_status_change, rebuild
+from tests.conftest import ORDER_CUSTOMER
+
+
+def place_order(client, product_id="prod_buton_50ml", quantity=1):
+    return client.post("/api/orders", json={
+        **ORDER_CUSTOMER, "items": [{"product_id": product_id, "quantity": quantity}],
+    }).json()
+
+
+def analytics(client, headers):
+    return client.get("/api/admin/analytics", headers=headers).json()
+
+
+def set_status(client, headers, order_id, status):
+    return client.put(f"/api/admin/orders/{order_id}", json={"status": status}, headers=headers)
+
+
+def test_orders_are_folded_into_the_rollups(client, admin_headers):
+    place_order(client, quantity=2)
+    place_order(client, "prod_komodo_50ml")
+
+    result = analytics(client, admin_headers)
+
+    assert result["totals"]["orders"] == 2
+    assert result["totals"]["units"] == 3
+    assert result["totals"]["revenue"] == 2 * 850000 + 950000
+    assert result["status_funnel"] == {"pending": 2}
+    assert [row["id"] for row in result["top_products"]] == ["prod_buton_50ml", "prod_komodo_50ml"]
+
+
+def test_status_change_moves_the_order_between_buckets(client, admin_headers):
+    order = place_order(client)
+
+    assert set_status(client, admin_headers, order["id"], "cancelled").status_code == 200
+    result = analytics(client, admin_headers)
+    assert result["status_funnel"] == {"pending": 0, "cancelled": 1}
+    assert result["totals"]["net_revenue"] == 0
+
+    set_status(client, admin_headers, order["id"], "shipped")
+    result = analytics(client, admin_headers)
+    assert result["status_funnel"] == {"pending": 0, "cancelled": 0, "shipped": 1}
+    assert result["totals"]["net_revenue"] == 850000
+    assert result["lifetime"]["status"]["shipped"] == 1
+
+
+def test_rebuild_matches_the_incremental_rollups(client, admin_headers, db):
+    orders = [place_order(client), place_order(client, "prod_sumba_50ml", 2)]
+    set_status(client, admin_headers, orders[0]["id"], "delivered")
+    incremental = analytics(client, admin_headers)
+
+    db(rebuild)
+
+    rebuilt = analytics(client, admin_headers)
+    assert rebuilt["totals"] == incremental["totals"]
+    assert {k: v for k, v in rebuilt["status_funnel"].items() if v} == \
+        {k: v for k, v in incremental["status_funnel"].items() if v}
+
+
+@pytest.mark.parametrize("status", ["refunded", "pending.orders", "$inc"])
+def test_unknown_status_is_rejected_before_any_write(client, admin_headers, db, status):
+    order = place_order(client)
+
+    assert set_status(client, admin_headers, order["id"], status).status_code == 422
+
+    assert db(lambda d: d.orders.find_one({"id": order["id"]}))["status"] == "pending"
+    assert analytics(client, admin_headers)["status_funnel"] == {"pending": 1}
+
+
+def test_record_status_change_refuses_unknown_statuses(db):
+    order = {"created_at": None, "total": 1}
+
+    with pytest.raises(ValueError):
+        db(lambda d: record_status_change(d, order, "pending", "orders"))
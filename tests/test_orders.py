@@ -0,0 +1,146 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from order_placement import OrderRejected, load_products, reserve_stock
+from tests.conftest import ORDER_CUSTOMER
+
+
+def place_order(client, *lines):
+    items = [{"product_id": product_id, "quantity": quantity} for product_id, quantity in lines]
+    return client.post("/api/orders", json={**ORDER_CUSTOMER, "items": items})
+
+
+def stock_of(db, product_id):
+    return db(lambda d: d.products.find_one({"id": product_id}))["stock"]
+
+
+def test_order_is_priced_on_the_server(client, db):
+    response = client.post("/api/orders", json={**ORDER_CUSTOMER, "items": [
+        {"product_id": "prod_buton_50ml", "quantity": 2, "product_name": "Cheap", "price": 1},
+    ]})
+
+    assert response.status_code == 200
+    order = response.json()
+    assert order["total"] == 2 * 850000
+    assert order["items"] == [
+        {"product_id": "prod_buton_50ml", "product_name": "Buton Eau de Parfum", "quantity": 2, "price": 850000}
+    ]
+    assert stock_of(db, "prod_buton_50ml") == 48
+
+
+def test_repeated_lines_are_merged(client, db):
+    response = place_order(client, ("prod_alor_50ml", 1), ("prod_alor_50ml", 2))
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["quantity"] == 3
+    assert stock_of(db, "prod_alor_50ml") == 47
+
+
+def test_oversell_is_rejected_and_stock_unchanged(client, db):
+    response = place_order(client, ("prod_komodo_50ml", 41))
+
+    assert response.status_code == 409
+    assert stock_of(db, "prod_komodo_50ml") == 40
+    assert db(lambda d: d.orders.count_documents({})) == 0
+
+
+def test_failed_line_rolls_back_the_other_lines(client, db):
+    response = place_order(client, ("prod_buton_50ml", 5), ("prod_sumba_50ml", 3), ("prod_papua_50ml", 41))
+
+    assert response.status_code == 409
+    assert stock_of(db, "prod_buton_50ml") == 50
+    assert stock_of(db, "prod_sumba_50ml") == 50
+    assert stock_of(db, "prod_papua_50ml") == 40
+    assert db(lambda d: d.orders.count_documents({})) == 0
+
+
+def test_unknown_product_is_rejected(client, db):
+    response = place_order(client, ("prod_buton_50ml", 1), ("prod_missing", 1))
+
+    assert response.status_code == 400
+    assert stock_of(db, "prod_buton_50ml") == 50
+
+
+def test_checkout_updates_cached_stock_without_restructuring(client):
+    before = client.get("/api/products/prod_buton_50ml").json()["stock"]
+    structure = server.catalog.structure_version("products")
+
+    assert place_order(client, ("prod_buton_50ml", 2)).status_code == 200
+
+    assert client.get("/api/products/prod_buton_50ml").json()["stock"] == before - 2
+    assert server.catalog.structure_version("products") == structure
+
+
+class FlakyProducts:
+    """``db.products`` whose ``update_one`` misbehaves from call ``fail_on`` on"""
+
+    def __init__(self, collection, fail_on, behaviour):
+        self.collection = collection
+        self.fail_on = fail_on
+        self.behaviour = behaviour
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def update_one(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            await self.behaviour()
+        return await self.collection.update_one(*args, **kwargs)
+
+
+def test_concurrent_reservations_never_oversell(client, db):
+    db(lambda d: d.products.update_one({"id": "prod_buton_50ml"}, {"$set": {"stock": 5}}))
+    products = db(lambda d: load_products(d, ["prod_buton_50ml"]))
+
+    async def buy_all(d):
+        return await asyncio.gather(
+            *(reserve_stock(d, {"prod_buton_50ml": 1}, products) for _ in range(12)),
+            return_exceptions=True
+        )
+
+    results = db(buy_all)
+
+    assert sum(1 for result in results if result == {"prod_buton_50ml": 1}) == 5
+    assert all(isinstance(result, OrderRejected) for result in results if not isinstance(result, dict))
+    assert stock_of(db, "prod_buton_50ml") == 0
+
+
+def test_database_error_mid_order_releases_earlier_lines(client, db):
+    async def fail():
+        raise ConnectionError("network timeout")
+
+    quantities = {"prod_buton_50ml": 2, "prod_sumba_50ml": 3, "prod_alor_50ml": 1}
+    products = db(lambda d: load_products(d, list(quantities)))
+    flaky = SimpleNamespace(products=FlakyProducts(server.db.products, 2, fail))
+
+    with pytest.raises(ConnectionError):
+        client.portal.call(reserve_stock, flaky, quantities, products)
+
+    assert [stock_of(db, product_id) for product_id in quantities] == [50, 50, 50]
+
+
+def test_cancelled_order_releases_earlier_lines(client, db):
+    async def hang():
+        await asyncio.Event().wait()
+
+    quantities = {"prod_buton_50ml": 2, "prod_sumba_50ml": 3}
+    products = db(lambda d: load_products(d, list(quantities)))
+    flaky = SimpleNamespace(products=FlakyProducts(server.db.products, 2, hang))
+
+    async def cancel_mid_order():
+        task = asyncio.ensure_future(reserve_stock(flaky, quantities, products))
+        while flaky.products.calls < 2:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    client.portal.call(cancel_mid_order)
+
+    assert stock_of(db, "prod_buton_50ml") == 50
+    assert stock_of(db, "prod_sumba_50ml") == 50
@@ -0,0 +1,45 @@
+from quiz_engine import CompiledQuiz
+from seed_data import quiz_data
+
+
+def test_highest_weighted_island_wins():
+    quiz = CompiledQuiz.compile(quiz_data)
+
+    assert quiz.recommend(["Hutan mistis dan tenang", "Kayu dan tanah (woody, earthy)"]) == "island_buton"
+    assert quiz.recommend(["Pantai dan laut dalam", "Bunga dan segar (floral, fresh)"]) == "island_alor"
+
+
+def test_only_islands_touched_by_an_answer_are_candidates():
+    quiz = CompiledQuiz.compile({"questions": [
+        {"id": "q1", "options": [
+            {"text": "a", "island_weights": {"island_x": 0}},
+            {"text": "b", "island_weights": {"island_y": 5}},
+        ]},
+    ]})
+
+    assert quiz.recommend(["a"]) == "island_x"
+    assert quiz.recommend(["unknown"]) is None
+    assert quiz.recommend([]) is None
+
+
+def test_ties_go_to_the_island_mentioned_first():
+    quiz = CompiledQuiz.compile({"questions": [
+        {"id": "q1", "options": [{"text": "a", "island_weights": {"island_x": 2, "island_y": 2}}]},
+    ]})
+
+    assert quiz.recommend(["a"]) == "island_x"
+
+
+def test_submit_returns_island_and_its_products(client):
+    response = client.post("/api/quiz/submit", json={
+        "answers": ["Padang terbuka yang luas", "Kayu dan tanah (woody, earthy)"],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["island"]["id"] == "island_sumba"
+    assert [product["id"] for product in body["products"]] == ["prod_sumba_50ml"]
+
+
+def test_submit_without_weighted_answers_is_rejected(client):
+    assert client.post("/api/quiz/submit", json={"answers": ["nothing"]}).status_code == 400
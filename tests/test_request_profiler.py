@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+import server
+from request_profiler import ProfileStore, ProfiledRoute, ProfilingMiddleware
+
+
+def profiled_app(store, **options):
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        await asyncio.sleep(0.01)
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ProfilingMiddleware, store=store, **options)
+    return TestClient(app)
+
+
+def test_sampled_request_records_timings_and_call_tree(tmp_path):
+    store = ProfileStore(tmp_path)
+
+    assert profiled_app(store, sample_rate=1.0).get("/items/a?x=1").json() == {"id": "a"}
+
+    [summary] = store.list()
+    assert (summary["reason"], summary["route"], summary["query"], summary["status"]) == \
+        ("sampled", "/items/{item_id}", "x=1", 200)
+    assert summary["handler_ms"] >= 10
+    assert summary["total_ms"] >= summary["handler_ms"]
+    assert "call_tree" not in summary
+    assert "get_item" in store.get(summary["id"])["call_tree"]
+
+
+def test_only_slow_requests_are_kept_without_sampling(tmp_path):
+    fast = ProfileStore(tmp_path / "fast")
+    slow = ProfileStore(tmp_path / "slow")
+
+    profiled_app(fast, slow_ms=10_000).get("/items/a")
+    profiled_app(slow, slow_ms=1).get("/items/a")
+
+    assert fast.list() == []
+    [summary] = slow.list()
+    assert summary["reason"] == "slow"
+    assert slow.get(summary["id"])["call_tree"] is None
+
+
+def test_store_keeps_the_newest_profiles(tmp_path):
+    store = ProfileStore(tmp_path, keep=2)
+    for profile_id in ("20250101-a", "20250102-b", "20250103-c"):
+        store.save({"id": profile_id})
+
+    assert [record["id"] for record in store.list()] == ["20250103-c", "20250102-b"]
+    assert store.get("20250101-a") is None
+    assert store.get("../20250103-c") == {"id": "20250103-c"}
+
+
+@pytest.fixture
+def stored_profile(monkeypatch, tmp_path):
+    store = ProfileStore(tmp_path)
+    store.save({"id": "20250101-a", "route": "/api/products", "call_tree": "tree"})
+    monkeypatch.setattr(server, "profile_store", store)
+    return store
+
+
+def test_admin_endpoints_list_and_fetch_profiles(client, admin_headers, stored_profile):
+    listing = client.get("/api/admin/profiles", headers=admin_headers).json()
+    assert listing["profiles"] == [{"id": "20250101-a", "route": "/api/products"}]
+
+    profile = client.get("/api/admin/profiles/20250101-a", headers=admin_headers).json()
+    assert profile["call_tree"] == "tree"
+    assert client.get("/api/admin/profiles/missing", headers=admin_headers).status_code == 404
+
+
+def test_admin_endpoints_require_a_login(client, stored_profile):
+    assert client.get("/api/admin/profiles").status_code == 403
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+
+import reviews
+import server
+from reviews import add_review, empty_summary, rebuild_summary
+
+REVIEW = {"reviewer_name": "Rina", "comment": "Lovely"}
+
+
+def post_review(client, rating, product_id="prod_buton_50ml"):
+    return client.post(f"/api/products/{product_id}/reviews", json={**REVIEW, "rating": rating})
+
+
+def test_summary_follows_created_and_deleted_reviews(client, admin_headers):
+    created = [post_review(client, rating).json() for rating in (5, 4, 4)]
+
+    summary = client.get("/api/products/prod_buton_50ml").json()["rating_summary"]
+    assert summary["count"] == 3
+    assert summary["total"] == 13
+    assert summary["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 2, "5": 1}
+    assert summary["mean"] == 4.33
+
+    response = client.delete(f"/api/admin/reviews/{created[0]['id']}", headers=admin_headers)
+    assert response.status_code == 200
+    summary = client.get("/api/products/prod_buton_50ml").json()["rating_summary"]
+    assert (summary["count"], summary["total"], summary["mean"]) == (2, 8, 4.0)
+
+
+def test_rebuild_matches_incremental_summary(client, db):
+    for rating in (1, 3, 5, 5):
+        post_review(client, rating)
+    incremental = db(lambda d: d.products.find_one({"id": "prod_buton_50ml"}))["rating_summary"]
+
+    rebuilt = db(lambda d: rebuild_summary(d, "prod_buton_50ml"))
+
+    assert rebuilt == incremental
+
+
+def test_review_for_unknown_product_leaves_nothing_behind(client, db):
+    assert post_review(client, 5, product_id="prod_missing").status_code == 404
+    assert db(lambda d: d.reviews.count_documents({})) == 0
+
+
+class Failing:
+    """A collection whose ``method`` raises, everything else passes through"""
+
+    def __init__(self, collection, method):
+        self.collection = collection
+        self.method = method
+
+    def __getattr__(self, name):
+        if name != self.method:
+            return getattr(self.collection, name)
+
+        async def fail(*args, **kwargs):
+            raise RuntimeError(f"{name} failed")
+        return fail
+
+
+def test_failed_insert_does_not_touch_the_summary(client, db):
+    review = {"id": "rev_1", "product_id": "prod_buton_50ml", "rating": 5, **REVIEW}
+    broken = SimpleNamespace(reviews=Failing(server.db.reviews, "insert_one"), products=server.db.products)
+
+    with pytest.raises(RuntimeError):
+        client.portal.call(add_review, broken, review)
+
+    summary = db(lambda d: d.products.find_one({"id": "prod_buton_50ml"})).get("rating_summary")
+    assert (summary or empty_summary())["count"] == 0
+
+
+def test_failed_summary_update_removes_the_review(client, db):
+    review = {"id": "rev_1", "product_id": "prod_buton_50ml", "rating": 5, **REVIEW}
+    broken = SimpleNamespace(reviews=server.db.reviews, products=Failing(server.db.products, "update_one"))
+
+    with pytest.raises(RuntimeError):
+        client.portal.call(add_review, broken, review)
+
+    assert db(lambda d: d.reviews.count_documents({})) == 0
+
+
+def test_reviews_are_rate_limited_per_client(client, monkeypatch):
+    monkeypatch.setattr(server, "review_limiter", server.RateLimiter(2, 3600))
+
+    statuses = [post_review(client, 5).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    response = post_review(client, 5)
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_review_does_not_restructure_the_catalog(client):
+    client.get("/api/products")
+    structure = server.catalog.structure_version("products")
+    other_etag = client.get("/api/products/prod_sumba_50ml").headers["ETag"]
+
+    assert post_review(client, 4).status_code == 200
+
+    assert server.catalog.structure_version("products") == structure
+    assert client.get("/api/products/prod_sumba_50ml").headers["ETag"] == other_etag
+    assert client.get("/api/products/prod_buton_50ml").json()["rating_summary"]["count"] == 1
+
+
+def test_summary_increment_shape():
+    assert reviews.summary_increment(4, sign=-1) == {
+        "rating_summary.count": -1,
+        "rating_summary.total": -4,
+        "rating_summary.histogram.4": -1,
+    }
@@ -0,0 +1,88 @@
+import pytest
+
+import server
+from search_index import SearchIndex
+
+
+def search(client, query="", **params):
+    return client.get("/api/search", params={"q": query, **params}).json()
+
+
+def ids(result):
+    return [hit["id"] for hit in result["results"]]
+
+
+@pytest.fixture
+def no_rebuilds(client, monkeypatch):
+    """Fail the test if the index falls back to a full rebuild after warm-up"""
+    search(client)
+
+    def rebuild(*args):
+        raise AssertionError("search index was rebuilt")
+    monkeypatch.setattr(server.search_index, "_rebuild", rebuild)
+
+
+def test_query_matches_all_terms_and_prefixes(client):
+    assert ids(search(client, "buton")) == ["prod_buton_50ml"]
+    assert ids(search(client, "buto")) == ["prod_buton_50ml"]
+    assert search(client, "buton xyzzy")["total"] == 0
+
+
+def test_facets_count_the_matched_products(client):
+    result = search(client)
+
+    assert result["total"] == 7
+    assert sum(result["facets"]["island_id"].values()) == 7
+    assert search(client, island_id="island_buton")["total"] == 1
+
+
+def test_product_edit_is_reindexed_incrementally(client, admin_headers, no_rebuilds):
+    client.put("/api/admin/products/prod_buton_50ml", headers=admin_headers,
+               json={"name": "Tamarillo Dusk", "description": "Ripe fruit at dusk"})
+
+    assert ids(search(client, "tamarillo")) == ["prod_buton_50ml"]
+    assert "prod_buton_50ml" not in ids(search(client, "parfum"))
+
+
+def test_deleted_and_hidden_products_drop_out(client, admin_headers, no_rebuilds):
+    client.delete("/api/admin/products/prod_sumba_50ml", headers=admin_headers)
+    client.put("/api/admin/products/prod_alor_50ml", json={"visible": False}, headers=admin_headers)
+
+    result = search(client)
+    assert result["total"] == 5
+    assert {"prod_sumba_50ml", "prod_alor_50ml"}.isdisjoint(ids(result))
+
+
+def test_island_edit_reindexes_its_products(client, admin_headers, no_rebuilds):
+    client.put("/api/admin/islands/island_buton", json={"story": "Kabut tamarillo di pagi hari"},
+               headers=admin_headers)
+
+    assert ids(search(client, "tamarillo")) == ["prod_buton_50ml"]
+
+
+def test_checkout_does_not_resync_the_index(client, monkeypatch):
+    search(client)
+    monkeypatch.setattr(server.search_index, "_index", lambda *args, **kwargs: pytest.fail("re-indexed"))
+
+    client.post("/api/orders", json={
+        "customer_name": "A", "customer_email": "a@example.com", "customer_phone": "1", "customer_address": "B",
+        "items": [{"product_id": "prod_buton_50ml", "quantity": 1}],
+    })
+
+    hit = search(client, "buton")["results"][0]
+    assert hit["stock"] == 49
+
+
+def test_incremental_name_order_matches_a_rebuild(client, admin_headers):
+    search(client)
+    for product_id, name in (("prod_buton_50ml", "Alor Eau de Parfum"), ("prod_papua_50ml", "A"),
+                             ("prod_nias_50ml", "Zz"), ("prod_papua_50ml", "Nias Eau de Parfum")):
+        client.put(f"/api/admin/products/{product_id}", json={"name": name}, headers=admin_headers)
+        search(client)
+
+    incremental = ids(search(client, limit=50))
+    fresh = SearchIndex(server.catalog)
+    rebuilt = [hit["id"] for hit in client.portal.call(lambda: fresh.search("", limit=50))["results"]]
+
+    assert incremental == rebuilt
+    assert incremental[-1] == "prod_nias_50ml"
@@ -0,0 +1,54 @@
+import server
+from similarity import product_vector
+
+
+def similar(client, product_id, **params):
+    return client.get(f"/api/products/{product_id}/similar", params=params)
+
+
+def test_similar_products_carry_their_score(client):
+    results = similar(client, "prod_buton_50ml", limit=4).json()
+
+    assert len(results) == 4
+    assert "prod_buton_50ml" not in [product["id"] for product in results]
+    scores = [product["similarity"] for product in results]
+    assert all(0 < score <= 1 for score in scores)
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_score_survives_field_selection(client):
+    results = similar(client, "prod_buton_50ml", fields="id,name").json()
+
+    assert set(results[0]) == {"id", "name", "similarity"}
+
+
+def test_hidden_products_are_not_recommended(client, admin_headers):
+    best = similar(client, "prod_buton_50ml", limit=1).json()[0]["id"]
+    client.put(f"/api/admin/products/{best}", json={"visible": False}, headers=admin_headers)
+
+    assert best not in [product["id"] for product in similar(client, "prod_buton_50ml").json()]
+
+
+def test_unknown_product_is_404(client):
+    assert similar(client, "prod_missing").status_code == 404
+
+
+def test_vectors_are_unit_length_and_share_family_words():
+    woody_aromatic = product_vector({"olfactive_family": "Woody Aromatic", "aroma_notes": {"top": ["Cedar"]}})
+    woody_spicy = product_vector({"olfactive_family": "Woody Spicy", "aroma_notes": {"top": ["Pepper"]}})
+
+    assert abs(sum(weight ** 2 for weight in woody_aromatic.values()) - 1) < 1e-9
+    assert set(woody_aromatic) & set(woody_spicy)
+
+
+def test_rank_puts_the_outlier_last(client):
+    woody = {"olfactive_family": "Woody Aromatic", "aroma_notes": {"base": ["Vetiver", "Cedar"]}, "mood": "Calm"}
+    products = [
+        {"id": "floral", "name": "A", "olfactive_family": "Floral Fruity", "aroma_notes": {"top": ["Rose"]}},
+        {"id": "woody_1", "name": "B", **woody},
+        {"id": "woody_2", "name": "C", **woody},
+    ]
+
+    ranked = client.portal.call(server.similarity_index.rank, products)
+
+    assert [product["id"] for product in ranked] == ["woody_1", "woody_2", "floral"]